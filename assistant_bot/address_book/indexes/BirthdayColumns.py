@@ -0,0 +1,255 @@
+"""
+Columnar mirror of the birthdays for vectorized reports, available with NumPy
+"""
+
+from assistant_bot.address_book.indexes.Index import Index
+
+try:
+    import numpy
+except ImportError:  # the reports are optional, the bot works without NumPy
+    numpy = None
+
+HAS_NUMPY = numpy is not None
+
+# 1970-01-01, day 0 of datetime64[D], was a Thursday
+EPOCH_WEEKDAY = 3
+
+class BirthdayColumns(Index):
+    """
+    Class for the NumPy columns of birth month, day and year
+
+    Every record with a birthday owns a row, the rows of removed records are
+    reused. Empty rows have month 0.
+
+    Attributes:
+    month -- the birth months, 0 for empty rows
+    day -- the birth days
+    year -- the birth years
+    names -- the record column: the name owning each row, None for empty rows
+    rows -- the row of each name
+    size -- the number of rows in use or freed
+    free -- the freed rows
+
+    Methods:
+    occurrences -- returns the next occurrence of every birthday
+    report -- computes the birthday report of the whole book
+    """
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        """
+        Replaces the columns with empty ones of 1024 rows
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.month = numpy.zeros(1024, numpy.uint8)
+        self.day = numpy.zeros(1024, numpy.uint8)
+        self.year = numpy.zeros(1024, numpy.uint16)
+        self.names = []
+        self.rows = {}
+        self.size = 0
+        self.free = []
+
+    def add(self, record):
+        """
+        Writes the birthday of a record into a row, if it has one
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if record.birthday:
+            self._put(record.name.value, record.birthday.value)
+
+    def remove(self, record):
+        """
+        Empties the row of a record, to be reused
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._drop(record.name.value)
+
+    def rename(self, record, old_name):
+        """
+        Gives the row of the old name of a record to the new name
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name owning the row
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        row = self.rows.pop(old_name, None)
+        if row is not None:
+            self.rows[record.name.value] = row
+            self.names[row] = record.name.value
+
+    def update(self, record, op, args):
+        """
+        Writes the new birthday of a record into its row
+
+        Arguments:
+        record -- the changed record
+        op -- the name of the change, only "add_birthday" changes the row
+        args -- the normalized arguments of the change
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if op == "add_birthday":
+            self._put(record.name.value, record.birthday.value)
+
+    def occurrences(self, today):
+        """
+        Returns the next occurrence of every birthday on or after today
+
+        Birthdays on February 29 fall on March 1 in non-leap years, since the
+        occurrence is the 29th day counted from February 1.
+
+        Arguments:
+        today -- the current date
+
+        Returns:
+        tuple -- the rows in use and their occurrences as datetime64[D]
+
+        Raises:
+        None
+        """
+        rows = numpy.flatnonzero(self.month[:self.size])
+        month = self.month[rows].astype(numpy.int64) - 1
+        day = self.day[rows].astype(numpy.int64) - 1
+
+        occurrence = self._month_starts(today.year)[month] + day
+        next_year = self._month_starts(today.year + 1)[month] + day
+        return rows, numpy.where(occurrence < numpy.datetime64(today, "D"), next_year, occurrence)
+
+    def report(self, today, days):
+        """
+        Computes the birthday report of the whole book
+
+        Arguments:
+        today -- the first day of the window
+        days -- the length of the window in days
+
+        Returns:
+        dict -- the number of birthdays, the counts per birth month and per birth decade,
+            the counts per week of the window by occurrence,
+            and the counts of the congratulations in the window per weekday, Monday to Friday
+
+        Raises:
+        None
+        """
+        rows, occurrence = self.occurrences(today)
+        offset = (occurrence - numpy.datetime64(today, "D")).astype(numpy.int64)
+        in_window = offset <= days
+
+        weekday = (occurrence.astype(numpy.int64) + EPOCH_WEEKDAY) % 7
+        # Congratulations on Saturday and Sunday move to the following Monday
+        congrats_weekday = numpy.where(weekday >= 5, 0, weekday)
+
+        decades, per_decade = numpy.unique(self.year[rows] // 10 * 10, return_counts=True)
+
+        return {
+            "count": len(rows),
+            "months": numpy.bincount(self.month[rows], minlength=13)[1:].tolist(),
+            "decades": dict(zip(decades.tolist(), per_decade.tolist())),
+            "weeks": numpy.bincount(offset[in_window] // 7, minlength=days // 7 + 1).tolist(),
+            "weekdays": numpy.bincount(congrats_weekday[in_window], minlength=5).tolist(),
+        }
+
+    def _month_starts(self, year):
+        """
+        Returns the first day of each month of a year
+
+        Arguments:
+        year -- the year
+
+        Returns:
+        numpy.ndarray -- the 12 dates as datetime64[D]
+        """
+        months = numpy.arange(f"{year}-01", f"{year + 1}-01", dtype="datetime64[M]")
+        return months.astype("datetime64[D]")
+
+    def _put(self, name, birthday):
+        """
+        Writes the birthday of a name into its row, taking a row if it has none
+
+        Arguments:
+        name -- the name of the record
+        birthday -- the date of birth
+
+        Returns:
+        None
+        """
+        row = self.rows.get(name)
+        if row is None:
+            row = self.free.pop() if self.free else self._grow()
+            self.rows[name] = row
+            self.names[row] = name
+        self.month[row] = birthday.month
+        self.day[row] = birthday.day
+        self.year[row] = birthday.year
+
+    def _drop(self, name):
+        """
+        Empties the row of a name
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        row = self.rows.pop(name, None)
+        if row is not None:
+            self.names[row] = None
+            self.month[row] = 0
+            self.free.append(row)
+
+    def _grow(self):
+        """
+        Returns a new row at the end, doubling the columns when they are full
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the row
+        """
+        if self.size == len(self.month):
+            capacity = 2 * len(self.month)
+            for column in ("month", "day", "year"):
+                grown = numpy.zeros(capacity, getattr(self, column).dtype)
+                grown[:self.size] = getattr(self, column)
+                setattr(self, column, grown)
+        self.names.append(None)
+        self.size += 1
+        return self.size - 1
@@ -0,0 +1,180 @@
+"""
+Calendar index of birthdays by day of the year
+"""
+
+import calendar
+import datetime
+from assistant_bot.address_book.indexes.Index import Index
+
+# Day of the year of the first day of each month, in a leap year
+MONTH_STARTS = [0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335]
+FEBRUARY_29 = MONTH_STARTS[1] + 28
+
+def day_of_year(month, day):
+    """
+    Returns the bucket of a birthday: its day of the year in a leap year, from 0 to 365
+
+    Arguments:
+    month -- the month of the birthday
+    day -- the day of the birthday
+
+    Returns:
+    int -- the bucket
+
+    Raises:
+    None
+    """
+    return MONTH_STARTS[month - 1] + day - 1
+
+class BirthdayIndex(Index):
+    """
+    Class for the 366-bucket calendar index of birthdays
+
+    Attributes:
+    buckets -- for each day of a leap year, the names with a birthday on that day
+    days -- the bucket of each indexed name
+
+    Methods:
+    upcoming -- returns the names with a birthday in a window of days
+    """
+    def __init__(self):
+        super().__init__()
+        self.clear()
+
+    def clear(self):
+        """
+        Empties all buckets
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.buckets = [set() for _ in range(366)]
+        self.days = {}
+
+    def add(self, record):
+        """
+        Puts the name of a record into the bucket of its birthday, if it has one
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if record.birthday:
+            self._put(record.name.value, record.birthday.value)
+
+    def remove(self, record):
+        """
+        Removes the name of a record from the bucket of its birthday
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._drop(record.name.value)
+
+    def rename(self, record, old_name):
+        """
+        Replaces the old name of a record with the new one in its bucket
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was indexed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._drop(old_name)
+        self.add(record)
+
+    def update(self, record, op, args):
+        """
+        Moves the name of a record to the bucket of its new birthday
+
+        Arguments:
+        record -- the changed record
+        op -- the name of the change, only "add_birthday" moves the name
+        args -- the normalized arguments of the change
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if op == "add_birthday":
+            self._drop(record.name.value)
+            self.add(record)
+
+    def upcoming(self, today, days):
+        """
+        Returns the names with a birthday from today to today + days, in date order
+
+        Only the buckets inside the window are visited. Birthdays on February 29
+        are celebrated on March 1 in non-leap years.
+
+        Arguments:
+        today -- the first day of the window
+        days -- the length of the window in days, from 0 to 365
+
+        Returns:
+        list -- the (occurrence date, name) pairs
+
+        Raises:
+        None
+        """
+        found = []
+        for offset in range(days + 1):
+            date = today + datetime.timedelta(days=offset)
+            names = self.buckets[day_of_year(date.month, date.day)]
+            if date.month == 3 and date.day == 1 and not calendar.isleap(date.year):
+                names = names | self.buckets[FEBRUARY_29]
+            found.extend((date, name) for name in sorted(names))
+        return found
+
+    def _put(self, name, birthday):
+        """
+        Puts a name into the bucket of its birthday
+
+        Arguments:
+        name -- the name of the record
+        birthday -- the date of birth
+
+        Returns:
+        None
+        """
+        day = day_of_year(birthday.month, birthday.day)
+        self.buckets[day].add(name)
+        self.days[name] = day
+
+    def _drop(self, name):
+        """
+        Removes a name from the bucket of its birthday
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        day = self.days.pop(name, None)
+        if day is not None:
+            self.buckets[day].discard(name)
@@ -0,0 +1,158 @@
+"""
+Base class for the in-memory indexes of the address book
+"""
+
+class Index:
+    """
+    Base class for the in-memory indexes of the address book
+
+    An index is built from all records the first time it is queried and
+    is kept up to date incrementally by the address book afterwards.
+    Records of the backends that load them lazily are scanned without being
+    kept in memory, and indexes of the names are built from the names alone.
+
+    Attributes:
+    built -- whether the index has been built
+
+    Methods:
+    ensure -- builds the index from the address book if it is not built yet
+    build -- fills the cleared index from the records of the address book
+    clear -- drops the content of the index
+    add -- adds a record to the index
+    add_many -- adds a batch of records to the index
+    remove -- removes a record from the index
+    rename -- moves a record to its new name
+    update -- applies a change made through one of the record methods
+    """
+    def __init__(self):
+        self.built = False
+
+    def ensure(self, book):
+        """
+        Builds the index from the address book if it is not built yet
+
+        Arguments:
+        book -- the address book to index
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.built:
+            return
+        with book.lock.write():
+            if self.built:
+                return
+            self.clear()
+            self.build(book.data)
+            self.built = True
+
+    def build(self, data):
+        """
+        Fills the cleared index from the records, with the address book locked
+
+        Arguments:
+        data -- the records by name
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        scan = getattr(data, "scan", None)
+        for record in scan() if scan is not None else data.values():
+            self.add(record)
+
+    def clear(self):
+        """
+        Drops the content of the index
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def add(self, record):
+        """
+        Adds a record to the index
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def add_many(self, records):
+        """
+        Adds a batch of records to the index, none of them indexed yet
+
+        Indexes that can merge a batch at once do it faster than record by record.
+
+        Arguments:
+        records -- the records to add, with distinct names
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for record in records:
+            self.add(record)
+
+    def remove(self, record):
+        """
+        Removes a record from the index
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def rename(self, record, old_name):
+        """
+        Moves a record to its new name
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was indexed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def update(self, record, op, args):
+        """
+        Applies a change made through one of the record methods
+
+        Arguments:
+        record -- the changed record
+        op -- the name of the change
+        args -- the normalized arguments of the change
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
@@ -0,0 +1,242 @@
+"""
+Sorted index of record names for prefix and range queries
+"""
+
+import bisect
+from assistant_bot.address_book.indexes.Index import Index
+
+# Sorts after any other character, closing the range of keys starting with a prefix
+LAST_CHARACTER = "\U0010ffff"
+
+class NameIndex(Index):
+    """
+    Class for the case-insensitive sorted index of record names
+
+    Queries are answered by binary search in O(log n + k). A record is added
+    by insertion in O(n), a batch of k records by sorting it and merging it in
+    O(n + k log k).
+
+    Attributes:
+    keys -- the (case-folded name, name) pairs, sorted
+
+    Methods:
+    prefix -- returns the names starting with a prefix
+    between -- returns the names from one prefix to another, both included
+    page -- returns the names at a position in name order
+    after -- returns the names following a name in name order
+    """
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+
+    def clear(self):
+        """
+        Drops all names
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.keys = []
+
+    def build(self, data):
+        """
+        Sorts the names of the records at once, without reading the records
+
+        Arguments:
+        data -- the records by name
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.keys = sorted((name.casefold(), name) for name in data)
+
+    def add(self, record):
+        """
+        Inserts the name of a record in order, in O(n)
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._insert(record.name.value)
+
+    def add_many(self, records):
+        """
+        Adds a batch of records, merging their sorted names into the keys at once
+
+        Arguments:
+        records -- the records to add, with distinct names not indexed yet
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        added = sorted((record.name.value.casefold(), record.name.value) for record in records)
+        if added:
+            # Sorting two sorted runs merges them in linear time
+            self.keys.extend(added)
+            self.keys.sort()
+
+    def remove(self, record):
+        """
+        Deletes the name of a record
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._delete(record.name.value)
+
+    def rename(self, record, old_name):
+        """
+        Moves a record from its old name to its position under the new one
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was indexed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._delete(old_name)
+        self._insert(record.name.value)
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns the names starting with a prefix, ignoring case
+
+        Arguments:
+        prefix -- the beginning of the names
+        limit -- the maximum number of names to return, or None for all of them
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        folded = prefix.casefold()
+        return self._slice((folded,), (folded + LAST_CHARACTER,), limit)
+
+    def between(self, low, high, limit=None):
+        """
+        Returns the names from one prefix to another, both included, ignoring case
+
+        Arguments:
+        low -- the first prefix, or "" to start from the first name
+        high -- the last prefix, or "" to go up to the last name
+        limit -- the maximum number of names to return, or None for all of them
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        end = (high.casefold() + LAST_CHARACTER,) if high else (LAST_CHARACTER,)
+        return self._slice((low.casefold(),), end, limit)
+
+    def page(self, offset, limit):
+        """
+        Returns the names at a position in name order
+
+        Arguments:
+        offset -- the number of names to skip
+        limit -- the maximum number of names to return
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        return [name for _, name in self.keys[offset:offset + limit]]
+
+    def after(self, name, limit):
+        """
+        Returns the names following a name in name order, whether it still exists or not
+
+        Arguments:
+        name -- the name to start after
+        limit -- the maximum number of names to return
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        first = bisect.bisect_right(self.keys, (name.casefold(), name))
+        return [name for _, name in self.keys[first:first + limit]]
+
+    def _slice(self, start, end, limit):
+        """
+        Returns the names of the keys from start to end
+
+        Arguments:
+        start -- the first key to include
+        end -- the first key to leave out
+        limit -- the maximum number of names to return, or None for all of them
+
+        Returns:
+        list -- the names, sorted
+        """
+        first = bisect.bisect_left(self.keys, start)
+        last = bisect.bisect_left(self.keys, end, lo=first)
+        if limit is not None:
+            last = min(last, first + limit)
+        return [name for _, name in self.keys[first:last]]
+
+    def _insert(self, name):
+        """
+        Inserts a name in order
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        key = (name.casefold(), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+
+    def _delete(self, name):
+        """
+        Deletes a name
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        key = (name.casefold(), name)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
@@ -0,0 +1,159 @@
+"""
+Reverse index from phone numbers to the names of their owners
+"""
+
+from assistant_bot.address_book.indexes.Index import Index
+
+class PhoneIndex(Index):
+    """
+    Class for the phone number to name index
+
+    Attributes:
+    owners -- for each phone number, how many times each name owns it
+
+    Methods:
+    find -- returns the names owning a phone number
+    """
+    def __init__(self):
+        super().__init__()
+        self.owners = {}
+
+    def clear(self):
+        """
+        Drops all phone numbers
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.owners = {}
+
+    def add(self, record):
+        """
+        Links each phone number of a record to its name
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for phone in record.phones:
+            self._link(phone.value, record.name.value)
+
+    def remove(self, record):
+        """
+        Unlinks each phone number of a record from its name
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for phone in record.phones:
+            self._unlink(phone.value, record.name.value)
+
+    def rename(self, record, old_name):
+        """
+        Links the phone numbers of a record to its new name instead of the old one
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was indexed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for phone in record.phones:
+            self._unlink(phone.value, old_name)
+            self._link(phone.value, record.name.value)
+
+    def update(self, record, op, args):
+        """
+        Links and unlinks the phone numbers added, removed or edited in a record
+
+        Arguments:
+        record -- the changed record
+        op -- the name of the change, only "add_phone", "remove_phone" and
+            "edit_phone" change the phone numbers
+        args -- the normalized phone numbers of the change, the old one first
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        name = record.name.value
+        match op:
+            case "add_phone":
+                self._link(args[0], name)
+            case "remove_phone":
+                self._unlink(args[0], name)
+            case "edit_phone":
+                self._unlink(args[0], name)
+                self._link(args[1], name)
+
+    def find(self, phone):
+        """
+        Returns the names owning a phone number
+
+        Arguments:
+        phone -- the normalized phone number
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        return sorted(self.owners.get(phone, ()))
+
+    def _link(self, phone, name):
+        """
+        Counts one more occurrence of a phone number in a record
+
+        Arguments:
+        phone -- the phone number
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        names = self.owners.setdefault(phone, {})
+        names[name] = names.get(name, 0) + 1
+
+    def _unlink(self, phone, name):
+        """
+        Counts one less occurrence of a phone number in a record
+
+        Arguments:
+        phone -- the phone number
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        names = self.owners.get(phone)
+        if not names or name not in names:
+            return
+        names[name] -= 1
+        if not names[name]:
+            del names[name]
+            if not names:
+                del self.owners[phone]
@@ -0,0 +1,224 @@
+"""
+Cache of the listings rendered from the records of the address book
+"""
+
+import threading
+from assistant_bot.address_book.indexes.Index import Index
+
+# Listings kept of each kind, the oldest is dropped first
+MAX_LISTINGS = 32
+
+class RenderCache(Index):
+    """
+    Class for the cache of the rendered pages of contacts and lists of birthdays
+
+    A listing is kept with the names it shows. A change made through the
+    record methods marks only the pages showing the record stale, and they
+    are joined again from the lines cached by the records, so only the
+    changed record is rendered again. Adding, removing or renaming a record
+    moves the records after it and drops all pages. Lists of birthdays are
+    dropped only by changes of a record with a birthday.
+
+    Listings are filled by queries sharing the read lock of the address book,
+    so the dictionaries are guarded by a small lock of their own, held only to
+    look up and store listings, never while rendering. Changes hold the write
+    lock of the address book, no query runs meanwhile.
+
+    Attributes:
+    pages -- the pages by query: the names, the first and last keys, the text or None
+        if stale, and the name to continue after or None on the last page
+    birthdays -- the lists of birthdays by first day and length of the window
+
+    Methods:
+    page -- returns a page rendered from the names of a query
+    upcoming -- returns a list of birthdays rendered from the pairs of a query
+    """
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def ensure(self, book):
+        """
+        Marks the cache built, listings are rendered when they are asked for
+
+        Arguments:
+        book -- the address book
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.built = True
+
+    def clear(self):
+        """
+        Drops all listings
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.pages = {}
+        self.birthdays = {}
+
+    def add(self, record):
+        """
+        Drops the pages, which the new record shifts, and the lists of birthdays if it has one
+
+        Arguments:
+        record -- the added record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.pages.clear()
+        if record.birthday:
+            self.birthdays.clear()
+
+    def remove(self, record):
+        """
+        Drops the pages, which the removed record shifts, and the lists of birthdays if it had one
+
+        Arguments:
+        record -- the removed record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.add(record)
+
+    def rename(self, record, old_name):
+        """
+        Drops the pages, the renamed record moves in name order, and the lists of birthdays
+        if it has one
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was listed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.add(record)
+
+    def update(self, record, op, args):
+        """
+        Marks the pages showing a changed record stale, and drops the lists of birthdays
+        when its birthday changed
+
+        Arguments:
+        record -- the changed record
+        op -- the name of the change
+        args -- the normalized arguments of the change
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        name = record.name.value
+        key = (name.casefold(), name)
+        for page in self.pages.values():
+            if page["names"] and page["first"] <= key <= page["last"]:
+                page["text"] = None
+        if op == "add_birthday":
+            self.birthdays.clear()
+
+    def page(self, query, data, names, limit):
+        """
+        Returns a page rendered from the names of a query, once per change of its records
+
+        Arguments:
+        query -- the key of the query, its kind and arguments
+        data -- the records by name
+        names -- a function returning up to limit + 1 names of the query, in name order
+        limit -- the maximum number of records on the page
+
+        Returns:
+        tuple -- the lines of the records, and the name to continue after or None
+            if the page is the last one
+
+        Raises:
+        None
+        """
+        with self._lock:
+            page = self.pages.get(query)
+        if page is None:
+            found = names()
+            shown = found[:limit]
+            page = self._keep(self.pages, query, {
+                "names": shown,
+                "first": (shown[0].casefold(), shown[0]) if shown else None,
+                "last": (shown[-1].casefold(), shown[-1]) if shown else None,
+                "text": None,
+                "cursor": shown[-1] if len(found) > limit else None,
+            })
+        text = page["text"]
+        if text is None:
+            text = "\n".join(str(data[name]) for name in page["names"])
+            with self._lock:
+                page["text"] = text
+        return text, page["cursor"]
+
+    def upcoming(self, window, data, pairs):
+        """
+        Returns a list of birthdays rendered from the pairs of a query
+
+        Arguments:
+        window -- the first day and the length of the window
+        data -- the records by name
+        pairs -- a function returning the (occurrence date, name) pairs in date order
+
+        Returns:
+        str -- the lines of the records, empty if there are none
+
+        Raises:
+        None
+        """
+        with self._lock:
+            text = self.birthdays.get(window)
+        if text is None:
+            text = self._keep(self.birthdays, window,
+                              "\n".join(data[name].congrats_line(date) for date, name in pairs()))
+        return text
+
+    def _keep(self, listings, key, listing):
+        """
+        Keeps a listing, dropping the oldest one when there are too many
+
+        A listing another query stored meanwhile is kept instead.
+
+        Arguments:
+        listings -- the listings of the kind
+        key -- the key of the listing
+        listing -- the listing
+
+        Returns:
+        dict or str -- the listing kept
+        """
+        with self._lock:
+            kept = listings.get(key)
+            if kept is not None:
+                return kept
+            if len(listings) >= MAX_LISTINGS:
+                listings.pop(next(iter(listings)), None)
+            listings[key] = listing
+            return listing
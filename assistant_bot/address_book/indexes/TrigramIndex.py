@@ -0,0 +1,284 @@
+"""
+Inverted index of name trigrams for typo-tolerant search
+"""
+
+import heapq
+import math
+from collections import Counter
+from assistant_bot.address_book.indexes.Index import Index
+
+# Similarity of a name to the query with one typo undone (two letters swapped,
+# one letter dropped or one added), relative to its similarity to the edited query
+EDIT_WEIGHT = 0.9
+
+def trigrams(text):
+    """
+    Returns the trigrams of a text, ignoring case
+
+    The text is padded with two spaces in front and one at the end,
+    so short texts and the beginning of names weigh more.
+
+    Arguments:
+    text -- the text
+
+    Returns:
+    set -- the trigrams
+
+    Raises:
+    None
+    """
+    padded = f"  {text.casefold()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex(Index):
+    """
+    Class for the trigram to name inverted index
+
+    Names are scored by the Jaccard similarity of their trigram sets. A name
+    reaching the threshold shares at least threshold * n of the n trigrams of
+    the query, so it contains one of the rarest ones: only their postings
+    produce candidates, the common trigrams are only counted for them.
+
+    A typo changes most trigrams of a short name, "Jhon" shares one of nine
+    with "John" and "Jon" two of seven. So the query is also looked up with
+    each typo undone: each pair of neighbouring letters swapped and each
+    letter dropped, the names containing all trigrams of such a variant being
+    found by intersecting their postings, smallest first, which ends at once
+    for the variants no name contains. A letter missing from the query is
+    found from the trigrams before and after the gap, keeping the names one
+    letter longer which are the query once that letter is dropped. The names
+    score their similarity to the variant, weighed by EDIT_WEIGHT.
+
+    Attributes:
+    postings -- for each trigram, the names containing it
+    sizes -- the number of trigrams of each name
+
+    Methods:
+    similar -- returns the names closest to a query
+    """
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+        self.sizes = {}
+
+    def clear(self):
+        """
+        Drops all postings
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.postings = {}
+        self.sizes = {}
+
+    def build(self, data):
+        """
+        Indexes the trigrams of the names, without reading the records
+
+        Arguments:
+        data -- the records by name
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for name in data:
+            self._insert(name)
+
+    def add(self, record):
+        """
+        Adds the name of a record to the postings of its trigrams
+
+        Arguments:
+        record -- the record to add
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._insert(record.name.value)
+
+    def remove(self, record):
+        """
+        Removes the name of a record from the postings of its trigrams
+
+        Arguments:
+        record -- the record to remove
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._delete(record.name.value)
+
+    def rename(self, record, old_name):
+        """
+        Replaces the trigrams of the old name of a record with those of the new one
+
+        Arguments:
+        record -- the renamed record
+        old_name -- the name the record was indexed under
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._delete(old_name)
+        self._insert(record.name.value)
+
+    def similar(self, query, limit=5, threshold=0.3):
+        """
+        Returns the names closest to a query, most similar first
+
+        A name one typo away from the query, two neighbouring letters swapped
+        or one letter dropped or added, is found even below the threshold.
+
+        Arguments:
+        query -- the text to look for
+        limit -- the maximum number of names to return
+        threshold -- the minimum similarity of a name, from 0 to 1
+
+        Returns:
+        list -- the (similarity, name) pairs
+
+        Raises:
+        None
+        """
+        scores = self._edited(query)
+        grams = sorted(trigrams(query), key=lambda gram: len(self.postings.get(gram, ())))
+        probe = len(grams) - max(1, math.ceil(threshold * len(grams))) + 1
+
+        shared = Counter()
+        for gram in grams[:probe]:
+            shared.update(self.postings.get(gram, ()))
+        for gram in grams[probe:]:
+            names = self.postings.get(gram, set())
+            shared.update(names.intersection(shared))
+
+        for name, count in shared.items():
+            score = count / (len(grams) + self.sizes[name] - count)
+            if score >= threshold and score > scores.get(name, 0):
+                scores[name] = score
+        scored = [(score, name) for name, score in scores.items()]
+        return sorted(heapq.nlargest(limit, scored), key=lambda item: (-item[0], item[1]))
+
+    def _edited(self, query):
+        """
+        Returns the names one typo away from the query
+
+        Arguments:
+        query -- the text to look for
+
+        Returns:
+        dict -- the similarity of each name, weighed by EDIT_WEIGHT
+        """
+        folded = query.casefold()
+        scores = {}
+        variants = set()
+        for i in range(len(folded)):
+            variants.add(folded[:i] + folded[i + 1:])
+            if i + 1 < len(folded) and folded[i] != folded[i + 1]:
+                variants.add(folded[:i] + folded[i + 1] + folded[i] + folded[i + 2:])
+        variants.discard("")
+
+        for variant in variants:
+            grams = trigrams(variant)
+            for name in self._containing(grams):
+                self._score(scores, name, EDIT_WEIGHT * len(grams) / self.sizes[name])
+
+        # A letter missing at position i leaves the trigrams before and after it intact
+        padded = f"  {folded} "
+        for i in range(len(folded) + 1):
+            before, after = padded[:i + 2], padded[i + 2:]
+            grams = {before[j:j + 3] for j in range(len(before) - 2)}
+            grams.update(after[j:j + 3] for j in range(len(after) - 2))
+            for name in self._containing(grams):
+                candidate = name.casefold()
+                if len(candidate) == len(folded) + 1 \
+                        and candidate[:i] + candidate[i + 1:] == folded:
+                    self._score(scores, name, EDIT_WEIGHT)
+        return scores
+
+    def _containing(self, grams):
+        """
+        Returns the names containing all of some trigrams, intersecting postings smallest first
+
+        Arguments:
+        grams -- the trigrams
+
+        Returns:
+        set -- the names, empty if there are no trigrams
+        """
+        names = None
+        for gram in sorted(grams, key=lambda gram: len(self.postings.get(gram, ()))):
+            posting = self.postings.get(gram, set())
+            names = posting if names is None else names & posting
+            if not names:
+                break
+        return names or set()
+
+    @staticmethod
+    def _score(scores, name, score):
+        """
+        Keeps the best similarity of a name
+
+        Arguments:
+        scores -- the similarity of each name
+        name -- the name
+        score -- a similarity of the name
+
+        Returns:
+        None
+        """
+        if score > scores.get(name, 0):
+            scores[name] = score
+
+    def _insert(self, name):
+        """
+        Adds a name to the postings of its trigrams
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        if name in self.sizes:
+            return
+        grams = trigrams(name)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(name)
+        self.sizes[name] = len(grams)
+
+    def _delete(self, name):
+        """
+        Removes a name from the postings of its trigrams
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+        """
+        if self.sizes.pop(name, None) is None:
+            return
+        for gram in trigrams(name):
+            names = self.postings.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.postings[gram]
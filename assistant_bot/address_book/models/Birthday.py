@@ -2,18 +2,53 @@ import re
 from datetime import datetime
 from assistant_bot.address_book.models.Field import Field
 
+BIRTHDAY_FORMAT = re.compile(r"^\d{2}\.\d{2}\.\d{4}$")
+
+def parse_birthday(value):
+    """
+    Parses a birthday in the DD.MM.YYYY format that is not in the future
+
+    Arguments:
+    value -- the birthday to parse
+
+    Returns:
+    datetime -- the date of birth
+
+    Raises:
+    ValueError -- if the value is invalid
+    """
+    message = "Invalid date format. Use DD.MM.YYYY"
+
+    if BIRTHDAY_FORMAT.match(value) is None:
+        raise ValueError(message)
+
+    try:
+        date = datetime(int(value[6:]), int(value[3:5]), int(value[:2]))
+    except ValueError:
+        raise ValueError(message) from None
+
+    if date > datetime.now():
+        raise ValueError(message)
+    return date
+
 class Birthday(Field):
     """
     Class for birthday fields
 
+    The date is stored as its day ordinal and read back as a datetime.
+
     Attributes:
     value -- the value of the field
+    ordinal -- the day ordinal of the date
 
     Methods:
     __init__ -- initializes the field
     __str__ -- returns the string representation of the field
-    __validate -- validates the field value
+    trusted -- creates a birthday field from an already validated date
+    from_ordinal -- creates a birthday field from the day ordinal of a validated date
     """
+    __slots__ = ("_ordinal",)
+
     def __init__(self, value):
         """
         Initializes the field
@@ -27,62 +62,114 @@ class Birthday(Field):
         Raises:
         ValueError -- if the value is invalid
         """
-        super().__init__(value)
+        super().__init__(parse_birthday(value))
 
-        message = "Invalid date format. Use DD.MM.YYYY"
+    @property
+    def value(self):
+        """
+        The date of birth, as a datetime at midnight
+        """
+        return datetime.fromordinal(self._ordinal)
 
-        if not self.__validate(value):
-            raise ValueError(message)
+    @value.setter
+    def value(self, value):
+        self._ordinal = value.toordinal()
 
-        self.value = datetime.strptime(value, "%d.%m.%Y")
+    @property
+    def ordinal(self):
+        """
+        The day ordinal of the date of birth
+        """
+        return self._ordinal
 
-    def __str__(self):
+    @classmethod
+    def trusted(cls, value):
         """
-        Returns the string representation of the field
+        Creates a birthday field from an already validated date, skipping validation
 
         Arguments:
+        value -- the date of birth
+
+        Returns:
+        Birthday -- the birthday field
+
+        Raises:
         None
+        """
+        birthday = cls.__new__(cls)
+        birthday.value = value
+        return birthday
+
+    @classmethod
+    def from_ordinal(cls, ordinal):
+        """
+        Creates a birthday field from the day ordinal of an already validated date
+
+        Arguments:
+        ordinal -- the day ordinal of the date of birth
 
         Returns:
-        str -- the string representation of the field
+        Birthday -- the birthday field
 
         Raises:
         None
         """
-        return self.value.strftime("%d.%m.%Y")
+        birthday = cls.__new__(cls)
+        birthday._ordinal = ordinal
+        return birthday
 
-    def __validate(self, value):
+    def __str__(self):
         """
-        Validates the field value format and that it's a valid date and not a future date
+        Returns the string representation of the field
 
         Arguments:
-        value -- the value to validate
+        None
 
         Returns:
-        bool -- True if the value is valid, False otherwise
+        str -- the string representation of the field
 
         Raises:
         None
         """
+        return self.value.strftime("%d.%m.%Y")
+
+class FrozenBirthday(Birthday):
+    """
+    Class for the birthday fields read from a record, which refuse to be changed
+
+    The record keeps the birthday as a day ordinal, so a change of the field
+    would not reach it. The birthday of a record is changed with add_birthday.
 
-        if not self.__validate_format(value):
-            return False
+    Attributes:
+    value -- the value of the field, read-only
+
+    Methods:
+    from_ordinal -- creates a read-only birthday field from the day ordinal of a validated date
+    """
+    __slots__ = ()
+
+    @property
+    def value(self):
+        """
+        The date of birth, as a datetime at midnight, read-only
+        """
+        return Birthday.value.fget(self)
 
-        try:
-            date = datetime.strptime(value, "%d.%m.%Y")
-            return date <= datetime.now()
-        except ValueError:
-            return False
+    @value.setter
+    def value(self, value):
+        raise AttributeError("The birthday of a record is changed with add_birthday")
 
-    def __validate_format(self, value):
+    def __reduce__(self):
         """
-        Validates the field value format
+        Returns how to pickle the field, as a birthday field that can be changed
 
         Arguments:
-        value -- the value to validate
+        None
 
         Returns:
-        bool -- True if the value is valid, False otherwise
-        """
+        tuple -- the function creating the field and its arguments
 
-        return re.match(r"^\d{2}\.\d{2}\.\d{4}$", value) is not None
+        Raises:
+        None
+        """
+        return Birthday.from_ordinal, (self.ordinal,)
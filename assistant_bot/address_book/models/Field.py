@@ -6,16 +6,54 @@ class Field:
     """
     Base class for all fields
 
+    Fields have no per-instance __dict__: each subclass declares the slots
+    holding its value, which may be stored in a compact form behind the
+    value property.
+
     Attributes:
     value -- the value of the field
 
     Methods:
     __init__ -- initializes the field
     __str__ -- returns the string representation of the field
+    __getstate__ -- returns the state of the field for pickling
+    __setstate__ -- restores the state of the field from a pickle
     """
+    __slots__ = ()
+
     def __init__(self, value):
         self.value = value
 
+    def __getstate__(self):
+        """
+        Returns the state of the field for pickling, the same as before fields had slots
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- the value of the field
+
+        Raises:
+        None
+        """
+        return {"value": self.value}
+
+    def __setstate__(self, state):
+        """
+        Restores the state of the field from a pickle
+
+        Arguments:
+        state -- the state of the field
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.value = state["value"]
+
     def __str__(self):
         """
         Returns the string representation of the field
@@ -2,18 +2,116 @@
 Class for name fields
 """
 
+import sys
 from .Field import Field
 
 class Name(Field):
     """
     Class for name fields
 
+    Names are interned, so the record, the address book keys and the
+    indexes share a single string.
+
     Attributes:
     value -- the value of the field
 
     Methods:
     __init__ -- initializes the field
+    trusted -- creates a name field from an already normalized name
     """
+    __slots__ = ("value",)
+
     def __init__(self, value):
-        super().__init__(value)
-        self.value = value.title()
+        super().__init__(sys.intern(value.title()))
+
+    @classmethod
+    def trusted(cls, value):
+        """
+        Creates a name field from an already normalized and interned name
+
+        Arguments:
+        value -- the name
+
+        Returns:
+        Name -- the name field
+
+        Raises:
+        None
+        """
+        name = cls.__new__(cls)
+        name.value = value
+        return name
+
+    def __setstate__(self, state):
+        """
+        Restores the state of the field from a pickle, interning the name
+
+        Arguments:
+        state -- the state of the field
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.value = sys.intern(state["value"])
+
+class FrozenName(Name):
+    """
+    Class for the name fields read from a record, which refuse to be changed
+
+    The record keeps the name in a compact form, so a change of the field
+    would not reach it. The name of a record is changed with update_name.
+
+    Attributes:
+    value -- the value of the field, read-only
+
+    Methods:
+    trusted -- creates a read-only name field from an already normalized name
+    """
+    __slots__ = ()
+
+    @property
+    def value(self):
+        """
+        The name, read-only
+        """
+        return Name.value.__get__(self)
+
+    @value.setter
+    def value(self, value):
+        raise AttributeError("The name of a record is changed with update_name")
+
+    @classmethod
+    def trusted(cls, value):
+        """
+        Creates a read-only name field from an already normalized and interned name
+
+        Arguments:
+        value -- the name
+
+        Returns:
+        FrozenName -- the name field
+
+        Raises:
+        None
+        """
+        name = cls.__new__(cls)
+        Name.value.__set__(name, value)
+        return name
+
+    def __reduce__(self):
+        """
+        Returns how to pickle the field, as a name field that can be changed
+
+        Arguments:
+        None
+
+        Returns:
+        tuple -- the function creating the field and its arguments
+
+        Raises:
+        None
+        """
+        return Name.trusted, (self.value,)
@@ -4,21 +4,63 @@ Class for phone fields with validation
 
 from .Field import Field
 
+def normalize_phone(phone):
+    """
+    Validates the phone number to be 10 digits long without any special characters
+
+    Arguments:
+    phone -- the phone number to validate
+
+    Returns:
+    str -- the validated phone number
+
+    Raises:
+    ValueError -- if the phone number is not 10 digits long
+    """
+    if not (len(phone) == 10 and phone.isdigit()):
+        phone = "".join([char for char in phone if char.isdigit()])
+    if len(phone) != 10:
+        raise ValueError("Phone number must be 10 digits long")
+    return phone
+
 class Phone(Field):
     """
     Class for phone fields
 
+    The number is stored as an integer and read back as 10 digits.
+
     Attributes:
     value -- the value of the field
+    number -- the phone number as an integer
 
     Methods:
     __init__ -- initializes the field
     __eq__ -- compares two phone fields
+    trusted -- creates a phone field from an already validated value
     _validate_phone -- validates the phone number
     """
+    __slots__ = ("_number",)
+
     def __init__(self, value):
-        super().__init__(value)
-        self.value = self._validate_phone(value)
+        super().__init__(self._validate_phone(value))
+
+    @property
+    def value(self):
+        """
+        The phone number as 10 digits
+        """
+        return f"{self._number:010d}"
+
+    @value.setter
+    def value(self, value):
+        self._number = int(value)
+
+    @property
+    def number(self):
+        """
+        The phone number as an integer
+        """
+        return self._number
 
     def __eq__(self, other):
         """
@@ -34,9 +76,27 @@ class Phone(Field):
         None
         """
         if isinstance(other, Phone):
-            return self.value == other.value
+            return self._number == other._number
         return False
 
+    @classmethod
+    def trusted(cls, value):
+        """
+        Creates a phone field from an already validated value, skipping validation
+
+        Arguments:
+        value -- the normalized phone number
+
+        Returns:
+        Phone -- the phone field
+
+        Raises:
+        None
+        """
+        phone = cls.__new__(cls)
+        phone.value = value
+        return phone
+
     def _validate_phone(self, phone):
         """
         Validates the phone number to be 10 digits long without any special characters
@@ -50,7 +110,64 @@ class Phone(Field):
         Raises:
         ValueError -- if the phone number is not 10 digits long
         """
-        phone = "".join([char for char in phone if char.isdigit()])
-        if len(phone) != 10:
-            raise ValueError("Phone number must be 10 digits long")
+        return normalize_phone(phone)
+
+class FrozenPhone(Phone):
+    """
+    Class for the phone fields read from a record, which refuse to be changed
+
+    The record keeps the numbers in a compact form, so a change of the field
+    would not reach it. The phones of a record are changed with its methods
+    or through its phones view.
+
+    Attributes:
+    value -- the value of the field, read-only
+
+    Methods:
+    trusted -- creates a read-only phone field from an already validated value
+    """
+    __slots__ = ()
+
+    @property
+    def value(self):
+        """
+        The phone number as 10 digits, read-only
+        """
+        return Phone.value.fget(self)
+
+    @value.setter
+    def value(self, value):
+        raise AttributeError("The phone numbers of a record are changed with edit_phone")
+
+    @classmethod
+    def trusted(cls, value):
+        """
+        Creates a read-only phone field from an already validated value
+
+        Arguments:
+        value -- the normalized phone number, or the number as an integer
+
+        Returns:
+        FrozenPhone -- the phone field
+
+        Raises:
+        None
+        """
+        phone = cls.__new__(cls)
+        phone._number = int(value)
         return phone
+
+    def __reduce__(self):
+        """
+        Returns how to pickle the field, as a phone field that can be changed
+
+        Arguments:
+        None
+
+        Returns:
+        tuple -- the function creating the field and its arguments
+
+        Raises:
+        None
+        """
+        return Phone.trusted, (self.value,)
@@ -0,0 +1,211 @@
+"""
+A live view of the phone numbers of a record
+"""
+
+from collections.abc import Sequence
+from assistant_bot.address_book.models.Phone import FrozenPhone, Phone
+
+class PhoneList(Sequence):
+    """
+    Class for the view of the phone numbers of a record
+
+    The view reads the numbers of the record on every access, and its
+    changes are made through the record methods, so they reach the record,
+    its address book and the storage like any other change.
+
+    Attributes:
+    record -- the record whose phone numbers are viewed
+
+    Methods:
+    __init__ -- initializes the view
+    __len__ -- returns the number of phone numbers
+    __getitem__ -- returns a phone number, or a list of them for a slice
+    __iter__ -- returns the phone numbers in order
+    __eq__ -- compares the phone numbers with a sequence of phone fields
+    __setitem__ -- replaces a phone number, like edit_phone
+    __delitem__ -- deletes a phone number, like remove_phone
+    append -- adds a phone number, like add_phone
+    extend -- adds phone numbers, like add_phone
+    remove -- deletes a phone number, like remove_phone
+    """
+    __slots__ = ("record",)
+
+    def __init__(self, record):
+        self.record = record
+
+    def __len__(self):
+        """
+        Returns the number of phone numbers
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of phone numbers
+
+        Raises:
+        None
+        """
+        return len(self.record._phones)
+
+    def __getitem__(self, index):
+        """
+        Returns a phone number, or a list of them for a slice
+
+        Arguments:
+        index -- the position of the phone number, or a slice
+
+        Returns:
+        FrozenPhone -- the phone number, or a list of them for a slice
+
+        Raises:
+        IndexError -- if the position is out of range
+        """
+        if isinstance(index, slice):
+            return [FrozenPhone.trusted(number) for number in self.record._phones[index]]
+        return FrozenPhone.trusted(self.record._phones[index])
+
+    def __iter__(self):
+        """
+        Returns the phone numbers in order
+
+        Arguments:
+        None
+
+        Returns:
+        iterator -- the phone numbers
+
+        Raises:
+        None
+        """
+        return (FrozenPhone.trusted(number) for number in self.record._phones)
+
+    def __eq__(self, other):
+        """
+        Compares the phone numbers with a sequence of phone fields
+
+        Arguments:
+        other -- the other sequence
+
+        Returns:
+        bool -- whether the sequences have equal phone numbers in the same order
+
+        Raises:
+        None
+        """
+        if isinstance(other, PhoneList):
+            return self.record._phones == other.record._phones
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __setitem__(self, index, phone):
+        """
+        Replaces a phone number, like edit_phone, the new number goes last
+
+        Arguments:
+        index -- the position of the phone number
+        phone -- the new phone number, a field or a string
+
+        Returns:
+        None
+
+        Raises:
+        IndexError -- if the position is out of range
+        ValueError -- if the phone number is invalid
+        """
+        self.record.edit_phone(self[index].value, self._value(phone))
+
+    def __delitem__(self, index):
+        """
+        Deletes a phone number, like remove_phone
+
+        Arguments:
+        index -- the position of the phone number
+
+        Returns:
+        None
+
+        Raises:
+        IndexError -- if the position is out of range
+        """
+        self.record.remove_phone(self[index].value)
+
+    def append(self, phone):
+        """
+        Adds a phone number, like add_phone
+
+        Arguments:
+        phone -- the phone number, a field or a string
+
+        Returns:
+        None
+
+        Raises:
+        ValueError -- if the phone number is invalid
+        """
+        self.record.add_phone(self._value(phone))
+
+    def extend(self, phones):
+        """
+        Adds phone numbers, like add_phone
+
+        Arguments:
+        phones -- the phone numbers, fields or strings
+
+        Returns:
+        None
+
+        Raises:
+        ValueError -- if a phone number is invalid
+        """
+        for phone in list(phones):
+            self.append(phone)
+
+    def remove(self, phone):
+        """
+        Deletes the first occurrence of a phone number, like remove_phone
+
+        Arguments:
+        phone -- the phone number, a field or a string
+
+        Returns:
+        None
+
+        Raises:
+        ValueError -- if the record does not have the phone number
+        """
+        self.record.remove_phone(self._value(phone))
+
+    def __repr__(self):
+        """
+        Returns the representation of the view
+
+        Arguments:
+        None
+
+        Returns:
+        str -- the phone numbers as a list
+
+        Raises:
+        None
+        """
+        return repr([phone.value for phone in self])
+
+    @staticmethod
+    def _value(phone):
+        """
+        Returns the value of a phone number given as a field or a string
+
+        Arguments:
+        phone -- the phone number
+
+        Returns:
+        str -- the phone number
+
+        Raises:
+        None
+        """
+        return phone.value if isinstance(phone, Phone) else phone
@@ -3,21 +3,37 @@ A model to store contact information, like name and phone numbers
 """
 
 import datetime
-from assistant_bot.address_book.models.Name import Name
+import sys
+from contextlib import nullcontext
+from assistant_bot.address_book.models.Name import FrozenName, Name
 from assistant_bot.address_book.models.Phone import Phone
-from assistant_bot.address_book.models.Birthday import Birthday
+from assistant_bot.address_book.models.PhoneList import PhoneList
+from assistant_bot.address_book.models.Birthday import Birthday, FrozenBirthday
+from assistant_bot.helpers.contacts import congrats_date, next_birthday
 
 class Record:
     """
     Class for storing contact information
 
+    The record keeps its fields in a compact form: the interned name, the
+    phone numbers as a tuple of integers and the birthday as a day ordinal.
+    The name and birthday attributes return read-only field objects built
+    from them, and the phones attribute a live view of the numbers whose
+    changes go through the record methods.
+
+    The rendered strings of the record are cached together with the fields
+    they were rendered from. Every change replaces the fields, so it
+    invalidates the cache, even for a rendering running in another thread.
+
     Attributes:
     name -- the name of the contact
     phones -- the phone numbers of the contact
+    birthday -- the birthday of the contact, or None
 
     Methods:
     __init__ -- initializes the record
     __str__ -- returns the string representation of the record
+    trusted -- creates a record from already validated fields
     add_birthday -- adds a birthday to the record
     add_phone -- adds a phone number to the record
     remove_phone -- deletes a phone number from the record
@@ -27,16 +43,98 @@ class Record:
     update_name -- updates the name of the record
     get_name -- returns the name of the record
     get_record -- returns the record
+    congrats_line -- returns the line of the record in a list of upcoming birthdays
+    copy -- returns a copy of the record that does not share mutable state
+    set_observer -- sets the object notified about changes of the record
     
     """
+    __slots__ = ("_name", "_phones", "_birthday", "_observer", "_rendered", "_congrats")
+
     def __init__(self, name):
-        self.name = Name(name)
-        self.phones = []
-        self.birthday = None
+        self._name = Name(name).value
+        self._phones = ()
+        self._birthday = 0
+        self._observer = None
+        self._rendered = None
+        self._congrats = None
+
+    @property
+    def name(self):
+        """
+        The name of the contact, read-only, changed with update_name
+        """
+        return FrozenName.trusted(self._name)
+
+    @name.setter
+    def name(self, name):
+        self._name = name.value
+
+    @property
+    def phones(self):
+        """
+        The phone numbers of the contact, a view changing them through the record methods
+        """
+        return PhoneList(self)
+
+    @phones.setter
+    def phones(self, phones):
+        self._phones = tuple(phone.number for phone in phones)
+
+    @property
+    def birthday(self):
+        """
+        The birthday of the contact, or None, read-only, changed with add_birthday
+        """
+        return FrozenBirthday.from_ordinal(self._birthday) if self._birthday else None
+
+    @birthday.setter
+    def birthday(self, birthday):
+        self._birthday = birthday.ordinal if birthday else 0
+
+    def __getstate__(self):
+        """
+        Returns the state of the record for pickling, without the observer
+
+        Arguments:
+        None
+
+        Returns:
+        tuple -- the name, the phone numbers and the birthday ordinal
+
+        Raises:
+        None
+        """
+        return self._name, self._phones, self._birthday
+
+    def __setstate__(self, state):
+        """
+        Restores the state of the record from a pickle
+
+        Records pickled by older versions have a dictionary of field objects as state.
+
+        Arguments:
+        state -- the state of the record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if isinstance(state, dict):
+            self.name = state["name"]
+            self.phones = state.get("phones", [])
+            self.birthday = state.get("birthday")
+        else:
+            name, self._phones, self._birthday = state
+            self._name = sys.intern(name)
+        self._observer = None
+        self._rendered = None
+        self._congrats = None
 
     def __str__(self):
         """
-        Returns the string representation of the record
+        Returns the string representation of the record, rendered once per change
 
         Arguments:
         None
@@ -47,7 +145,40 @@ class Record:
         Raises:
         None
         """
-        return f"Contact name: {self.name.value}, phones: {'; '.join(p.value for p in self.phones)}, birthday: {self.birthday}"
+        name, phones, birthday = self._name, self._phones, self._birthday
+        rendered = self._rendered
+        if rendered is not None and rendered[0] is name and rendered[1] is phones \
+                and rendered[2] == birthday:
+            return rendered[3]
+
+        text = f"Contact name: {name}, phones: {'; '.join(Phone.trusted(p).value for p in phones)}, birthday: {Birthday.from_ordinal(birthday) if birthday else None}"
+        self._rendered = (name, phones, birthday, text)
+        return text
+
+    @classmethod
+    def trusted(cls, name, phones, birthday):
+        """
+        Creates a record from already validated fields, skipping their validation
+
+        Arguments:
+        name -- the name of the record
+        phones -- the normalized phone numbers
+        birthday -- the date of birth, or None
+
+        Returns:
+        Record -- the record, without an observer
+
+        Raises:
+        None
+        """
+        record = cls.__new__(cls)
+        record._name = sys.intern(name)
+        record._phones = tuple(int(phone) for phone in phones)
+        record._birthday = birthday.toordinal() if birthday else 0
+        record._observer = None
+        record._rendered = None
+        record._congrats = None
+        return record
 
     def add_birthday(self, birthday):
         """
@@ -62,7 +193,9 @@ class Record:
         Raises:
         None
         """
-        self.birthday = Birthday(birthday)
+        birthday = Birthday(birthday)
+        with self._mutation("add_birthday", str(birthday)):
+            self._birthday = birthday.ordinal
 
     def add_phone(self, phone):
         """
@@ -77,7 +210,9 @@ class Record:
         Raises:
         None
         """
-        self.phones.append(Phone(phone))
+        phone = Phone(phone)
+        with self._mutation("add_phone", phone.value):
+            self._phones += (phone.number,)
 
     def remove_phone(self, phone):
         """
@@ -92,7 +227,9 @@ class Record:
         Raises:
         None
         """
-        self.phones.remove(Phone(phone))
+        phone = Phone(phone)
+        with self._mutation("remove_phone", phone.value):
+            self._phones = self._without(phone.number)
 
     def edit_phone(self, old_phone, new_phone):
         """
@@ -108,8 +245,9 @@ class Record:
         Raises:
         None
         """
-        self.phones.remove(Phone(old_phone))
-        self.phones.append(Phone(new_phone))
+        old_phone, new_phone = Phone(old_phone), Phone(new_phone)
+        with self._mutation("edit_phone", old_phone.value, new_phone.value):
+            self._phones = self._without(old_phone.number) + (new_phone.number,)
 
     def get_phones(self):
         """
@@ -119,7 +257,7 @@ class Record:
         None
 
         Returns:
-        list -- the phone numbers of the record
+        PhoneList -- the view of the phone numbers of the record
 
         Raises:
         None
@@ -157,7 +295,7 @@ class Record:
         Raises:
         None
         """
-        self.name = Name(name)
+        self._name = Name(name).value
 
     def get_name(self):
         """
@@ -204,6 +342,99 @@ class Record:
         """
         return self.name, self.phones
 
+    def congrats_line(self, occurrence):
+        """
+        Returns the line of the record in a list of upcoming birthdays, rendered once per change
+
+        Arguments:
+        occurrence -- the date of the next birthday of the contact
+
+        Returns:
+        str -- the name, the date to congratulate the contact on and the birthday
+
+        Raises:
+        None
+        """
+        name, birthday = self._name, self._birthday
+        rendered = self._congrats
+        if rendered is not None and rendered[0] is name and rendered[1] == birthday \
+                and rendered[2] == occurrence:
+            return rendered[3]
+
+        text = f"{name}: congrats on {congrats_date(occurrence):%d-%m-%Y} ({self.birthday})"
+        self._congrats = (name, birthday, occurrence, text)
+        return text
+
+    def copy(self):
+        """
+        Returns a copy of the record that does not share mutable state with it
+
+        The fields are immutable, so they are shared with the copy.
+
+        Arguments:
+        None
+
+        Returns:
+        Record -- the copy, without an observer
+
+        Raises:
+        None
+        """
+        record = Record.__new__(Record)
+        record.__setstate__(self.__getstate__())
+        return record
+
+    def set_observer(self, observer):
+        """
+        Sets the object notified about changes of the record
+
+        Arguments:
+        observer -- an object with a record_mutation(record, op, args) context manager, or None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._observer = observer
+
+    def _without(self, number):
+        """
+        Returns the phone numbers without the first occurrence of a number
+
+        Arguments:
+        number -- the phone number as an integer
+
+        Returns:
+        tuple -- the phone numbers
+
+        Raises:
+        ValueError -- if the record does not have the phone number
+        """
+        if number not in self._phones:
+            raise ValueError("Phone number not found")
+        position = self._phones.index(number)
+        return self._phones[:position] + self._phones[position + 1:]
+
+    def _mutation(self, op, *args):
+        """
+        Returns the context in which the record is changed
+
+        The observer is entered before the change and told about it after the
+        change succeeds.
+
+        Arguments:
+        op -- the name of the change
+        args -- the normalized arguments of the change
+
+        Returns:
+        context manager -- the observer context, or a no-op one without an observer
+        """
+        if self._observer is None:
+            return nullcontext()
+        return self._observer.record_mutation(self, op, args)
+
     def has_upcoming_birthday(self, date: datetime, days=7):
         """
         Checks if the birthday is upcoming in next days
@@ -221,17 +452,11 @@ class Record:
         if self.birthday:
             end_date = date + datetime.timedelta(days=days)
 
-            birthday = self.birthday.value
-
-            # Normalize the birthday year to this year
-            this_year_birthday = datetime.date(date.year, birthday.month, birthday.day)
-
-            # Adjust for edge cases where the birthday has already passed this year
-            if this_year_birthday < date:
-                this_year_birthday = this_year_birthday.replace(year=date.year + 1)
+            # The next occurrence, on or after the date, handles the year wrap and February 29
+            occurrence = next_birthday(self.birthday.value, date)
 
             # Check if the birthday falls within the range
-            return date <= this_year_birthday <= end_date
+            return occurrence <= end_date
 
         return False
 
@@ -255,9 +480,5 @@ class Record:
         if not date:
             date = datetime.date.today()
 
-        birthday = self.birthday.value
-        congrats_date = datetime.date(date.year, birthday.month, birthday.day)
-
-        while congrats_date.weekday() > 4:
-            congrats_date += datetime.timedelta(days=1)
-        return congrats_date.strftime('%d-%m-%Y')
+        occurrence = next_birthday(self.birthday.value, date)
+        return congrats_date(occurrence).strftime('%d-%m-%Y')
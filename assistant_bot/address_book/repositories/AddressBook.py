@@ -2,54 +2,241 @@
 An adress book class to manage contacts using Record model
 """
 
-import pickle
+import datetime
+import threading
+import time
 from collections import UserDict
+from contextlib import contextmanager
+from assistant_bot.address_book.indexes.BirthdayColumns import HAS_NUMPY, BirthdayColumns
+from assistant_bot.address_book.indexes.BirthdayIndex import BirthdayIndex
+from assistant_bot.address_book.indexes.NameIndex import NameIndex
+from assistant_bot.address_book.indexes.PhoneIndex import PhoneIndex
+from assistant_bot.address_book.indexes.RenderCache import RenderCache
+from assistant_bot.address_book.indexes.TrigramIndex import TrigramIndex
+from assistant_bot.address_book.models.Phone import Phone
 from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.LoadProgress import LoadProgress
+from assistant_bot.address_book.storage.backends import create_storage
+from assistant_bot.helpers.locks import ReadWriteLock
+from assistant_bot.helpers.metrics import METRICS
+
+# Records returned at a time by records() when the backend cannot scan them
+RECORDS_BATCH = 1024
 
 class AddressBook(UserDict):
     """
     Class to manage contacts
 
+    Records are kept and persisted by a storage backend: every mutation
+    is reported to the backend, which decides how to save it.
+
     Attributes:
     data -- the dictionary to store the records
+    backend -- the storage backend, or None until the address book is loaded
+    lock -- the readers-writer lock: queries share it, changes hold it alone
+    loading -- the progress of the load, or None until the address book is loaded
+    name_index -- the sorted index of record names
+    phone_index -- the index of record names by phone number
+    birthday_index -- the index of record names by day of birthday
+    trigram_index -- the index of record names by trigram
+    birthday_columns -- the NumPy columns of the birthdays, or None without NumPy
+    render_cache -- the cache of the rendered pages of contacts and lists of birthdays
+    indexes -- the in-memory indexes kept up to date with the records
+    mutations -- the number of mutations since the address book was created
+    unsaved -- the number of mutations since the last save
+    first_unsaved_at -- the time of the first mutation since the last save
+    last_mutation_at -- the time of the last mutation
 
     Methods:
+    dirty -- whether there are unsaved mutations
+    publishing -- the progress of a background load the records are published to
+    load -- loads the address book from the storage backend, possibly in the background
+    reload -- reads the address book again from the storage backend
+    dump -- saves pending changes
+    close -- saves pending changes and closes the storage backend
+    replay -- applies journal entries without reporting them to the backend
+    apply_entry -- applies a journal entry to the address book
+    record_mutation -- the context of a change made through a record
     add_record -- adds a record to the address book
+    add_records -- adds a batch of records to the address book
     remove_record -- deletes a record from the address book
     edit_record -- updates the name of the record
     find_record -- returns the record if found
+    records -- returns all records without loading them into memory at once
+    find_by_phone -- returns the records owning a phone number
+    search -- returns the records whose name starts with a prefix
+    between -- returns the records whose name is in a range of prefixes
+    complete -- returns the names starting with a prefix
+    page -- returns the records at a position in name order
+    page_after -- returns the records following a name in name order
+    render_page -- returns the rendered records at a position in name order
+    render_page_after -- returns the rendered records following a name in name order
+    find_similar -- returns the records whose name is closest to a query
+    upcoming_birthdays -- returns the records with a birthday in the next days
+    render_birthdays -- returns the rendered records with a birthday in the next days
+    birthday_report -- computes the birthday statistics of the whole book
     """
 
-    storage = "./data/book.pickle"
+    def __init__(self, *args, backend=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backend = backend
+        self.lock = ReadWriteLock()
+        self.loading = None
+        self.name_index = NameIndex()
+        self.phone_index = PhoneIndex()
+        self.birthday_index = BirthdayIndex()
+        self.trigram_index = TrigramIndex()
+        self.render_cache = RenderCache()
+        self.indexes = [self.name_index, self.phone_index, self.birthday_index,
+                        self.trigram_index, self.render_cache]
+        self.birthday_columns = BirthdayColumns() if HAS_NUMPY else None
+        if self.birthday_columns:
+            self.indexes.append(self.birthday_columns)
+        self.mutations = 0
+        self.unsaved = 0
+        self.first_unsaved_at = None
+        self.last_mutation_at = None
+        self._replaying = False
+
+    def __getstate__(self):
+        """
+        Returns the state of the address book for pickling
+
+        Arguments:
+        None
+
+        Returns:
+        dict -- the records
+
+        Raises:
+        None
+        """
+        return {"data": dict(self.data)}
 
-    def load(self):
+    def __setstate__(self, state):
         """
-        Loads the address book from a file
+        Restores the state of the address book from a pickle
+
+        Whole pickled address books are written by older versions only,
+        which also kept the last journal segment they include.
+
+        Arguments:
+        state -- the state of the address book
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.__init__()
+        self.data = state["data"]
+        self.journal_seq = state.get("journal_seq", 0)
+
+    @property
+    def dirty(self):
+        """
+        Returns whether there are mutations that are not saved yet
 
         Arguments:
         None
 
         Returns:
+        bool -- True if the address book has unsaved mutations
+
+        Raises:
         None
+        """
+        return self.unsaved > 0
+
+    @property
+    def publishing(self):
+        """
+        Returns the progress of a background load the storage publishes the records to
+
+        Arguments:
+        None
+
+        Returns:
+        LoadProgress -- the progress, or None unless the address book is loading in the background
 
         Raises:
         None
         """
-        try:
-            with open(self.storage, "rb") as file:
+        loading = self.loading
+        return loading if loading and loading.background and not loading.done else None
+
+    def load(self, background=False):
+        """
+        Loads the address book from the storage backend
+
+        The backend configured for the deployment is used unless one was given.
+        A background load holds the lock until the address book is loaded, so
+        the other methods wait for it, but a record found by name is returned
+        as soon as it is read.
+
+        Arguments:
+        background -- whether to return at once and load in a background thread
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.backend is None:
+            self.backend = create_storage()
+        self.loading = LoadProgress(background)
+        if not background:
+            try:
+                with METRICS.timed("load"):
+                    self.data = self.backend.load(self)
+            finally:
+                self.loading.finish()
+            return
+
+        locked = threading.Event()
+
+        def run():
+            with self.lock.write():
+                locked.set()
                 try:
-                    retored = pickle.load(file)
+                    with METRICS.timed("load"):
+                        self.data = self.backend.load(self)
                 except Exception as e:
                     print(f"Error loading address book: {e}")
-                    return
-                self.data = retored.data
+                finally:
+                    self.loading.finish()
+
+        threading.Thread(target=run, daemon=True).start()
+        locked.wait()
+
+    def reload(self):
+        """
+        Reads the address book again from the storage backend
+
+        Used when the storage was changed by another process in a way
+        that cannot be applied change by change. The indexes are rebuilt
+        the next time they are queried.
 
-        except FileNotFoundError:
-            print("Address book is empty, starting from scratch")
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock.write():
+            for index in self.indexes:
+                index.clear()
+                index.built = False
+            self.data = self.backend.read(self)
 
     def dump(self):
         """
-        Saves the address book to a file
+        Saves pending changes through the storage backend
 
         Arguments:
         None
@@ -60,12 +247,127 @@ class AddressBook(UserDict):
         Raises:
         None
         """
-        with open(self.storage, "wb") as file:
-            try:
-                pickle.dump(self, file)
-            except Exception as e:
-                print(f"Error saving address book: {e}")
-            
+        # The counters are changed under the lock, like in _count_mutations
+        with self.lock.write():
+            saved = self.unsaved
+
+        with METRICS.timed("dump"):
+            if self.backend and not self.backend.save(self):
+                return
+
+        with self.lock.write():
+            self.unsaved -= saved
+            if not self.unsaved:
+                self.first_unsaved_at = None
+
+    def close(self):
+        """
+        Saves pending changes and closes the storage backend
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.backend is None:
+            return
+        if self.loading:
+            self.loading.wait()
+        self.backend.flush()
+        if self.dirty:
+            self.dump()
+        self.backend.close()
+
+    def replay(self, entries):
+        """
+        Applies journal entries without reporting them to the storage backend
+
+        Arguments:
+        entries -- the journal entries
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._replaying = True
+        try:
+            for entry in entries:
+                try:
+                    self.apply_entry(entry)
+                except (KeyError, ValueError) as e:
+                    print(f"Skipping journal entry {entry['op']}: {e}")
+        finally:
+            self._replaying = False
+
+    def apply_entry(self, entry):
+        """
+        Applies a journal entry to the address book
+
+        Arguments:
+        entry -- the journal entry
+
+        Returns:
+        None
+
+        Raises:
+        KeyError -- if the entry refers to a missing record
+        ValueError -- if the entry is invalid
+        """
+        op, args = entry["op"], entry["args"]
+        match op:
+            case "add_record":
+                name, phones, birthday = args
+                record = Record(name)
+                for phone in phones:
+                    record.add_phone(phone)
+                if birthday:
+                    record.add_birthday(birthday)
+                self.add_record(record)
+            case "remove_record":
+                self.remove_record(*args)
+            case "edit_record":
+                self.edit_record(*args)
+            case "add_phone" | "remove_phone" | "edit_phone" | "add_birthday":
+                name, *rest = args
+                getattr(self.data[name], op)(*rest)
+            case _:
+                raise ValueError(f"Unknown journal entry {op}")
+
+    @contextmanager
+    def record_mutation(self, record, op, args):
+        """
+        The context of a change made through one of the record methods
+
+        The record is looked up again once the lock is held, so a record
+        removed or replaced by a concurrent change is not changed. The storage
+        backend is told about the record before the change, and the change is
+        reported to it once it succeeds.
+
+        Arguments:
+        record -- the record to change
+        op -- the name of the change
+        args -- the normalized arguments of the change
+
+        Returns:
+        context manager -- the context to change the record in
+
+        Raises:
+        ValueError -- if the record is no longer in the address book
+        """
+        with self.lock.write():
+            if self.data.get(record.name.value) is not record:
+                raise ValueError("Record not found")
+            if self.backend:
+                self.backend.preserve(record)
+            yield
+            self._indexed("update", record, op, args)
+            self._mutated(op, record.name.value, *args)
 
     def add_record(self, record: Record):
         """
@@ -80,7 +382,48 @@ class AddressBook(UserDict):
         Raises:
         None
         """
-        self.data[record.name.value] = record
+        with self.lock.write():
+            self._replaced(record.name.value)
+            self.data[record.name.value] = record
+            record.set_observer(self)
+            self._indexed("add", record)
+            self._mutated("add_record", record.name.value, [p.value for p in record.phones],
+                          str(record.birthday) if record.birthday else None)
+
+    def add_records(self, records):
+        """
+        Adds a batch of records to the address book
+
+        The batch is reported to the storage backend at once, and added to
+        the built indexes at once.
+
+        Arguments:
+        records -- the records to add
+
+        Returns:
+        int -- the number of records added
+
+        Raises:
+        None
+        """
+        mutations = []
+        with self.lock.write():
+            indexed = any(index.built for index in self.indexes)
+            # The last record of the batch with each name, which is the one kept
+            batch = {}
+            for record in records:
+                name = record.name.value
+                if indexed and name not in batch:
+                    self._replaced(name)
+                batch[name] = record
+                self.data[name] = record
+                record.set_observer(self)
+                mutations.append(("add_record", (name, [p.value for p in record.phones],
+                                                 str(record.birthday) if record.birthday else None)))
+            if indexed:
+                self._indexed("add_many", list(batch.values()))
+            self._mutated_many(mutations)
+        return len(mutations)
 
     def remove_record(self, name):
         """
@@ -95,9 +438,13 @@ class AddressBook(UserDict):
         Raises:
         ValueError -- if the record is not found
         """
-        if name not in self.data:
-            raise ValueError("Record not found")
-        del self.data[name]
+        with self.lock.write():
+            if name not in self.data:
+                raise ValueError("Record not found")
+            # The record keeps its observer, which refuses to change it from now on
+            record = self.data.pop(name)
+            self._indexed("remove", record)
+            self._mutated("remove_record", name)
 
     def edit_record(self, old_name, new_name):
         """
@@ -113,15 +460,26 @@ class AddressBook(UserDict):
         Raises:
         ValueError -- if the record is not found
         """
-        if old_name not in self.data:
-            raise ValueError("Record not found")
-        
-        self.data[new_name] = self.data.pop(old_name)
+        with self.lock.write():
+            if old_name not in self.data:
+                raise ValueError("Record not found")
+
+            record = self.data.pop(old_name)
+            if self.backend:
+                self.backend.preserve(record)
+            record.update_name(new_name)
+            self._replaced(record.name.value)
+            self.data[record.name.value] = record
+            self._indexed("rename", record, old_name)
+            self._mutated("edit_record", old_name, record.name.value)
 
     def find_record(self, name) -> Record:
         """
         Returns the record if found or raises an error if the record is not found
 
+        The error suggests the closest names when there are any. While the
+        address book loads in the background, only the record is waited for.
+
         Arguments:
         name -- the name of the record to find
 
@@ -131,9 +489,295 @@ class AddressBook(UserDict):
         Raises:
         ValueError -- if the record is not found
         """
-        if name not in self.data:
+        loading = self.publishing
+        if loading:
+            record = loading.wait_record(name)
+            if record is not None:
+                return record
+
+        with self.lock.read():
+            record = self.data.get(name)
+        if record is None:
+            suggestions = ", ".join(record.name.value for record in self.find_similar(name, 3))
+            if suggestions:
+                raise ValueError(f"Record {name} not found. Did you mean: {suggestions}?")
             raise ValueError(f"Record {name} not found")
-        return self.data[name]
+        return record
+
+    def records(self):
+        """
+        Returns all records one at a time
+
+        Backends that load records lazily read them without keeping them in memory.
+        Other records are taken in batches in name order, each under the read lock,
+        continuing after the last name of the previous batch like page_after, so
+        the records changed meanwhile are returned as they are when reached.
+
+        Arguments:
+        None
+
+        Returns:
+        iterator -- the records
+
+        Raises:
+        None
+        """
+        scan = getattr(self.data, "scan", None)
+        if scan is not None:
+            return scan()
+        return self._batches()
+
+    def find_by_phone(self, phone):
+        """
+        Returns the records owning a phone number
+
+        The number is normalized like Phone does. The storage backend answers
+        if it has its own index, the in-memory phone index otherwise.
+
+        Arguments:
+        phone -- the phone number to find
+
+        Returns:
+        list -- the records owning the phone number, sorted by name
+
+        Raises:
+        ValueError -- if the phone number is invalid
+        """
+        phone = Phone(phone).value
+        names = self.backend.find_by_phone(phone) if self.backend else None
+        if names is None:
+            self.phone_index.ensure(self)
+        with self.lock.read():
+            if names is None:
+                names = self.phone_index.find(phone)
+            return [self.data[name] for name in names]
+
+    def search(self, prefix):
+        """
+        Returns the records whose name starts with a prefix, ignoring case
+
+        Arguments:
+        prefix -- the beginning of the names
+
+        Returns:
+        list -- the records, sorted by name
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        with self.lock.read():
+            return [self.data[name] for name in self.name_index.prefix(prefix)]
+
+    def between(self, low, high):
+        """
+        Returns the records whose name is from one prefix to another, both included
+
+        Arguments:
+        low -- the first prefix, or "" to start from the first name
+        high -- the last prefix, or "" to go up to the last name
+
+        Returns:
+        list -- the records, sorted by name
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        with self.lock.read():
+            return [self.data[name] for name in self.name_index.between(low, high)]
+
+    def complete(self, prefix, limit=100):
+        """
+        Returns the names starting with a prefix, ignoring case
+
+        Arguments:
+        prefix -- the beginning of the names
+        limit -- the maximum number of names to return
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        with self.lock.read():
+            return self.name_index.prefix(prefix, limit)
+
+    def page(self, offset, limit):
+        """
+        Returns the records at a position in name order
+
+        Arguments:
+        offset -- the number of records to skip
+        limit -- the maximum number of records to return
+
+        Returns:
+        list -- the records, sorted by name
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        with self.lock.read():
+            return [self.data[name] for name in self.name_index.page(offset, limit)]
+
+    def page_after(self, name, limit):
+        """
+        Returns the records following a name in name order
+
+        The position is found by the name itself, so pages stay consistent
+        when records are added or removed between them.
+
+        Arguments:
+        name -- the name of the last record of the previous page
+        limit -- the maximum number of records to return
+
+        Returns:
+        list -- the records, sorted by name
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        with self.lock.read():
+            return [self.data[name] for name in self.name_index.after(name, limit)]
+
+    def render_page(self, offset, limit):
+        """
+        Returns the rendered records at a position in name order
+
+        The page is rendered once and kept until its records change.
+
+        Arguments:
+        offset -- the number of records to skip
+        limit -- the maximum number of records to return
+
+        Returns:
+        tuple -- the lines of the records, and the name to continue after
+            or None if no records follow
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        self.render_cache.ensure(self)
+        with self.lock.read():
+            return self.render_cache.page(("page", offset, limit), self.data,
+                                          lambda: self.name_index.page(offset, limit + 1), limit)
+
+    def render_page_after(self, name, limit):
+        """
+        Returns the rendered records following a name in name order
+
+        The page is rendered once and kept until its records change.
+
+        Arguments:
+        name -- the name of the last record of the previous page
+        limit -- the maximum number of records to return
+
+        Returns:
+        tuple -- the lines of the records, and the name to continue after
+            or None if no records follow
+
+        Raises:
+        None
+        """
+        self.name_index.ensure(self)
+        self.render_cache.ensure(self)
+        with self.lock.read():
+            return self.render_cache.page(("after", name, limit), self.data,
+                                          lambda: self.name_index.after(name, limit + 1), limit)
+
+    def find_similar(self, query, limit=5):
+        """
+        Returns the records whose name is closest to a query, tolerating typos
+
+        Arguments:
+        query -- the text to look for
+        limit -- the maximum number of records to return
+
+        Returns:
+        list -- the records, most similar first
+
+        Raises:
+        None
+        """
+        self.trigram_index.ensure(self)
+        with self.lock.read():
+            return [self.data[name] for _, name in self.trigram_index.similar(query, limit)]
+
+    def upcoming_birthdays(self, days=7, today=None):
+        """
+        Returns the records with a birthday from today to today + days
+
+        Arguments:
+        days -- the length of the window in days, from 0 to 365
+        today -- the first day of the window, defaults to the current date
+
+        Returns:
+        list -- the (record, occurrence date) pairs in date order
+
+        Raises:
+        ValueError -- if the window is out of range
+        """
+        if not 0 <= days <= 365:
+            raise ValueError("The birthdays window must be from 0 to 365 days.")
+        today = today or datetime.date.today()
+
+        upcoming = self._birthdays_query(today, days)
+        with self.lock.read():
+            return [(self.data[name], date) for date, name in upcoming()]
+
+    def render_birthdays(self, days=7, today=None):
+        """
+        Returns the rendered records with a birthday from today to today + days
+
+        The list is rendered once and kept until a birthday changes.
+
+        Arguments:
+        days -- the length of the window in days, from 0 to 365
+        today -- the first day of the window, defaults to the current date
+
+        Returns:
+        str -- a line per record in date order, empty if there are none
+
+        Raises:
+        ValueError -- if the window is out of range
+        """
+        if not 0 <= days <= 365:
+            raise ValueError("The birthdays window must be from 0 to 365 days.")
+        today = today or datetime.date.today()
+
+        upcoming = self._birthdays_query(today, days)
+        self.render_cache.ensure(self)
+        with self.lock.read():
+            return self.render_cache.upcoming((today, days), self.data, upcoming)
+
+    def birthday_report(self, days=90, today=None):
+        """
+        Computes the birthday statistics of the whole book in vectorized form
+
+        Arguments:
+        days -- the length of the window of upcoming birthdays, from 0 to 365
+        today -- the first day of the window, defaults to the current date
+
+        Returns:
+        dict -- the report, see BirthdayColumns.report
+
+        Raises:
+        ValueError -- if NumPy is not installed or the window is out of range
+        """
+        if self.birthday_columns is None:
+            raise ValueError("The birthday report requires NumPy.")
+        if not 0 <= days <= 365:
+            raise ValueError("The birthdays window must be from 0 to 365 days.")
+        today = today or datetime.date.today()
+
+        self.birthday_columns.ensure(self)
+        with self.lock.read():
+            return self.birthday_columns.report(today, days)
 
     def __str__(self):
         """
@@ -148,4 +792,130 @@ class AddressBook(UserDict):
         Raises:
         None
         """
-        return "\n".join(str(record) for record in self.data.values())
+        with self.lock.read():
+            return "\n".join(str(record) for record in self.data.values())
+
+    def _batches(self):
+        """
+        Returns all records in name order, taking them in batches under the read lock
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the records
+        """
+        last = None
+        while True:
+            # The index is built again if the book was reloaded meanwhile
+            self.name_index.ensure(self)
+            with self.lock.read():
+                names = (self.name_index.page(0, RECORDS_BATCH) if last is None
+                         else self.name_index.after(last, RECORDS_BATCH))
+                batch = [self.data[name] for name in names]
+            yield from batch
+            if len(names) < RECORDS_BATCH:
+                return
+            last = names[-1]
+
+    def _birthdays_query(self, today, days):
+        """
+        Returns the query of the names with a birthday in a window, to run with the lock held
+
+        The storage backend answers if it has its own index, the in-memory
+        birthday index otherwise, which is built first.
+
+        Arguments:
+        today -- the first day of the window
+        days -- the length of the window in days, from 0 to 365
+
+        Returns:
+        function -- returns the (occurrence date, name) pairs in date order
+        """
+        if self.backend and self.backend.birthday_index:
+            return lambda: self.backend.upcoming_birthdays(today, days)
+        self.birthday_index.ensure(self)
+        return lambda: self.birthday_index.upcoming(today, days)
+
+    def _mutated(self, op, *args):
+        """
+        Marks the address book dirty and reports the mutation to the storage backend
+
+        Mutations replayed from the journal are already saved and are ignored.
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the arguments of the mutation
+
+        Returns:
+        None
+        """
+        if self._replaying:
+            return
+
+        self._count_mutations(1)
+        if self.backend:
+            self.backend.record(op, args)
+
+    def _mutated_many(self, mutations):
+        """
+        Marks the address book dirty and reports a batch of mutations to the storage backend
+
+        Arguments:
+        mutations -- the (op, args) pairs of the mutations
+
+        Returns:
+        None
+        """
+        if self._replaying or not mutations:
+            return
+
+        self._count_mutations(len(mutations))
+        if self.backend:
+            self.backend.record_many(mutations)
+
+    def _count_mutations(self, count):
+        """
+        Counts new unsaved mutations
+
+        Arguments:
+        count -- the number of mutations
+
+        Returns:
+        None
+        """
+        now = time.monotonic()
+        self.mutations += count
+        self.unsaved += count
+        self.last_mutation_at = now
+        if self.first_unsaved_at is None:
+            self.first_unsaved_at = now
+
+    def _indexed(self, method, *args):
+        """
+        Applies a change to the indexes that are built
+
+        Arguments:
+        method -- the name of the Index method to call
+        args -- the arguments of the method
+
+        Returns:
+        None
+        """
+        for index in self.indexes:
+            if index.built:
+                getattr(index, method)(*args)
+
+    def _replaced(self, name):
+        """
+        Drops the record about to be overwritten by another one from the indexes
+
+        Arguments:
+        name -- the name being overwritten
+
+        Returns:
+        None
+        """
+        if any(index.built for index in self.indexes) and name in self.data:
+            replaced = self.data[name]
+            self._indexed("remove", replaced)
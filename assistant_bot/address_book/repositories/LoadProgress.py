@@ -0,0 +1,169 @@
+"""
+Progress of loading an address book, possibly in a background thread
+"""
+
+import threading
+import time
+
+class LoadProgress:
+    """
+    Class for the progress of loading an address book
+
+    While a book loads in the background the storage publishes its records
+    batch by batch as they are read, so a command about one contact waits
+    only until its record is read. Records changed by the journal are held
+    back until the journal is replayed.
+
+    Attributes:
+    background -- whether the book loads in a background thread
+    started -- the time.monotonic() value the load started at
+    finished -- the time.monotonic() value the load finished at, None while loading
+    first_command -- the time.monotonic() value the first command was answered at, or None
+    count -- the number of records read so far
+    held -- the names of the records that wait for the whole book to load
+    records -- the records published so far, dropped once the book is loaded
+
+    Methods:
+    __init__ -- initializes the progress
+    done -- whether the load finished
+    hold -- holds back the records changed by journal entries
+    publish -- makes records available before the book is loaded
+    finish -- marks the load finished
+    wait -- waits until the load finished
+    wait_record -- waits until a record is available
+    command_served -- notes that a command was answered
+    """
+    def __init__(self, background=False):
+        self.condition = threading.Condition()
+        self.background = background
+        self.started = time.monotonic()
+        self.finished = None
+        self.first_command = None
+        self.count = 0
+        self.held = set()
+        self.records = {}
+
+    @property
+    def done(self):
+        """
+        Returns whether the load finished
+
+        Arguments:
+        None
+
+        Returns:
+        bool -- True once the whole book is loaded, even if loading failed
+
+        Raises:
+        None
+        """
+        return self.finished is not None
+
+    def hold(self, entries):
+        """
+        Holds back the records changed by journal entries until the book is loaded
+
+        Arguments:
+        entries -- the journal entries that will be replayed
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for entry in entries:
+            args = entry["args"]
+            self.held.add(args[0])
+            if entry["op"] == "edit_record":
+                self.held.add(args[1])
+
+    def publish(self, records, book):
+        """
+        Makes records read from the storage available before the book is loaded
+
+        Arguments:
+        records -- the records read
+        book -- the address book observing the records
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.condition:
+            for record in records:
+                record.set_observer(book)
+                if record.name.value not in self.held:
+                    self.records[record.name.value] = record
+            self.count += len(records)
+            self.condition.notify_all()
+
+    def finish(self):
+        """
+        Marks the load finished and wakes up the waiting commands
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.condition:
+            self.finished = time.monotonic()
+            self.records = {}
+            self.held = set()
+            self.condition.notify_all()
+
+    def wait(self):
+        """
+        Waits until the load finished
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished is not None)
+
+    def wait_record(self, name):
+        """
+        Waits until a record is available or the load finished
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        Record -- the record, or None once the load finished, when the book has it
+
+        Raises:
+        None
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.finished is not None or name in self.records)
+            return self.records.get(name)
+
+    def command_served(self):
+        """
+        Notes that a command was answered, keeping the time of the first one
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.first_command is None:
+            self.first_command = time.monotonic()
@@ -0,0 +1,474 @@
+"""
+Compact binary snapshot format, read through mmap with lazy Record materialization
+
+Layout (little-endian):
+    header  -- magic, version, record count, journal segment, names and index offsets
+    bodies  -- per record: birthday day ordinal (0 if none), phone count, phones as integers
+    names   -- the UTF-8 names of the records
+    index   -- fixed-size entries sorted by name: name offset and length, body offset and length
+"""
+
+import datetime
+import heapq
+import mmap
+import struct
+from collections.abc import MutableMapping
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.storage.Snapshot import SnapshotView
+
+MAGIC = b"ABOOKBIN"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIQQQ")
+ENTRY = struct.Struct("<QIQI")
+BODY = struct.Struct("<iH")
+
+def is_binary_snapshot(file):
+    """
+    Checks whether a file starts with the binary snapshot magic, keeping its position
+
+    Arguments:
+    file -- the binary file to check
+
+    Returns:
+    bool -- True if the file is a binary snapshot
+
+    Raises:
+    None
+    """
+    position = file.tell()
+    magic = file.read(len(MAGIC))
+    file.seek(position)
+    return magic == MAGIC
+
+def encode_record(record):
+    """
+    Packs the phones and the birthday of a record into a body
+
+    Arguments:
+    record -- the record to pack
+
+    Returns:
+    bytes -- the body of the record
+
+    Raises:
+    None
+    """
+    phones = [int(phone.value) for phone in record.phones]
+    birthday = record.birthday.value.toordinal() if record.birthday else 0
+    return BODY.pack(birthday, len(phones)) + struct.pack(f"<{len(phones)}Q", *phones)
+
+def encode_batch(batch):
+    """
+    Packs a batch of records taken from a SnapshotView
+
+    Arguments:
+    batch -- the (name, record) pairs
+
+    Returns:
+    list -- the (name, body) pairs
+
+    Raises:
+    None
+    """
+    return [(name, encode_record(record)) for name, record in batch]
+
+def decode_record(name, body):
+    """
+    Builds a record from its name and body
+
+    Arguments:
+    name -- the name of the record
+    body -- the body of the record
+
+    Returns:
+    Record -- the record
+
+    Raises:
+    None
+    """
+    birthday, count = BODY.unpack_from(body)
+    phones = struct.unpack_from(f"<{count}Q", body, BODY.size)
+    return Record.trusted(name, phones, datetime.datetime.fromordinal(birthday) if birthday else None)
+
+class BinarySnapshot:
+    """
+    Class for reading a binary snapshot file through mmap
+
+    Attributes:
+    count -- the number of records
+    journal_seq -- the last journal segment included in the snapshot
+
+    Methods:
+    __init__ -- maps the file and reads the header
+    name -- returns the name of the i-th record in name order
+    body -- returns the body of the i-th record in name order
+    find -- returns the position of a name in the index
+    items -- returns the names and bodies of all records in name order
+    """
+    def __init__(self, file):
+        self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.journal_seq, self.names_offset, self.index_offset = \
+            HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unknown binary snapshot format")
+
+    def name(self, i):
+        """
+        Returns the name of the i-th record in name order
+
+        Arguments:
+        i -- the position in the index
+
+        Returns:
+        str -- the name
+
+        Raises:
+        None
+        """
+        offset, length, _, _ = ENTRY.unpack_from(self.mmap, self.index_offset + i * ENTRY.size)
+        start = self.names_offset + offset
+        return self.mmap[start:start + length].decode()
+
+    def body(self, i):
+        """
+        Returns the body of the i-th record in name order
+
+        Arguments:
+        i -- the position in the index
+
+        Returns:
+        bytes -- the body
+
+        Raises:
+        None
+        """
+        _, _, offset, length = ENTRY.unpack_from(self.mmap, self.index_offset + i * ENTRY.size)
+        return self.mmap[offset:offset + length]
+
+    def find(self, name):
+        """
+        Returns the position of a name in the index, by binary search
+
+        Arguments:
+        name -- the name to find
+
+        Returns:
+        int -- the position, or -1 if the name is not in the snapshot
+
+        Raises:
+        None
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.name(low) == name:
+            return low
+        return -1
+
+    def items(self, skip=()):
+        """
+        Returns the names and bodies of all records in name order
+
+        Arguments:
+        skip -- names to leave out
+
+        Returns:
+        generator -- the (name, body) pairs
+
+        Raises:
+        None
+        """
+        for i in range(self.count):
+            name = self.name(i)
+            if name not in skip:
+                yield name, self.body(i)
+
+class BinaryRecordMap(MutableMapping):
+    """
+    Class for the mapping of records backed by a binary snapshot
+
+    Records are decoded the first time they are touched and kept in an
+    overlay together with added records, removals are remembered separately.
+
+    Attributes:
+    base -- the BinarySnapshot of the file
+    book -- the address book observing the materialized records
+    cache -- the materialized and added records by name
+    added -- the names in the cache that are not in the snapshot
+    deleted -- the names of the snapshot that were removed
+
+    Methods:
+    __init__ -- initializes the mapping
+    __getitem__ -- returns a record, decoding it if needed
+    __setitem__ -- stores a record in the overlay
+    __delitem__ -- removes a record
+    __contains__ -- checks whether a record exists
+    __iter__ -- returns the names of the snapshot, then the added names
+    __len__ -- returns the number of records
+    scan -- returns all records without materializing them in the overlay
+    """
+    def __init__(self, base, book):
+        self.base = base
+        self.book = book
+        self.cache = {}
+        self.added = set()
+        self.deleted = set()
+
+    def __getitem__(self, name):
+        """
+        Returns a record, decoding it from the snapshot if it is not materialized yet
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        Record -- the record
+
+        Raises:
+        KeyError -- if the record does not exist
+        """
+        record = self.cache.get(name)
+        if record is None:
+            i = -1 if name in self.deleted else self.base.find(name)
+            if i < 0:
+                raise KeyError(name)
+            record = decode_record(name, self.base.body(i))
+            record.set_observer(self.book)
+            # Concurrent readers may decode the same record, all of them get the cached one
+            record = self.cache.setdefault(name, record)
+        return record
+
+    def __setitem__(self, name, record):
+        """
+        Stores a record in the overlay
+
+        Arguments:
+        name -- the name of the record
+        record -- the record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if name not in self.cache:
+            if name in self.deleted:
+                self.deleted.discard(name)
+            elif self.base.find(name) < 0:
+                self.added.add(name)
+        self.cache[name] = record
+
+    def __delitem__(self, name):
+        """
+        Removes a record
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+
+        Raises:
+        KeyError -- if the record does not exist
+        """
+        if name not in self:
+            raise KeyError(name)
+        self.cache.pop(name, None)
+        if name in self.added:
+            self.added.discard(name)
+        else:
+            self.deleted.add(name)
+
+    def __contains__(self, name):
+        """
+        Checks whether a record exists
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        bool -- True if the record exists
+
+        Raises:
+        None
+        """
+        if name in self.cache:
+            return True
+        return name not in self.deleted and self.base.find(name) >= 0
+
+    def __iter__(self):
+        """
+        Returns the names of the snapshot in name order, then the added names
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the names
+
+        Raises:
+        None
+        """
+        for i in range(self.base.count):
+            name = self.base.name(i)
+            if name not in self.deleted:
+                yield name
+        yield from list(self.added)
+
+    def __len__(self):
+        """
+        Returns the number of records
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of records
+
+        Raises:
+        None
+        """
+        return self.base.count - len(self.deleted) + len(self.added)
+
+    def scan(self):
+        """
+        Returns all records, decoding the ones that are not materialized without keeping them
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the records of the snapshot in name order, then the added records
+
+        Raises:
+        None
+        """
+        for i in range(self.base.count):
+            name = self.base.name(i)
+            if name in self.deleted:
+                continue
+            record = self.cache.get(name)
+            yield record if record is not None else decode_record(name, self.base.body(i))
+        for name in list(self.added):
+            record = self.cache.get(name)
+            if record is not None:
+                yield record
+
+class BinaryView:
+    """
+    Class for a point-in-time view of a BinaryRecordMap
+
+    Records that were never materialized are copied from the old snapshot
+    as they are, only the overlay is encoded again.
+
+    Attributes:
+    base -- the BinarySnapshot of the map
+    deleted -- the names of the snapshot removed when the view was taken
+    overlay -- the SnapshotView of the materialized records
+    count -- the number of records in the view
+
+    Methods:
+    __init__ -- takes the view
+    __len__ -- returns the number of records in the view
+    preserve -- keeps the current state of a record that is about to change
+    items -- returns the names and bodies of the records in name order
+    """
+    def __init__(self, data):
+        self.base = data.base
+        self.deleted = set(data.deleted)
+        self.overlay = SnapshotView(data.cache)
+        self.count = len(data)
+
+    def __len__(self):
+        """
+        Returns the number of records in the view
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of records
+
+        Raises:
+        None
+        """
+        return self.count
+
+    def preserve(self, record):
+        """
+        Keeps the current state of a record that is about to change
+
+        Arguments:
+        record -- the live record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.overlay.preserve(record)
+
+    def items(self):
+        """
+        Returns the names and bodies of the records in name order
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the (name, body) pairs
+
+        Raises:
+        None
+        """
+        overlay_names = set(self.overlay.records)
+        base = self.base.items(skip=self.deleted | overlay_names)
+        overlay = (item for batch in self.overlay.batches(encode=encode_batch, ordered=True)
+                   for item in batch)
+        return heapq.merge(base, overlay, key=lambda item: item[0])
+
+def write_binary_snapshot(file, view, journal_seq):
+    """
+    Writes a binary snapshot of a SnapshotView or a BinaryView
+
+    Arguments:
+    file -- the binary file to write to, which must be seekable
+    view -- the view to write
+    journal_seq -- the last journal segment included in the snapshot
+
+    Returns:
+    None
+
+    Raises:
+    None
+    """
+    if isinstance(view, BinaryView):
+        items = view.items()
+    else:
+        items = (item for batch in view.batches(encode=encode_batch, ordered=True)
+                 for item in batch)
+
+    file.write(bytes(HEADER.size))
+    names = bytearray()
+    index = bytearray()
+    offset = HEADER.size
+    count = 0
+    for name, body in items:
+        encoded = name.encode()
+        index += ENTRY.pack(len(names), len(encoded), offset, len(body))
+        names += encoded
+        file.write(body)
+        offset += len(body)
+        count += 1
+
+    file.write(names)
+    file.write(index)
+    file.seek(0)
+    file.write(HEADER.pack(MAGIC, VERSION, 0, count, journal_seq, offset, offset + len(names)))
+    file.seek(0, 2)
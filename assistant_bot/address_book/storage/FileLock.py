@@ -0,0 +1,168 @@
+"""
+Advisory lock file shared by the processes using the same address book files
+"""
+
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # advisory locks are POSIX only, elsewhere only threads are coordinated
+    fcntl = None
+
+class FileLock:
+    """
+    Class for an advisory lock on a file, held in shared or exclusive mode
+
+    Within a process the lock behaves like the readers-writer lock of the
+    address book: threads share it, or one thread holds it alone, and waiting
+    exclusive holders go before new shared ones. The process holds the file
+    lock as long as any of its threads does. Both modes are reentrant and a
+    thread holding it alone may share it, but a thread sharing it may not take
+    it alone, as upgrading a file lock is not atomic.
+
+    Attributes:
+    path -- the path of the lock file
+
+    Methods:
+    __init__ -- initializes the lock
+    shared -- the context holding the lock along with other readers
+    exclusive -- the context holding the lock alone
+    close -- closes the lock file
+    """
+    def __init__(self, path):
+        self.path = path
+        self._condition = threading.Condition(threading.Lock())
+        self._file = None
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def shared(self):
+        """
+        The context holding the lock along with the other threads and processes reading
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context holding the lock
+
+        Raises:
+        OSError -- if the lock file cannot be opened
+        """
+        held = self._held()
+        if held or self._writer == threading.get_ident():
+            # Already inside the lock, nothing can take it alone meanwhile
+            held.append(False)
+        else:
+            with self._condition:
+                self._condition.wait_for(lambda: self._writer is None and not self._waiting_writers)
+                if not self._readers:
+                    self._flock(fcntl.LOCK_SH if fcntl else None)
+                self._readers += 1
+            held.append(True)
+        try:
+            yield
+        finally:
+            if held.pop():
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._flock(fcntl.LOCK_UN if fcntl else None)
+                        self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        The context holding the lock alone
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context holding the lock
+
+        Raises:
+        OSError -- if the lock file cannot be opened
+        RuntimeError -- if the thread is sharing the lock
+        """
+        me = threading.get_ident()
+        if self._writer != me:
+            if any(self._held()):
+                raise RuntimeError("Cannot lock the file alone while sharing it")
+            with self._condition:
+                self._waiting_writers += 1
+                try:
+                    self._condition.wait_for(lambda: self._writer is None and not self._readers)
+                finally:
+                    self._waiting_writers -= 1
+                self._flock(fcntl.LOCK_EX if fcntl else None)
+                self._writer = me
+        self._writer_depth += 1
+        try:
+            yield
+        finally:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                with self._condition:
+                    self._flock(fcntl.LOCK_UN if fcntl else None)
+                    self._writer = None
+                    self._condition.notify_all()
+
+    def close(self):
+        """
+        Closes the lock file
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self._condition:
+            if self._file is not None and self._writer is None and not self._readers:
+                self._file.close()
+                self._file = None
+
+    def _held(self):
+        """
+        Returns the shared acquisitions of the current thread
+
+        Arguments:
+        None
+
+        Returns:
+        list -- True for each acquisition that counts as a reader, innermost last
+        """
+        held = getattr(self._local, "held", None)
+        if held is None:
+            held = self._local.held = []
+        return held
+
+    def _flock(self, operation):
+        """
+        Locks or unlocks the file for the process, with the condition held
+
+        A waiting flock holds up the other threads of the process, which would
+        wait for the file lock anyway.
+
+        Arguments:
+        operation -- the flock operation, or None without advisory locks
+
+        Returns:
+        None
+
+        Raises:
+        OSError -- if the lock file cannot be opened
+        """
+        if self._file is None:
+            self._file = open(self.path, "a+b")
+        if operation is not None:
+            fcntl.flock(self._file.fileno(), operation)
@@ -0,0 +1,605 @@
+"""
+Storage backend keeping the address book in a snapshot file and a journal
+"""
+
+import os
+import pickle
+import threading
+from contextlib import nullcontext
+from assistant_bot.address_book.storage.BinarySnapshot import BinaryRecordMap, BinarySnapshot, \
+                                                              BinaryView, is_binary_snapshot, \
+                                                              write_binary_snapshot
+from assistant_bot.address_book.storage.FileLock import FileLock
+from assistant_bot.address_book.storage.Journal import Journal
+from assistant_bot.address_book.storage.Snapshot import SnapshotView, atomic_write, \
+                                                        read_snapshot, write_snapshot
+from assistant_bot.address_book.storage.Storage import Storage
+from assistant_bot.helpers.metrics import METRICS
+
+def report_compression(stats):
+    """
+    Sets the gauges of the bytes saved and the CPU spent by the compression of a snapshot
+
+    Arguments:
+    stats -- the statistics written by write_snapshot, added up over the files of the snapshot
+
+    Returns:
+    None
+
+    Raises:
+    None
+    """
+    METRICS.set_gauge("snapshot_raw_bytes", stats["raw_bytes"])
+    METRICS.set_gauge("snapshot_compression_ratio",
+                      round(stats["raw_bytes"] / max(stats["written_bytes"], 1), 3))
+    METRICS.set_gauge("snapshot_compress_cpu_ms", round(stats["cpu_seconds"] * 1000, 1))
+
+class FileStorage(Storage):
+    """
+    Class for the snapshot file and journal storage backend
+
+    Every mutation is appended to a journal, so saving costs O(change).
+    The snapshot file is refreshed by compacting the journal in the
+    background. Snapshots are taken from a copy-on-write view of the
+    records and replace the file atomically.
+
+    Snapshots are written either as a stream of pickled records, optionally
+    compressed batch by batch, or in the compact binary format, which is read
+    through mmap and decodes records only when they are touched. All of them
+    are recognized when reading.
+
+    Files shared by several processes are read and appended to under an
+    advisory lock, and one snapshot is written at a time. Each process follows
+    the journal the others append to, so their changes are applied within a
+    poll interval without reading the snapshot again. Segments are removed one
+    snapshot later, so a process that is behind can still catch up; without
+    the journal, the snapshot is read again when another process replaces it.
+
+    Attributes:
+    path -- the path of the snapshot file
+    snapshot_format -- the format snapshots are written in, "pickle" or "binary"
+    compression -- the compressor of pickle snapshots, "zlib", "bz2" or "lzma", or None
+    compression_level -- the level of the compressor, its default if None
+    journal_prefix -- the path prefix of the journal segments
+    migrate_from -- the FileStorage imported when the snapshot file does not exist yet, or None
+    journal -- the journal of mutations since the snapshot, or None if disabled
+    journal_seq -- the last journal segment included in the snapshot
+    shared -- whether other processes may use the same files
+    poll_interval -- how often in seconds the changes of other processes are checked
+    lock -- the FileLock of the journal and snapshot shared with other processes, or None
+    snapshot_lock -- the FileLock held by the process writing a snapshot, or None
+
+    Methods:
+    __init__ -- initializes the backend
+    read -- loads the snapshot and replays the journal without opening it for writing
+    load -- reads the address book and opens the journal
+    record -- appends a mutation to the journal
+    record_many -- appends a batch of mutations to the journal
+    preserve -- keeps a record that is about to change for the running snapshot
+    save -- syncs the journal or writes a snapshot
+    compact -- folds the journal into a new snapshot in the background
+    refresh -- applies the changes other processes saved
+    flush -- waits for the running snapshot
+    close -- waits for the running snapshot and closes the journal
+    """
+    def __init__(self, path, journal=True, group_size=64, sync_interval=0.05,
+                 compact_bytes=4 * 1024 * 1024, snapshot_format="pickle", journal_prefix=None,
+                 migrate_from=None, shared=False, poll_interval=0.5, compression=None,
+                 compression_level=None):
+        self.path = path
+        self.snapshot_format = snapshot_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.journal_prefix = journal_prefix or os.path.splitext(path)[0] + ".journal"
+        self.migrate_from = migrate_from
+        self.journal = None
+        self.journal_seq = 0
+        self.journal_enabled = journal
+        self.group_size = group_size
+        self.sync_interval = sync_interval
+        self.compact_bytes = compact_bytes
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.lock = FileLock(path + ".lock") if shared else None
+        self.snapshot_lock = FileLock(path + ".snapshot.lock") if shared else None
+        self._view = None
+        self._snapshot = None
+        self._written = False
+        self._book = None
+        self._stale = False
+        self._generation = None
+        self._closing = threading.Event()
+        self._watcher = None
+
+    def read(self, book):
+        """
+        Loads the snapshot and replays the journal on top of it
+
+        While the address book loads in the background its records are
+        published as they are read, except those the journal changes.
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        dict -- the records by name
+
+        Raises:
+        None
+        """
+        with book.lock.write(), self._locked():
+            if self.migrate_from and not os.path.exists(self.path):
+                self._migrate(book)
+
+            self._generation = self._stat()
+            # Records read to be migrated are not the ones the address book keeps
+            loading = book.publishing if book.backend is self else None
+            found = self._read_snapshot(book, loading)
+
+            if self.journal_enabled:
+                journal = Journal(self.journal_prefix)
+                book.replay(journal.entries(journal.segments(after=self.journal_seq)))
+            # A book may live in the journal only, until its first snapshot
+            if not found and not book.data:
+                print("Address book is empty, starting from scratch")
+            return book.data
+
+    def load(self, book):
+        """
+        Reads the address book and opens the journal for new mutations
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        dict -- the records by name
+
+        Raises:
+        None
+        """
+        with book.lock.write(), self._locked():
+            data = self.read(book)
+            if self.journal_enabled:
+                self.journal = Journal(self.journal_prefix, self.group_size, self.sync_interval,
+                                       self.lock)
+                self.journal.open(after=self.journal_seq)
+
+        if self.shared:
+            self._book = book
+            self._watcher = threading.Thread(target=self._watch, args=(book,), daemon=True)
+            self._watcher.start()
+        return data
+
+    def record(self, op, args):
+        """
+        Appends a mutation to the journal
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the normalized arguments of the mutation
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.journal:
+            self._merge(self.journal.append({"op": op, "args": list(args)}))
+
+    def record_many(self, mutations):
+        """
+        Appends a batch of mutations to the journal at once
+
+        Arguments:
+        mutations -- the (op, args) pairs of the mutations
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self.journal:
+            self._merge(self.journal.extend([{"op": op, "args": list(args)}
+                                             for op, args in mutations]))
+
+    def preserve(self, record):
+        """
+        Keeps the state of a record that is about to change for the running snapshot
+
+        Arguments:
+        record -- the record to preserve
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self._view is not None:
+            self._view.preserve(record)
+
+    def save(self, book):
+        """
+        Saves pending changes
+
+        With the journal enabled only pending journal entries are synced,
+        and a compaction is started once the journal grows large enough.
+        Without it a full snapshot is written from a copy-on-write view and
+        waited for, so a failed write leaves the changes unsaved; the other
+        threads go on changing the book meanwhile.
+
+        Arguments:
+        book -- the address book to save
+
+        Returns:
+        bool -- False if a snapshot is still being written or writing it failed
+
+        Raises:
+        None
+        """
+        if self.journal:
+            self.journal.sync()
+            if self.journal.size() >= self.compact_bytes:
+                self.compact(book)
+            return True
+        if not self._start_snapshot(book, self.journal_seq):
+            return False
+        self._snapshot.join()
+        return self._written
+
+    def compact(self, book):
+        """
+        Folds the journal into a new snapshot in a background thread
+
+        The active segment is closed at the same moment the snapshot view is
+        taken, so the snapshot includes exactly the closed segments.
+
+        Arguments:
+        book -- the address book to save
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with book.lock.write(), self._locked(exclusive=True):
+            if self._snapshot and self._snapshot.is_alive():
+                return
+            if self.shared:
+                # The snapshot must include what the other processes appended
+                entries = self.journal.tail()
+                if entries is None:
+                    self._stale = True
+                    return
+                book.replay(entries)
+                if self.journal.size() < self.compact_bytes:
+                    return  # another process compacted the journal meanwhile
+            self._start_snapshot(book, self.journal.rotate())
+
+    def refresh(self, book):
+        """
+        Applies the changes other processes saved since the address book was read
+
+        The journal is read from where this process stopped. The address book is
+        read again when the journal was compacted past that point, or, without the
+        journal, when the snapshot was replaced and there are no unsaved changes.
+
+        Arguments:
+        book -- the address book
+
+        Returns:
+        bool -- whether the address book changed
+
+        Raises:
+        None
+        """
+        if self.journal:
+            if not self._stale and not self.journal.changed():
+                return False
+        elif self._stat() == self._generation:
+            return False
+
+        with book.lock.write(), self._locked():
+            if self.journal and not self._stale:
+                entries = self.journal.tail()
+                if entries is not None:
+                    book.replay(entries)
+                    return bool(entries)
+            elif not self.journal and book.dirty:
+                # Without the journal the changes cannot be merged, the next save replaces them
+                self._generation = self._stat()
+                return False
+
+            book.reload()
+            if self.journal:
+                self.journal.skip()
+            self._stale = False
+            return True
+
+    def flush(self):
+        """
+        Waits for the running snapshot to be written
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self._snapshot:
+            self._snapshot.join()
+
+    def close(self):
+        """
+        Stops following other processes, waits for the running snapshot and closes the journal
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self._closing.set()
+        if self._watcher:
+            self._watcher.join()
+        self.flush()
+        if self.journal:
+            self.journal.close()
+        if self.shared:
+            self.lock.close()
+            self.snapshot_lock.close()
+
+    def _migrate(self, book):
+        """
+        Writes the records of another storage as the first snapshot
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        None
+        """
+        self.migrate_from.read(book)
+        view = self._view_of(book.data)
+        atomic_write(self.path, lambda file: self._write(file, view, 0))
+
+    def _read_snapshot(self, book, loading=None):
+        """
+        Loads the records and the journal position from the snapshot file
+
+        Records saved under a key that differs from their name by older
+        versions are stored under their name again.
+
+        Arguments:
+        book -- the address book being loaded
+        loading -- the progress of a background load to publish the records to, or None
+
+        Returns:
+        bool -- False if there is no snapshot file yet, True otherwise
+        """
+        try:
+            with open(self.path, "rb") as file:
+                try:
+                    if is_binary_snapshot(file):
+                        base = BinarySnapshot(file)
+                        self.journal_seq = base.journal_seq
+                        book.data = BinaryRecordMap(base, book)
+                        return True
+                    publish = opened = None
+                    if loading:
+                        publish = lambda records: loading.publish(records, book)
+                        opened = lambda journal_seq: self._hold_journal(loading, journal_seq)
+                    stats = {}
+                    data, self.journal_seq = read_snapshot(file, publish, opened, stats)
+                    if stats.get("compression"):
+                        METRICS.set_gauge("snapshot_decompress_cpu_ms",
+                                          round(stats["cpu_seconds"] * 1000, 1))
+                except Exception as e:
+                    print(f"Error loading address book: {e}")
+                    return True
+
+        except FileNotFoundError:
+            return False
+
+        for name, record in data.items():
+            if record.name.value != name:
+                record.update_name(name)
+            record.set_observer(book)
+        book.data = {record.name.value: record for record in data.values()}
+        return True
+
+    def _hold_journal(self, loading, journal_seq):
+        """
+        Holds back the records the journal changes after a snapshot until it is replayed
+
+        Arguments:
+        loading -- the progress of the background load
+        journal_seq -- the last journal segment the snapshot includes
+
+        Returns:
+        None
+        """
+        if self.journal_enabled:
+            journal = Journal(self.journal_prefix)
+            loading.hold(journal.entries(journal.segments(after=journal_seq)))
+
+    def _start_snapshot(self, book, journal_seq):
+        """
+        Takes a copy-on-write view of the records and writes it in a background thread
+
+        Arguments:
+        book -- the address book to save
+        journal_seq -- the last journal segment the view includes
+
+        Returns:
+        bool -- False if another snapshot is still being written
+        """
+        with book.lock.write():
+            if self._snapshot and self._snapshot.is_alive():
+                return False
+            self._view = self._view_of(book.data)
+            self._written = False
+            self._snapshot = threading.Thread(target=self._write_snapshot,
+                                              args=(book, self._view, journal_seq))
+            self._snapshot.start()
+            return True
+
+    def _write_snapshot(self, book, view, journal_seq):
+        """
+        Snapshot thread: writes the view atomically, drops the journal it includes
+        and records whether the snapshot was written
+
+        Arguments:
+        book -- the address book being saved
+        view -- the SnapshotView to write
+        journal_seq -- the last journal segment the view includes
+
+        Returns:
+        None
+        """
+        try:
+            with self.snapshot_lock.exclusive() if self.shared else nullcontext():
+                replaced = self._snapshot_seq() if self.shared else journal_seq
+                if self.journal and self.shared and replaced >= journal_seq:
+                    self._written = True
+                    return  # another process wrote a snapshot including more of the journal
+
+                with METRICS.timed("snapshot"):
+                    size = atomic_write(self.path, lambda file: self._write(file, view, journal_seq))
+                METRICS.set_gauge("snapshot_bytes", size)
+                self.journal_seq = journal_seq
+                self._generation = self._stat()
+                if self.journal:
+                    # Other processes may still read the segments of the replaced snapshot
+                    self.journal.remove(replaced)
+                self._written = True
+        except Exception as e:
+            print(f"Error saving address book: {e}")
+        finally:
+            with book.lock.write():
+                self._view = None
+
+    def _locked(self, exclusive=False):
+        """
+        The context holding the file lock shared with other processes, if any
+
+        Arguments:
+        exclusive -- whether to hold the lock alone
+
+        Returns:
+        context manager -- the context
+        """
+        if self.lock is None:
+            return nullcontext()
+        return self.lock.exclusive() if exclusive else self.lock.shared()
+
+    def _merge(self, entries):
+        """
+        Applies the journal entries other processes appended before this process
+
+        Arguments:
+        entries -- the entries, or None if some were missed and the book must be read again
+
+        Returns:
+        None
+        """
+        if entries is None:
+            self._stale = True
+        elif entries:
+            self._book.replay(entries)
+
+    def _watch(self, book):
+        """
+        Watcher thread: applies the changes of other processes until the storage is closed
+
+        Arguments:
+        book -- the address book
+
+        Returns:
+        None
+        """
+        while not self._closing.wait(self.poll_interval):
+            try:
+                self.refresh(book)
+            except Exception as e:
+                print(f"Error reading the changes of other processes: {e}")
+
+    def _stat(self):
+        """
+        Returns the generation of the snapshot file, which changes whenever it is replaced
+
+        Arguments:
+        None
+
+        Returns:
+        tuple -- the inode, modification time and size, or None if there is no snapshot
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _snapshot_seq(self):
+        """
+        Returns the last journal segment included in the snapshot file, reading only its header
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the segment, 0 if there is no snapshot
+        """
+        try:
+            with open(self.path, "rb") as file:
+                if is_binary_snapshot(file):
+                    return BinarySnapshot(file).journal_seq
+                head = pickle.load(file)
+        except FileNotFoundError:
+            return 0
+        return head["journal_seq"] if isinstance(head, dict) else head.journal_seq
+
+    def _view_of(self, data):
+        """
+        Takes a copy-on-write view of the records suitable for the snapshot format
+
+        Arguments:
+        data -- the records of the address book
+
+        Returns:
+        SnapshotView or BinaryView -- the view
+        """
+        if isinstance(data, BinaryRecordMap):
+            if self.snapshot_format == "binary":
+                return BinaryView(data)
+            return SnapshotView(dict(data))
+        return SnapshotView(data)
+
+    def _write(self, file, view, journal_seq):
+        """
+        Writes a view in the snapshot format
+
+        Arguments:
+        file -- the binary file to write to
+        view -- the view to write
+        journal_seq -- the last journal segment the view includes
+
+        Returns:
+        None
+        """
+        if self.snapshot_format == "binary":
+            write_binary_snapshot(file, view, journal_seq)
+        else:
+            stats = {}
+            write_snapshot(file, view, journal_seq, self.compression, self.compression_level,
+                           stats)
+            report_compression(stats)
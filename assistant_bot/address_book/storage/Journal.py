@@ -0,0 +1,461 @@
+"""
+Append-only write-ahead journal for address book mutations
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+class Journal:
+    """
+    Class for the append-only journal of address book mutations
+
+    The journal is split into numbered segment files (``<prefix>.000001``, ...).
+    Entries are appended to the active segment as JSON lines and written to the
+    OS right away, while fsync is done for a group of entries at once by a
+    background flusher thread.
+
+    A journal shared by several processes is appended to under a file lock,
+    always in its last segment. Before appending, each process reads the entries
+    the others appended since its last read, and returns them to be applied.
+
+    Attributes:
+    prefix -- the path prefix of the segment files
+    group_size -- the number of pending entries that forces an fsync
+    sync_interval -- the maximum time in seconds an entry waits for an fsync
+    seq -- the sequence number of the active segment
+    file_lock -- the FileLock shared with the other processes, or None if the journal is private
+    position -- the segment and offset up to which a shared journal has been read
+
+    Methods:
+    __init__ -- initializes the journal
+    segments -- returns the segment files on disk
+    entries -- returns the entries of the given segments
+    open -- opens a new active segment
+    append -- appends an entry to the active segment
+    extend -- appends a batch of entries to the active segment
+    changed -- whether other processes may have appended to a shared journal
+    tail -- returns the entries other processes appended to a shared journal
+    skip -- marks the whole shared journal as read
+    sync -- writes pending entries to disk
+    size -- returns the size of the active segment
+    rotate -- closes the active segment and opens the next one
+    remove -- deletes segments that are no longer needed
+    close -- syncs and closes the journal
+    """
+    def __init__(self, prefix, group_size=64, sync_interval=0.05, file_lock=None):
+        self.prefix = prefix
+        self.group_size = group_size
+        self.sync_interval = sync_interval
+        self.seq = 0
+        self.file = None
+        self.pending = 0
+        self.closed = False
+        self.lock = threading.Condition()
+        self.flusher = None
+        self.file_lock = file_lock
+        self.position = None
+
+    def segments(self, after=0, upto=None):
+        """
+        Returns the segment files on disk ordered by their sequence number
+
+        Arguments:
+        after -- only segments with a greater sequence number are returned
+        upto -- only segments with a lower or equal sequence number are returned
+
+        Returns:
+        list -- tuples of the sequence number and the path of each segment
+
+        Raises:
+        None
+        """
+        directory, base = os.path.split(self.prefix)
+        directory = directory or "."
+        found = []
+        for entry in os.listdir(directory):
+            head, _, suffix = entry.rpartition(".")
+            if head != base or not suffix.isdigit():
+                continue
+            seq = int(suffix)
+            if seq > after and (upto is None or seq <= upto):
+                found.append((seq, os.path.join(directory, entry)))
+        return sorted(found)
+
+    def entries(self, segments):
+        """
+        Returns the entries of the given segments in order
+
+        A torn last line, left by a crash in the middle of a write, ends the segment.
+
+        Arguments:
+        segments -- the segments as returned by segments()
+
+        Returns:
+        generator -- the journal entries
+
+        Raises:
+        None
+        """
+        for _, path in segments:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+
+    def open(self, after=0):
+        """
+        Opens a new active segment after all existing ones
+
+        A shared journal keeps appending to its last segment if it follows the snapshot.
+        The caller holds the file lock since it read the journal.
+
+        Arguments:
+        after -- the lowest sequence number the new segment must exceed
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        existing = self.segments()
+        last = existing[-1][0] if existing else 0
+        with self.lock:
+            self.seq = last if self.file_lock and last > after else max(last, after) + 1
+            self.file = open(self._path(self.seq), "a", encoding="utf-8")
+            self.position = (self.seq, self._end())
+            self.closed = False
+        self.flusher = threading.Thread(target=self._run, daemon=True)
+        self.flusher.start()
+
+    def append(self, entry):
+        """
+        Appends an entry to the active segment
+
+        The entry reaches the OS immediately and the disk with the next group fsync.
+
+        Arguments:
+        entry -- the JSON serializable entry
+
+        Returns:
+        list -- the entries other processes appended before, or None if some were missed
+
+        Raises:
+        None
+        """
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._appending() as others:
+            with self.lock:
+                self.file.write(line)
+                self.file.flush()
+                self.pending += 1
+                if self.pending >= self.group_size:
+                    self._sync()
+                else:
+                    self.lock.notify()
+        return others
+
+    def extend(self, entries):
+        """
+        Appends a batch of entries to the active segment with a single write
+
+        Arguments:
+        entries -- the JSON serializable entries
+
+        Returns:
+        list -- the entries other processes appended before, or None if some were missed
+
+        Raises:
+        None
+        """
+        encoder = json.JSONEncoder(separators=(",", ":"))
+        lines = "".join(encoder.encode(entry) + "\n" for entry in entries)
+        with self._appending() as others:
+            with self.lock:
+                self.file.write(lines)
+                self.file.flush()
+                self.pending += len(entries)
+                self._sync()
+        return others
+
+    def changed(self):
+        """
+        Returns whether other processes may have appended to the shared journal since it was read
+
+        Only the sizes of the segment being read and the existence of the next one
+        are checked, so the journal can be polled often.
+
+        Arguments:
+        None
+
+        Returns:
+        bool -- True if the journal may have new entries
+
+        Raises:
+        None
+        """
+        seq, offset = self.position
+        try:
+            return os.stat(self._path(seq)).st_size != offset or os.path.exists(self._path(seq + 1))
+        except FileNotFoundError:
+            return True
+
+    def tail(self):
+        """
+        Returns the entries other processes appended to the shared journal since it was read
+
+        The segment the journal was read up to becomes the active one. If that segment
+        was already removed by a compaction, the journal is marked as read up to its end,
+        and None is returned since entries may have been missed.
+
+        Arguments:
+        None
+
+        Returns:
+        list -- the new entries in order, or None if some were missed
+
+        Raises:
+        None
+        """
+        if not self.changed():
+            return []
+        with self.file_lock.shared():
+            seq, offset = self.position
+            found = self.segments(after=seq - 1)
+            if not found or found[0][0] != seq:
+                self.skip()
+                return None
+
+            entries = []
+            for segment, path in found:
+                start = offset if segment == seq else 0
+                with open(path, "rb") as file:
+                    file.seek(start)
+                    data = file.read()
+                # A line without its end is still being written
+                end = data.rfind(b"\n") + 1
+                for line in data[:end].splitlines():
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # torn by a process that crashed in the middle of a write
+                self.position = (segment, start + end)
+            with self.lock:
+                self._follow()
+            return entries
+
+    def skip(self):
+        """
+        Marks the whole shared journal as read and makes its last segment the active one
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.file_lock.shared():
+            existing = self.segments()
+            with self.lock:
+                if existing and existing[-1][0] >= self.seq:
+                    seq, path = existing[-1]
+                    self.position = (seq, os.path.getsize(path))
+                else:
+                    self.position = (self.seq, self._end())
+                self._follow()
+
+    def sync(self):
+        """
+        Writes pending entries to disk
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            self._sync()
+
+    def size(self):
+        """
+        Returns the size of the active segment in bytes, other processes may append to it too
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the size of the active segment
+
+        Raises:
+        None
+        """
+        with self.lock:
+            return self._end()
+
+    def rotate(self):
+        """
+        Closes the active segment and opens the next one
+
+        The caller of a shared journal holds the file lock and has read its tail.
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the sequence number of the closed segment
+
+        Raises:
+        None
+        """
+        with self.lock:
+            self._sync()
+            self.file.close()
+            closed = self.seq
+            self.seq += 1
+            self.file = open(self._path(self.seq), "a", encoding="utf-8")
+            self.position = (self.seq, 0)
+            return closed
+
+    def remove(self, upto):
+        """
+        Deletes segments that are already part of a snapshot
+
+        Arguments:
+        upto -- the last sequence number to delete
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for _, path in self.segments(upto=upto):
+            os.remove(path)
+
+    def close(self):
+        """
+        Syncs and closes the journal
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self._sync()
+            self.file.close()
+            self.closed = True
+            self.lock.notify()
+        self.flusher.join()
+
+    def _path(self, seq):
+        """
+        Returns the path of a segment
+
+        Arguments:
+        seq -- the sequence number of the segment
+
+        Returns:
+        str -- the path of the segment
+        """
+        return f"{self.prefix}.{seq:06d}"
+
+    @contextmanager
+    def _appending(self):
+        """
+        The context of an append: the file lock of a shared journal is held, and its tail read
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context, giving the entries other processes appended before
+        """
+        if self.file_lock is None:
+            yield []
+            return
+        with self.file_lock.exclusive():
+            yield self.tail()
+            with self.lock:
+                self.position = (self.seq, self._end())
+
+    def _end(self):
+        """
+        Returns the size of the active segment, the lock must be held
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the size in bytes
+        """
+        self.file.flush()
+        return os.fstat(self.file.fileno()).st_size
+
+    def _follow(self):
+        """
+        Makes the segment the journal was read up to the active one, the lock must be held
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        seq = self.position[0]
+        if seq != self.seq:
+            self._sync()
+            self.file.close()
+            self.seq = seq
+            self.file = open(self._path(seq), "a", encoding="utf-8")
+
+    def _sync(self):
+        """
+        Fsyncs the active segment if there are pending entries, the lock must be held
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+
+    def _run(self):
+        """
+        Flusher thread: waits for a group of entries to gather and fsyncs it
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        with self.lock:
+            while not self.closed:
+                if not self.pending:
+                    self.lock.wait()
+                    continue
+                self.lock.wait(self.sync_interval)
+                if not self.closed:
+                    self._sync()
@@ -0,0 +1,452 @@
+"""
+Storage backend splitting the address book into shard files saved independently
+"""
+
+import json
+import os
+import threading
+import zlib
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from assistant_bot.address_book.storage.FileLock import FileLock
+from assistant_bot.address_book.storage.FileStorage import report_compression
+from assistant_bot.address_book.storage.Snapshot import SnapshotView, atomic_write, \
+                                                        read_snapshot, write_snapshot
+from assistant_bot.address_book.storage.Storage import Storage
+from assistant_bot.helpers.metrics import METRICS
+
+MANIFEST_FORMAT = "assistant-bot-shards"
+MANIFEST_VERSION = 1
+
+def shard_of(name, shards):
+    """
+    Returns the shard of a name, the same in every process
+
+    Arguments:
+    name -- the name of the record
+    shards -- the number of shards
+
+    Returns:
+    int -- the shard
+
+    Raises:
+    None
+    """
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+class ShardedStorage(Storage):
+    """
+    Class for the storage backend keeping the records in shard files
+
+    Records are spread over the shards by a hash of their name. Every mutation
+    marks the shards of the names it touches dirty, and a save rewrites only
+    those, from copy-on-write views in a background thread. The save waits for
+    the thread, so the changes stay unsaved when it fails, while the other
+    threads go on changing the book.
+
+    Shard files are never overwritten: a save writes the dirty shards to new
+    files and commits them by atomically replacing the manifest, which lists
+    the current file of every shard. After a crash the manifest names either
+    all the files of a save or none of them, so a record renamed into another
+    shard is never lost or kept twice. Files the manifest does not list are
+    left over from an interrupted save and are removed on load.
+
+    Shards are read by a thread pool and merged into a single dictionary.
+    The pool overlaps the reads of the files; unpickling holds the GIL, so it
+    gains nothing once the files are cached, and worker processes would have
+    to pickle the records again to send them back.
+
+    Several processes may open the same directory. Loads and saves hold a lock
+    file alone, so the cleanup never removes the files of a save in progress,
+    and a save is refused once another process committed a newer one, as it
+    would replace the newer shards with stale ones. The changes of other
+    processes are not followed.
+
+    Attributes:
+    directory -- the directory of the manifest and the shard files
+    shards -- the number of shards, taken from the manifest once there is one
+    workers -- the number of threads reading and writing shards
+    compression -- the compressor of the shard files, "zlib", "bz2" or "lzma", or None
+    compression_level -- the level of the compressor, its default if None
+    migrate_from -- the FileStorage imported when there is no manifest yet, or None
+    generation -- the number of the last committed save
+    files -- the file name of every shard, None for shards never written
+    names -- the names of the records in every shard
+    dirty -- the shards changed since the last save
+    shared -- whether other processes may use the same directory
+    lock -- the FileLock of the directory shared with other processes, or None
+
+    Methods:
+    __init__ -- initializes the backend
+    load -- reads the shards in parallel and returns the records
+    record -- marks the shards a mutation touches dirty
+    preserve -- keeps a record that is about to change for the running save
+    save -- writes the dirty shards in the background
+    flush -- waits for the running save
+    close -- waits for the running save
+    """
+    def __init__(self, directory, shards=16, workers=4, migrate_from=None, compression=None,
+                 compression_level=None, shared=False):
+        self.directory = directory
+        self.shards = shards
+        self.workers = workers
+        self.compression = compression
+        self.compression_level = compression_level
+        self.migrate_from = migrate_from
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.generation = 0
+        self.files = [None] * shards
+        self.names = [set() for _ in range(shards)]
+        self.dirty = set()
+        self.shared = shared
+        self.lock = FileLock(os.path.join(directory, "lock")) if shared else None
+        self._views = {}
+        self._writer = None
+        self._written = False
+
+    def load(self, book):
+        """
+        Reads the shards in parallel and returns the records
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        dict -- the records by name
+
+        Raises:
+        ValueError -- if the manifest is not a shard manifest
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with book.lock.write(), self._locked():
+            if not self._read_manifest():
+                return self._migrate(book)
+
+            with ThreadPoolExecutor(self.workers) as pool:
+                shards = list(pool.map(self._read_shard, self.files))
+            data = {}
+            for shard, records in enumerate(shards):
+                for record in records.values():
+                    record.set_observer(book)
+                data.update(records)
+                self.names[shard] = set(records)
+            self._remove_unlisted()
+            return data
+
+    def record(self, op, args):
+        """
+        Marks the shards a mutation touches dirty
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the normalized arguments of the mutation
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        shard = shard_of(args[0], self.shards)
+        self.dirty.add(shard)
+        match op:
+            case "add_record":
+                self.names[shard].add(args[0])
+            case "remove_record":
+                self.names[shard].discard(args[0])
+            case "edit_record":
+                self.names[shard].discard(args[0])
+                shard = shard_of(args[1], self.shards)
+                self.dirty.add(shard)
+                self.names[shard].add(args[1])
+
+    def preserve(self, record):
+        """
+        Keeps a record that is about to change for the running save
+
+        Arguments:
+        record -- the live record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        view = self._views.get(shard_of(record.name.value, self.shards))
+        if view is not None:
+            view.preserve(record)
+
+    def save(self, book):
+        """
+        Writes the dirty shards in a background thread and waits for it
+
+        Arguments:
+        book -- the address book to save
+
+        Returns:
+        bool -- False if the previous save is still being written or writing failed
+
+        Raises:
+        None
+        """
+        with book.lock.write():
+            if self._writer and self._writer.is_alive():
+                return False
+            if not self.dirty:
+                return True
+            self._views = {shard: SnapshotView({name: book.data[name] for name in self.names[shard]})
+                           for shard in sorted(self.dirty)}
+            self.dirty = set()
+            self._written = False
+            self._writer = threading.Thread(target=self._write_shards, args=(book, self._views))
+            self._writer.start()
+        self._writer.join()
+        return self._written
+
+    def flush(self):
+        """
+        Waits for the running save to be written
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        if self._writer:
+            self._writer.join()
+
+    def close(self):
+        """
+        Waits for the running save to be written and closes the lock file
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.flush()
+        if self.lock:
+            self.lock.close()
+
+    def _read_manifest(self):
+        """
+        Reads the number of shards, the generation and the shard files from the manifest
+
+        Arguments:
+        None
+
+        Returns:
+        bool -- False if there is no manifest yet
+
+        Raises:
+        ValueError -- if the manifest is not a shard manifest
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return False
+        if manifest.get("format") != MANIFEST_FORMAT:
+            raise ValueError("Unknown shard manifest format")
+
+        self.shards = manifest["shards"]
+        self.generation = manifest["generation"]
+        self.files = manifest["files"]
+        self.names = [set() for _ in range(self.shards)]
+        return True
+
+    def _read_shard(self, file_name):
+        """
+        Reads the records of a shard, run by the thread pool
+
+        Arguments:
+        file_name -- the file of the shard, or None if it was never written
+
+        Returns:
+        dict -- the records by name
+        """
+        if file_name is None:
+            return {}
+        with open(os.path.join(self.directory, file_name), "rb") as file:
+            return read_snapshot(file)[0]
+
+    def _migrate(self, book):
+        """
+        Writes the records of another storage as the first shards
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        dict -- the records by name
+        """
+        if self.migrate_from is None:
+            print("Address book is empty, starting from scratch")
+            return {}
+        data = dict(self.migrate_from.read(book))
+        if not data:
+            return {}
+
+        for name in data:
+            self.names[shard_of(name, self.shards)].add(name)
+        views = {shard: SnapshotView({name: data[name] for name in self.names[shard]})
+                 for shard in range(self.shards)}
+        self._commit(views)
+        return data
+
+    def _write_shards(self, book, views):
+        """
+        Writer thread: writes the views of the dirty shards, commits them and records
+        whether they were written
+
+        Arguments:
+        book -- the address book being saved
+        views -- the SnapshotView of every dirty shard
+
+        Returns:
+        None
+        """
+        try:
+            with self._locked():
+                self._commit(views)
+            self._written = True
+        except Exception as e:
+            print(f"Error saving address book: {e}")
+            with book.lock.write():
+                self.dirty.update(views)
+        finally:
+            with book.lock.write():
+                self._views = {}
+
+    def _commit(self, views):
+        """
+        Writes shards to new files and replaces the manifest, then removes the replaced files
+
+        Arguments:
+        views -- the SnapshotView of every shard to write
+
+        Returns:
+        None
+
+        Raises:
+        OSError -- if a file cannot be written, the new files are removed then
+        ValueError -- if another process committed a newer save
+        """
+        if self.shared and self._committed_generation() != self.generation:
+            raise ValueError("The shards were saved by another process, restart to read them")
+        generation = self.generation + 1
+        files = list(self.files)
+        names = {shard: f"shard-{shard:03d}.{generation:06d}.pickle" for shard in views}
+        try:
+            with METRICS.timed("snapshot"):
+                with ThreadPoolExecutor(self.workers) as pool:
+                    stats = list(pool.map(self._write_shard, names.values(), views.values()))
+                for shard, file_name in names.items():
+                    files[shard] = file_name
+                manifest = {
+                    "format": MANIFEST_FORMAT,
+                    "version": MANIFEST_VERSION,
+                    "shards": self.shards,
+                    "generation": generation,
+                    "files": files,
+                }
+                # The save is committed once the manifest is replaced
+                atomic_write(self.manifest_path,
+                             lambda file: file.write(json.dumps(manifest).encode("utf-8")))
+        except BaseException:
+            for file_name in names.values():
+                self._remove(file_name)
+            raise
+        METRICS.set_gauge("snapshot_bytes", sum(shard["size"] for shard in stats))
+        METRICS.set_gauge("snapshot_shards", len(views))
+        report_compression({key: sum(shard[key] for shard in stats)
+                            for key in ("raw_bytes", "written_bytes", "cpu_seconds")})
+
+        replaced = [self.files[shard] for shard in views if self.files[shard]]
+        self.files, self.generation = files, generation
+        for file_name in replaced:
+            self._remove(file_name)
+
+    def _write_shard(self, file_name, view):
+        """
+        Writes the view of a shard to its new file, run by the thread pool
+
+        Arguments:
+        file_name -- the new file of the shard
+        view -- the SnapshotView of the shard
+
+        Returns:
+        dict -- the size of the file in bytes and the statistics of its compression
+        """
+        stats = {}
+        stats["size"] = atomic_write(os.path.join(self.directory, file_name),
+                                     lambda file: write_snapshot(file, view, 0, self.compression,
+                                                                 self.compression_level, stats))
+        return stats
+
+    def _committed_generation(self):
+        """
+        Returns the generation of the manifest file, which another process may have replaced
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the generation, 0 if there is no manifest yet
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as file:
+                return json.load(file)["generation"]
+        except FileNotFoundError:
+            return 0
+
+    def _locked(self):
+        """
+        The context holding the lock file of the directory alone, if it is shared
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context
+        """
+        return self.lock.exclusive() if self.lock else nullcontext()
+
+    def _remove_unlisted(self):
+        """
+        Removes the shard files the manifest does not list, left over from an interrupted save
+
+        Arguments:
+        None
+
+        Returns:
+        None
+        """
+        listed = set(self.files)
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith("shard-") and file_name not in listed:
+                self._remove(file_name)
+
+    def _remove(self, file_name):
+        """
+        Removes a shard file if it exists
+
+        Arguments:
+        file_name -- the file of the shard
+
+        Returns:
+        None
+        """
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except FileNotFoundError:
+            pass
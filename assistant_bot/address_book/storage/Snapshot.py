@@ -0,0 +1,292 @@
+"""
+Crash-atomic, copy-on-write snapshots of the address book
+"""
+
+import bz2
+import lzma
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+SNAPSHOT_FORMAT = "assistant-bot-snapshot"
+# Version 2 may compress the batches into frames, version 1 streams are read as uncompressed
+SNAPSHOT_VERSION = 2
+
+# Compressors of the batch frames: compress(data, level), decompress(data) and the default level
+CODECS = {
+    "zlib": (lambda data, level: zlib.compress(data, level), zlib.decompress, 6),
+    "bz2": (lambda data, level: bz2.compress(data, level), bz2.decompress, 9),
+    "lzma": (lambda data, level: lzma.compress(data, preset=level), lzma.decompress, 6),
+}
+
+# Length prefix of a compressed frame
+FRAME_HEADER = struct.Struct("<I")
+
+# The umask can only be read by setting it, which is done once while the module is imported
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+
+class SnapshotView:
+    """
+    Class for a point-in-time view of the address book records
+
+    Creating the view only copies the dictionary of records. A record that is
+    about to change before it has been serialized is preserved by copying it
+    into the view, so the live book can keep changing while the view is written.
+
+    Attributes:
+    records -- the records that are not serialized yet
+    lock -- the lock shared by serialization and preservation
+    count -- the number of records in the view
+
+    Methods:
+    __init__ -- initializes the view
+    __len__ -- returns the number of records in the view
+    preserve -- keeps the current state of a record that is about to change
+    batches -- serializes the records in pickled batches
+    """
+    def __init__(self, data):
+        self.records = dict(data)
+        self.lock = threading.Lock()
+        self.count = len(self.records)
+
+    def __len__(self):
+        """
+        Returns the number of records in the view
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of records
+
+        Raises:
+        None
+        """
+        return self.count
+
+    def preserve(self, record):
+        """
+        Keeps the current state of a record that is about to change
+
+        Arguments:
+        record -- the live record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            name = record.name.value
+            if self.records.get(name) is record:
+                self.records[name] = record.copy()
+
+    def batches(self, size=1024, encode=None, ordered=False):
+        """
+        Serializes the records in batches
+
+        Each batch is taken from the view and encoded while holding the lock,
+        so a record cannot change while it is being serialized.
+
+        Arguments:
+        size -- the number of records in a batch
+        encode -- a function encoding a list of (name, record) pairs,
+            by default the records are pickled
+        ordered -- whether to serialize the records in name order instead of the view order
+
+        Returns:
+        generator -- the encoded batches
+
+        Raises:
+        None
+        """
+        encode = encode or pickle_batch
+        with self.lock:
+            names = sorted(self.records) if ordered else list(self.records)
+
+        for start in range(0, len(names), size):
+            with self.lock:
+                chunk = encode([(name, self.records.pop(name)) for name in names[start:start + size]])
+            yield chunk
+
+def pickle_batch(batch):
+    """
+    Pickles the records of a batch
+
+    Arguments:
+    batch -- the (name, record) pairs
+
+    Returns:
+    bytes -- the pickled list of records
+
+    Raises:
+    None
+    """
+    return pickle.dumps([record for _, record in batch], pickle.HIGHEST_PROTOCOL)
+
+def write_snapshot(file, view, journal_seq, compression=None, level=None, stats=None):
+    """
+    Writes a snapshot stream: a header followed by pickled batches of records
+
+    With compression every batch is compressed on its own into a frame
+    prefixed by its length, so the stream is written and read one batch
+    at a time. The header is never compressed.
+
+    Arguments:
+    file -- the binary file to write to
+    view -- the SnapshotView to write
+    journal_seq -- the last journal segment included in the snapshot
+    compression -- "zlib", "bz2" or "lzma", or None to write the batches as they are
+    level -- the compression level, the default of the compressor if None
+    stats -- a dictionary receiving the pickled and written bytes of the batches
+        and the CPU seconds spent compressing them, or None
+
+    Returns:
+    None
+
+    Raises:
+    ValueError -- if the compression is unknown
+    """
+    if compression:
+        if compression not in CODECS:
+            raise ValueError(f"Unknown snapshot compression {compression}")
+        compress, _, default_level = CODECS[compression]
+        level = default_level if level is None else level
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "journal_seq": journal_seq,
+        "count": len(view),
+        "compression": compression,
+        "level": level if compression else None,
+    }
+    pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+
+    raw = written = 0
+    cpu = 0.0
+    for chunk in view.batches():
+        raw += len(chunk)
+        if compression:
+            start = time.thread_time()
+            chunk = compress(chunk, level)
+            cpu += time.thread_time() - start
+            file.write(FRAME_HEADER.pack(len(chunk)))
+            written += FRAME_HEADER.size
+        file.write(chunk)
+        written += len(chunk)
+    if stats is not None:
+        stats.update(raw_bytes=raw, written_bytes=written, cpu_seconds=cpu)
+
+def read_snapshot(file, publish=None, opened=None, stats=None):
+    """
+    Reads a snapshot stream, or a whole pickled address book written by older versions
+
+    Compressed frames are read and decompressed one at a time.
+
+    Arguments:
+    file -- the binary file to read from
+    publish -- called with the records of each batch of a stream once they are read
+    opened -- called with the last journal segment of a stream before its records are read
+    stats -- a dictionary receiving the compression of the stream and the CPU seconds
+        spent decompressing it, or None
+
+    Returns:
+    tuple -- the dictionary of records and the last journal segment they include
+
+    Raises:
+    ValueError -- if the file is not a snapshot or is truncated
+    """
+    head = pickle.load(file)
+
+    if not isinstance(head, dict):
+        return head.data, head.journal_seq
+
+    if head.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("Unknown snapshot format")
+    compression = head.get("compression")
+    if compression and compression not in CODECS:
+        raise ValueError(f"Unknown snapshot compression {compression}")
+    if opened:
+        opened(head["journal_seq"])
+
+    cpu = 0.0
+    data = {}
+    remaining = head["count"]
+    while remaining > 0:
+        if compression:
+            prefix = file.read(FRAME_HEADER.size)
+            size = FRAME_HEADER.unpack(prefix)[0] if len(prefix) == FRAME_HEADER.size else 0
+            frame = file.read(size)
+            # A frame cut short by a crash would fail in the decompressor instead
+            if not frame or len(frame) != size:
+                raise ValueError("Truncated snapshot")
+            start = time.thread_time()
+            frame = CODECS[compression][1](frame)
+            cpu += time.thread_time() - start
+            batch = pickle.loads(frame)
+        else:
+            batch = pickle.load(file)
+        remaining -= len(batch)
+        for record in batch:
+            data[record.name.value] = record
+        if publish:
+            publish(batch)
+    if stats is not None:
+        stats.update(compression=compression, cpu_seconds=cpu)
+    return data, head["journal_seq"]
+
+def atomic_write(path, write):
+    """
+    Writes a file so that it either keeps its old content or gets the complete new one
+
+    The content goes to a temporary file in the same directory, which is
+    fsynced and renamed over the target, and the directory is fsynced too.
+    The file keeps the permissions of the target, or gets those of a file
+    created with open() if the target does not exist.
+
+    Arguments:
+    path -- the path of the file
+    write -- a function that writes the content to the binary file it receives
+
+    Returns:
+    int -- the size of the written file in bytes
+
+    Raises:
+    OSError -- if the file cannot be written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = 0o666 & ~UMASK
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".",
+                                             suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            # mkstemp creates the file readable by the owner only
+            if hasattr(os, "fchmod"):
+                os.fchmod(file.fileno(), mode)
+            else:
+                os.chmod(temporary, mode)
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    if hasattr(os, "O_DIRECTORY"):
+        descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+    return size
@@ -0,0 +1,606 @@
+"""
+Storage backend keeping the address book in a local SQLite database
+"""
+
+import itertools
+import sqlite3
+from datetime import datetime, timedelta
+import threading
+from collections.abc import MutableMapping
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.storage.Storage import Storage
+from assistant_bot.helpers.contacts import next_birthday
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    name TEXT PRIMARY KEY,
+    birthday TEXT,
+    birth_month INTEGER
+);
+CREATE INDEX IF NOT EXISTS records_birth_month ON records (birth_month);
+CREATE TABLE IF NOT EXISTS phones (
+    name TEXT NOT NULL REFERENCES records (name) ON DELETE CASCADE ON UPDATE CASCADE,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_name ON phones (name, position);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones (phone);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class SqliteRecordMap(MutableMapping):
+    """
+    Class for the mapping of records read from SQLite on demand
+
+    Records are materialized the first time they are touched and cached.
+    Writes only update the cache, the database is changed by
+    SqliteStorage.record() when the address book reports the mutation.
+
+    Attributes:
+    storage -- the SqliteStorage to read from
+    book -- the address book observing the materialized records
+    cache -- the materialized records by name
+    deleted -- the names removed from the cache but not from the database yet
+
+    Methods:
+    __init__ -- initializes the mapping
+    __getitem__ -- returns a record, reading it from the database if needed
+    __setitem__ -- caches a record
+    __delitem__ -- drops a record from the cache
+    __contains__ -- checks whether a record exists
+    __iter__ -- returns the names of the records in insertion order
+    __len__ -- returns the number of records
+    scan -- returns all records without caching them
+    """
+    def __init__(self, storage, book):
+        self.storage = storage
+        self.book = book
+        self.cache = {}
+        self.deleted = set()
+
+    def __getitem__(self, name):
+        """
+        Returns a record, reading it from the database if it is not cached
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        Record -- the record
+
+        Raises:
+        KeyError -- if the record does not exist
+        """
+        record = self.cache.get(name)
+        if record is None:
+            if name in self.deleted:
+                raise KeyError(name)
+            record = self.storage.fetch(name)
+            if record is None:
+                raise KeyError(name)
+            record.set_observer(self.book)
+            # Concurrent readers may decode the same record, all of them get the cached one
+            record = self.cache.setdefault(name, record)
+        return record
+
+    def __setitem__(self, name, record):
+        """
+        Caches a record, the database is written by SqliteStorage.record()
+
+        Arguments:
+        name -- the name of the record
+        record -- the record
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.deleted.discard(name)
+        self.cache[name] = record
+
+    def __delitem__(self, name):
+        """
+        Drops a record from the cache and hides it until the deletion is written
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        None
+
+        Raises:
+        KeyError -- if the record does not exist
+        """
+        if name not in self:
+            raise KeyError(name)
+        self.cache.pop(name, None)
+        self.deleted.add(name)
+
+    def __contains__(self, name):
+        """
+        Checks whether a record exists
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        bool -- True if the record exists
+
+        Raises:
+        None
+        """
+        if name in self.cache:
+            return True
+        return name not in self.deleted and self.storage.exists(name)
+
+    def __iter__(self):
+        """
+        Returns the names of the records in insertion order
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the names
+
+        Raises:
+        None
+        """
+        return self.storage.names()
+
+    def __len__(self):
+        """
+        Returns the number of records
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of records
+
+        Raises:
+        None
+        """
+        return self.storage.count()
+
+    def scan(self):
+        """
+        Returns all records in insertion order, reading them in batches without caching them
+
+        Arguments:
+        None
+
+        Returns:
+        generator -- the records
+
+        Raises:
+        None
+        """
+        for record in self.storage.records():
+            if record.name.value not in self.deleted:
+                yield self.cache.get(record.name.value, record)
+
+class SqliteStorage(Storage):
+    """
+    Class for the SQLite storage backend
+
+    Every mutation is one small transaction. Records are read on demand,
+    phones and birth months are indexed.
+
+    Attributes:
+    path -- the path of the database file
+    migrate_from -- the snapshot file imported into an empty database, or None
+    connection -- the database connection
+    lock -- the lock serializing the use of the connection
+    data -- the lazy mapping of records returned by load()
+
+    Methods:
+    __init__ -- initializes the backend
+    load -- opens the database and returns the lazy mapping of records
+    record -- applies a mutation to the database in one transaction
+    record_many -- applies a batch of mutations to the database in one transaction
+    fetch -- reads a record from the database
+    exists -- checks whether a record exists in the database
+    names -- returns the names of the records in insertion order
+    records -- returns the records in insertion order
+    count -- returns the number of records
+    find_by_phone -- returns the names owning a phone number using the phone index
+    upcoming_birthdays -- returns the names with a birthday in the next days using the
+        birth month index
+    close -- closes the database
+    """
+    birthday_index = True
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        self.migrate_from = migrate_from
+        self.connection = None
+        self.lock = threading.RLock()
+        self.data = None
+
+    def load(self, book):
+        """
+        Opens the database and returns the lazy mapping of records
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        SqliteRecordMap -- the records by name
+
+        Raises:
+        None
+        """
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+        if self.migrate_from:
+            self._migrate(self.migrate_from, book)
+
+        self.data = SqliteRecordMap(self, book)
+        return self.data
+
+    def record(self, op, args):
+        """
+        Applies a mutation to the database in one transaction
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the normalized arguments of the mutation
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.record_many([(op, args)])
+
+    def record_many(self, mutations):
+        """
+        Applies a batch of mutations to the database in one transaction
+
+        Arguments:
+        mutations -- the (op, args) pairs of the mutations
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock, self.connection:
+            for op, run in itertools.groupby(mutations, key=lambda mutation: mutation[0]):
+                if op == "add_record":
+                    self._insert_many(self.connection, [args for _, args in run])
+                else:
+                    for _, args in run:
+                        self._apply(op, args)
+            if self.data is not None:
+                self.data.deleted.clear()
+
+    def fetch(self, name):
+        """
+        Reads a record from the database
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        Record -- the record, or None if it does not exist
+
+        Raises:
+        None
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT birthday FROM records WHERE name = ?",
+                                          (name,)).fetchone()
+            if row is None:
+                return None
+            phones = self.connection.execute(
+                "SELECT phone FROM phones WHERE name = ? ORDER BY position", (name,)).fetchall()
+
+        record = Record(name)
+        for (phone,) in phones:
+            record.add_phone(phone)
+        if row[0]:
+            record.add_birthday(row[0])
+        return record
+
+    def exists(self, name):
+        """
+        Checks whether a record exists in the database
+
+        Arguments:
+        name -- the name of the record
+
+        Returns:
+        bool -- True if the record exists
+
+        Raises:
+        None
+        """
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM records WHERE name = ?",
+                                           (name,)).fetchone() is not None
+
+    def names(self, batch=1000):
+        """
+        Returns the names of the records in insertion order, reading them in batches
+
+        Arguments:
+        batch -- the number of names read at once
+
+        Returns:
+        generator -- the names
+
+        Raises:
+        None
+        """
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT rowid, name FROM records WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, batch)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, name in rows:
+                yield name
+
+    def records(self, batch=500):
+        """
+        Returns the records in insertion order, reading them in batches
+
+        Arguments:
+        batch -- the number of records read at once
+
+        Returns:
+        generator -- the records
+
+        Raises:
+        None
+        """
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    "SELECT rowid, name, birthday FROM records WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, batch)).fetchall()
+                if not rows:
+                    return
+                phones = {}
+                placeholders = ", ".join("?" * len(rows))
+                for name, phone in self.connection.execute(
+                        f"SELECT name, phone FROM phones WHERE name IN ({placeholders}) "
+                        "ORDER BY name, position", [name for _, name, _ in rows]):
+                    phones.setdefault(name, []).append(phone)
+            last = rows[-1][0]
+            for _, name, birthday in rows:
+                yield Record.trusted(name, phones.get(name, ()),
+                                     datetime.strptime(birthday, "%d.%m.%Y") if birthday else None)
+
+    def count(self):
+        """
+        Returns the number of records
+
+        Arguments:
+        None
+
+        Returns:
+        int -- the number of records
+
+        Raises:
+        None
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def find_by_phone(self, phone):
+        """
+        Returns the names owning a phone number using the phone index
+
+        Arguments:
+        phone -- the normalized phone number
+
+        Returns:
+        list -- the names, sorted
+
+        Raises:
+        None
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT name FROM phones WHERE phone = ? ORDER BY name", (phone,)).fetchall()
+        return [name for (name,) in rows]
+
+    def upcoming_birthdays(self, today, days):
+        """
+        Returns the names with a birthday from today to today + days using the birth month index
+
+        Only the rows of the months in the window are read. Birthdays on
+        February 29 are celebrated on March 1 in non-leap years, like in BirthdayIndex.
+
+        Arguments:
+        today -- the first day of the window
+        days -- the length of the window in days, from 0 to 365
+
+        Returns:
+        list -- the (occurrence date, name) pairs in date order
+
+        Raises:
+        None
+        """
+        end = today + timedelta(days=days)
+        months = {(today + timedelta(days=offset)).month for offset in range(days + 1)}
+        if 3 in months:
+            months.add(2)
+        placeholders = ", ".join("?" * len(months))
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT name, birthday FROM records WHERE birth_month IN ({placeholders})",
+                sorted(months)).fetchall()
+
+        found = []
+        for name, birthday in rows:
+            birthday = datetime.strptime(birthday, "%d.%m.%Y").date()
+            # A window of 365 days may hold the same birthday at both ends
+            occurrence = next_birthday(birthday, today)
+            while occurrence <= end:
+                found.append((occurrence, name))
+                occurrence = next_birthday(birthday, occurrence + timedelta(days=1))
+        return sorted(found)
+
+    def close(self):
+        """
+        Closes the database
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+
+    def _apply(self, op, args):
+        """
+        Applies a mutation to the database inside the running transaction
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the normalized arguments of the mutation
+
+        Returns:
+        None
+        """
+        match op:
+            case "add_record":
+                self._insert(self.connection, *args)
+            case "remove_record":
+                self.connection.execute("DELETE FROM records WHERE name = ?", args)
+            case "edit_record":
+                old_name, new_name = args
+                if old_name != new_name:
+                    self.connection.execute("DELETE FROM records WHERE name = ?", (new_name,))
+                self.connection.execute("UPDATE records SET name = ? WHERE name = ?",
+                                        (new_name, old_name))
+            case "add_phone":
+                self._append_phone(*args)
+            case "remove_phone":
+                self._remove_phone(*args)
+            case "edit_phone":
+                name, old_phone, new_phone = args
+                self._remove_phone(name, old_phone)
+                self._append_phone(name, new_phone)
+            case "add_birthday":
+                name, birthday = args
+                self.connection.execute(
+                    "UPDATE records SET birthday = ?, birth_month = ? WHERE name = ?",
+                    (birthday, int(birthday[3:5]), name))
+
+    def _insert(self, connection, name, phones, birthday):
+        """
+        Inserts or replaces a whole record
+
+        Arguments:
+        connection -- the connection in a transaction
+        name -- the name of the record
+        phones -- the phone numbers of the record
+        birthday -- the birthday of the record as DD.MM.YYYY, or None
+
+        Returns:
+        None
+        """
+        self._insert_many(connection, [(name, phones, birthday)])
+
+    def _insert_many(self, connection, rows):
+        """
+        Inserts or replaces whole records in bulk
+
+        Arguments:
+        connection -- the connection in a transaction
+        rows -- the (name, phones, birthday) arguments of the add_record mutations
+
+        Returns:
+        None
+        """
+        rows = list({name: (name, phones, birthday) for name, phones, birthday in rows}.values())
+        connection.executemany(
+            "INSERT INTO records (name, birthday, birth_month) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET birthday = excluded.birthday, "
+            "birth_month = excluded.birth_month",
+            [(name, birthday, int(birthday[3:5]) if birthday else None)
+             for name, _, birthday in rows])
+        connection.executemany("DELETE FROM phones WHERE name = ?", [(name,) for name, _, _ in rows])
+        connection.executemany("INSERT INTO phones (name, position, phone) VALUES (?, ?, ?)",
+                               [(name, position, phone) for name, phones, _ in rows
+                                for position, phone in enumerate(phones)])
+
+    def _append_phone(self, name, phone):
+        """
+        Appends a phone number to the phones of a record
+
+        Arguments:
+        name -- the name of the record
+        phone -- the phone number
+
+        Returns:
+        None
+        """
+        self.connection.execute(
+            "INSERT INTO phones (name, position, phone) "
+            "SELECT ?, COALESCE(MAX(position) + 1, 0), ? FROM phones WHERE name = ?",
+            (name, phone, name))
+
+    def _remove_phone(self, name, phone):
+        """
+        Removes the first occurrence of a phone number from the phones of a record
+
+        Arguments:
+        name -- the name of the record
+        phone -- the phone number
+
+        Returns:
+        None
+        """
+        self.connection.execute(
+            "DELETE FROM phones WHERE rowid = (SELECT rowid FROM phones "
+            "WHERE name = ? AND phone = ? ORDER BY position LIMIT 1)", (name, phone))
+
+    def _migrate(self, storage, book):
+        """
+        Imports the records of another storage into an empty database, once
+
+        Arguments:
+        storage -- the FileStorage to import from
+        book -- the address book being loaded
+
+        Returns:
+        None
+        """
+        with self.lock, self.connection:
+            if self.connection.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone():
+                return
+            if self.connection.execute("SELECT 1 FROM records LIMIT 1").fetchone() is None:
+                for record in storage.read(book).values():
+                    self._insert(self.connection, record.name.value,
+                                 [phone.value for phone in record.phones],
+                                 str(record.birthday) if record.birthday else None)
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)",
+                                    (storage.path,))
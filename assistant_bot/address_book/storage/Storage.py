@@ -0,0 +1,164 @@
+"""
+Base class for address book storage backends
+"""
+
+class Storage:
+    """
+    Base class for address book storage backends
+
+    A backend provides the mapping of records the address book works on
+    and persists every mutation the address book reports to it.
+
+    Attributes:
+    birthday_index -- whether upcoming_birthdays answers from an index of the backend
+
+    Methods:
+    load -- returns the mapping of records of the address book
+    record -- persists a mutation of the address book
+    record_many -- persists a batch of mutations of the address book
+    preserve -- called before a record changes
+    save -- saves pending changes
+    flush -- waits for background work to finish
+    close -- releases the resources of the backend
+    find_by_phone -- returns the names owning a phone number, if the backend indexes phones
+    upcoming_birthdays -- returns the names with a birthday in the next days, if the backend
+        indexes birthdays
+    """
+    birthday_index = False
+
+    def load(self, book):
+        """
+        Returns the mapping of records of the address book
+
+        Arguments:
+        book -- the address book being loaded
+
+        Returns:
+        MutableMapping -- the records by name
+
+        Raises:
+        NotImplementedError -- if the backend does not implement loading
+        """
+        raise NotImplementedError
+
+    def record(self, op, args):
+        """
+        Persists a mutation of the address book
+
+        Arguments:
+        op -- the name of the mutation
+        args -- the normalized arguments of the mutation
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def record_many(self, mutations):
+        """
+        Persists a batch of mutations of the address book
+
+        Backends that can persist a batch at once override this method.
+
+        Arguments:
+        mutations -- the (op, args) pairs of the mutations
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        for op, args in mutations:
+            self.record(op, args)
+
+    def preserve(self, record):
+        """
+        Called before a record changes
+
+        Arguments:
+        record -- the record that is about to change
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def save(self, book):
+        """
+        Saves pending changes
+
+        Arguments:
+        book -- the address book to save
+
+        Returns:
+        bool -- False if the changes could not be saved now
+
+        Raises:
+        None
+        """
+        return True
+
+    def flush(self):
+        """
+        Waits for background work to finish
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def close(self):
+        """
+        Releases the resources of the backend
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+
+    def find_by_phone(self, phone):
+        """
+        Returns the names owning a phone number, if the backend indexes phones
+
+        Arguments:
+        phone -- the normalized phone number
+
+        Returns:
+        list -- the names sorted, or None if the backend has no phone index
+
+        Raises:
+        None
+        """
+        return None
+
+    def upcoming_birthdays(self, today, days):
+        """
+        Returns the names with a birthday from today to today + days, if the backend indexes birthdays
+
+        Arguments:
+        today -- the first day of the window
+        days -- the length of the window in days, from 0 to 365
+
+        Returns:
+        list -- the (occurrence date, name) pairs in date order, or None if the backend has
+            no birthday index
+
+        Raises:
+        None
+        """
+        return None
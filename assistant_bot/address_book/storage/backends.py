@@ -0,0 +1,54 @@
+"""
+Selection of the address book storage backend
+"""
+
+from assistant_bot import settings
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+from assistant_bot.address_book.storage.ShardedStorage import ShardedStorage
+from assistant_bot.address_book.storage.Snapshot import CODECS
+from assistant_bot.address_book.storage.SqliteStorage import SqliteStorage
+
+def create_storage(kind=None):
+    """
+    Creates the storage backend configured for this deployment
+
+    Arguments:
+    kind -- "pickle", "binary", "sqlite" or "sharded", defaults to the STORAGE setting
+
+    Returns:
+    Storage -- the storage backend
+
+    Raises:
+    ValueError -- if the backend or the snapshot compression is unknown
+    """
+    kind = kind or settings.STORAGE
+    if settings.SNAPSHOT_COMPRESSION and settings.SNAPSHOT_COMPRESSION not in CODECS:
+        raise ValueError(f"Unknown snapshot compression {settings.SNAPSHOT_COMPRESSION}")
+    pickle_storage = FileStorage(settings.PICKLE_PATH, settings.JOURNAL_ENABLED,
+                                 settings.JOURNAL_GROUP_SIZE, settings.JOURNAL_SYNC_INTERVAL,
+                                 settings.JOURNAL_COMPACT_BYTES)
+    match kind:
+        case "pickle":
+            return FileStorage(settings.PICKLE_PATH, settings.JOURNAL_ENABLED,
+                               settings.JOURNAL_GROUP_SIZE, settings.JOURNAL_SYNC_INTERVAL,
+                               settings.JOURNAL_COMPACT_BYTES, shared=settings.STORAGE_SHARED,
+                               poll_interval=settings.STORAGE_POLL_INTERVAL,
+                               compression=settings.SNAPSHOT_COMPRESSION,
+                               compression_level=settings.SNAPSHOT_COMPRESSION_LEVEL)
+        case "binary":
+            return FileStorage(settings.BINARY_PATH, settings.JOURNAL_ENABLED,
+                               settings.JOURNAL_GROUP_SIZE, settings.JOURNAL_SYNC_INTERVAL,
+                               settings.JOURNAL_COMPACT_BYTES, snapshot_format="binary",
+                               journal_prefix=settings.BINARY_PATH + ".journal",
+                               migrate_from=pickle_storage, shared=settings.STORAGE_SHARED,
+                               poll_interval=settings.STORAGE_POLL_INTERVAL)
+        case "sqlite":
+            return SqliteStorage(settings.SQLITE_PATH, migrate_from=pickle_storage)
+        case "sharded":
+            return ShardedStorage(settings.SHARDED_PATH, settings.SHARD_COUNT,
+                                  settings.SHARD_WORKERS, migrate_from=pickle_storage,
+                                  compression=settings.SNAPSHOT_COMPRESSION,
+                                  compression_level=settings.SNAPSHOT_COMPRESSION_LEVEL,
+                                  shared=settings.STORAGE_SHARED)
+        case _:
+            raise ValueError(f"Unknown storage backend {kind}")
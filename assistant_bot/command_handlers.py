@@ -3,9 +3,17 @@ This module contains functions
 that handle the different commands that the assistant bot can receive.
 """
 
+import calendar
+import datetime
+import time
+
+from assistant_bot import settings
 from assistant_bot.address_book.repositories.AddressBook import AddressBook
 from assistant_bot.address_book.models.Record import Record
-from assistant_bot.helpers.contacts import get_upcoming_birthdays
+from assistant_bot.helpers.exporter import export_file
+from assistant_bot.helpers.importer import import_file
+from assistant_bot.helpers.metrics import METRICS
+from assistant_bot.helpers.profiling import MODES, PROFILER
 
 from assistant_bot.decorators import input_error
 
@@ -176,20 +184,149 @@ def remove_phone(args, book: AddressBook):
     return "Phone number removed."
 
 @input_error
-def show_all(book: AddressBook):
+def find_phone(args, book: AddressBook):
+    """
+    Find the contacts owning a phone number.
+
+    Args:
+    args (list): A list containing the phone number.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The contacts owning the phone number or a message if there are none.
+
+    Raises:
+    ValueError: If the number of arguments is not equal to 1 or if the phone number is invalid.
+    """
+    if len(args) != 1:
+        raise ValueError("Find phone command requires a phone number.")
+    phone = args[0]
+
+    records = book.find_by_phone(phone)
+    if not records:
+        return f"No contacts with phone {phone}."
+
+    return "\n".join(str(record) for record in records)
+
+@input_error
+def search_contacts(args, book: AddressBook):
+    """
+    Show the contacts whose name starts with a prefix.
+
+    Args:
+    args (list): A list containing the prefix.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The contacts sorted by name or a message if there are none.
+
+    Raises:
+    ValueError: If the number of arguments is not equal to 1.
+    """
+    if len(args) != 1:
+        raise ValueError("Search command requires a name prefix.")
+    prefix = args[0]
+
+    records = book.search(prefix)
+    if not records:
+        return f"No contacts starting with {prefix}."
+
+    return "\n".join(str(record) for record in records)
+
+@input_error
+def find_contacts(args, book: AddressBook):
     """
-    Show all contacts in the contacts dictionary.
+    Show the contacts whose name is closest to a query, tolerating typos.
 
     Args:
+    args (list): A list containing the query.
     book (AddressBook): An AddressBook class containing the contacts.
 
     Returns:
-    str: A formatted string containing all the contacts or a message if no contacts are found.
+    str: The closest contacts, most similar first, or a message if there are none.
 
     Raises:
-    ValueError: If the contacts dictionary is empty.
+    ValueError: If the number of arguments is not equal to 1.
     """
-    return book
+    if len(args) != 1:
+        raise ValueError("Find command requires a name to look for.")
+    query = args[0]
+
+    records = book.find_similar(query)
+    if not records:
+        return f"No contacts like {query}."
+
+    return "\n".join(str(record) for record in records)
+
+@input_error
+def list_contacts(args, book: AddressBook):
+    """
+    Show the contacts whose name is in a range, like A..F.
+
+    Args:
+    args (list): A list containing the range, either end of which may be omitted.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The contacts sorted by name or a message if there are none.
+
+    Raises:
+    ValueError: If the argument is not a range.
+    """
+    if len(args) != 1 or ".." not in args[0]:
+        raise ValueError("List command requires a range of names, like A..F.")
+    low, high = args[0].split("..", 1)
+
+    records = book.between(low, high)
+    if not records:
+        return f"No contacts in {args[0]}."
+
+    return "\n".join(str(record) for record in records)
+
+@input_error
+def show_all(args, book: AddressBook, session: dict):
+    """
+    Show one page of contacts in name order.
+
+    The last shown name and the page size are kept in the session,
+    so "all next" continues after that name.
+
+    Args:
+    args (list): Either "next", or the optional --limit and --offset options.
+    book (AddressBook): An AddressBook class containing the contacts.
+    session (dict): The state kept between the commands of the user.
+
+    Returns:
+    str: A formatted string containing a page of contacts or a message if no contacts are found.
+
+    Raises:
+    ValueError: If the arguments are invalid.
+    """
+    limit = settings.PAGE_SIZE
+    if args == ["next"]:
+        cursor = session.get("all_cursor")
+        if cursor is None:
+            return "No more contacts."
+        limit = session["all_limit"]
+        text, cursor = book.render_page_after(cursor, limit)
+    else:
+        options = dict(zip(args[::2], args[1::2]))
+        if len(args) % 2 or set(options) - {"--limit", "--offset"} \
+                or not all(value.isdigit() for value in options.values()):
+            raise ValueError("All command accepts next, or --limit <count> and --offset <count>.")
+        limit = int(options.get("--limit", limit))
+        if limit == 0:
+            session["all_cursor"] = None
+            return "No contacts."
+        text, cursor = book.render_page(int(options.get("--offset", 0)), limit)
+
+    session["all_cursor"] = cursor
+    if not text:
+        return "No contacts."
+    if cursor is None:
+        return text
+    session["all_limit"] = limit
+    return text + "\nType 'all next' to see more."
 
 @input_error
 def add_birthday(args, book: AddressBook):
@@ -238,26 +375,196 @@ def show_birthday(args, book: AddressBook):
     return record.get_birthday()
 
 @input_error
-def birthdays(book: AddressBook):
+def birthdays(args, book: AddressBook):
     """
-    Show all contacts with a birthdate.
+    Show the contacts with a birthday in the next days.
 
     Args:
+    args (list): A list containing the number of days to look ahead optionally, 7 by default.
     book (AddressBook): An AddressBook class containing the contacts.
 
     Returns:
-    str: A formatted string containing all the contacts with a birthdate
+    str: A formatted string containing the contacts with an upcoming birthday
         or a message if no contacts are found.
 
     Raises:
-    ValueError: If the contacts dictionary is empty.
+    ValueError: If the number of days is not a number from 0 to 365.
     """
-    
-    records = book.data.values()
-    bd_records = get_upcoming_birthdays(records)
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        raise ValueError("Birthdays command accepts a number of days optionally.")
+    days = int(args[0]) if args else 7
 
-    if not bd_records:
-        return "No upcoming birthdays."
+    upcoming = book.render_birthdays(days)
 
-    return "\n".join(f"{record.get_name()}: congrats on {record.get_congrats_date()} ({record.get_birthday()})"
-                     for record in bd_records)
+    return upcoming or "No upcoming birthdays."
+
+@input_error
+def import_contacts(args, book: AddressBook):
+    """
+    Import contacts from a CSV or JSONL file.
+
+    Args:
+    args (list): A list containing the path of the file.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The number of imported contacts followed by the errors of the invalid lines.
+
+    Raises:
+    ValueError: If the number of arguments is not equal to 1 or if the file cannot be read.
+    """
+    if len(args) != 1:
+        raise ValueError("Import command requires a file path.")
+    path = args[0]
+
+    try:
+        imported, errors = import_file(path, book, settings.IMPORT_CHUNK_SIZE,
+                                       settings.IMPORT_WORKERS)
+    except OSError as e:
+        raise ValueError(f"Cannot read {path}: {e.strerror}") from None
+
+    lines = [f"Imported {imported} contacts."]
+    lines += [f"Line {number}: {message}" for number, message in errors[:20]]
+    if len(errors) > 20:
+        lines.append(f"... and {len(errors) - 20} more errors.")
+    return "\n".join(lines)
+
+@input_error
+def export_contacts(args, book: AddressBook):
+    """
+    Export all contacts to a CSV or JSONL file that the import command reads back.
+
+    Args:
+    args (list): A list containing the path of the file and optionally --format csv|jsonl.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The number of exported contacts.
+
+    Raises:
+    ValueError: If the arguments are invalid or if the file cannot be written.
+    """
+    export_format = None
+    if "--format" in args:
+        position = args.index("--format")
+        if position + 1 >= len(args):
+            raise ValueError("Export --format requires csv or jsonl.")
+        export_format = args[position + 1].lower()
+        args = args[:position] + args[position + 2:]
+    if len(args) != 1:
+        raise ValueError("Export command requires a file path and optionally --format csv|jsonl.")
+    path = args[0]
+
+    try:
+        exported = export_file(path, book, export_format, settings.IMPORT_CHUNK_SIZE)
+    except OSError as e:
+        raise ValueError(f"Cannot write {path}: {e.strerror}") from None
+
+    return f"Exported {exported} contacts to {path}."
+
+@input_error
+def birthday_report(args, book: AddressBook):
+    """
+    Show the birthday statistics of the whole book.
+
+    Args:
+    args (list): A list containing the number of days to look ahead optionally, 90 by default.
+    book (AddressBook): An AddressBook class containing the contacts.
+
+    Returns:
+    str: The counts per birth month and decade, per week of the upcoming days,
+        and the congratulations per weekday.
+
+    Raises:
+    ValueError: If the number of days is invalid or if NumPy is not installed.
+    """
+    if len(args) > 1 or (args and not args[0].isdigit()):
+        raise ValueError("Birthday report command accepts a number of days optionally.")
+    days = int(args[0]) if args else 90
+
+    today = datetime.date.today()
+    report = book.birthday_report(days, today)
+
+    lines = [
+        f"Contacts with a birthday: {report['count']}",
+        "Per birth month: " + ", ".join(f"{calendar.month_abbr[month]} {count}"
+                                        for month, count in enumerate(report["months"], 1)),
+        "Per birth decade: " + ", ".join(f"{decade}s {count}"
+                                         for decade, count in report["decades"].items()),
+        f"Birthdays in the next {days} days per week:",
+    ]
+    for week, count in enumerate(report["weeks"]):
+        start = today + datetime.timedelta(days=7 * week)
+        end = min(start + datetime.timedelta(days=6), today + datetime.timedelta(days=days))
+        lines.append(f"  {start:%d-%m-%Y} - {end:%d-%m-%Y}: {count}")
+    lines.append("Congratulations per weekday: " + ", ".join(
+        f"{calendar.day_abbr[weekday]} {count}" for weekday, count in enumerate(report["weekdays"])))
+    return "\n".join(lines)
+
+@input_error
+def show_stats(book: AddressBook, autosave):
+    """
+    Show the load and save state of the address book, the lock waits, the autosave decisions,
+    and the calls, errors and latency of the commands and storage operations.
+
+    Args:
+    book (AddressBook): An AddressBook class containing the contacts.
+    autosave (Autosave): The autosave that saves the address book, or None in script mode.
+
+    Returns:
+    str: A formatted string with one statistic per line.
+    """
+    loading = book.loading
+    if loading and not loading.done:
+        lines = [f"Contacts: loading, {loading.count} read so far"]
+    else:
+        lines = [f"Contacts: {len(book)}"]
+    lines += [
+        f"Mutations: {book.mutations}",
+        f"Unsaved mutations: {book.unsaved}",
+    ]
+    if loading:
+        # This command is the first one if none was answered yet
+        first_command = (loading.first_command or time.monotonic()) - loading.started
+        lines.append(f"Load time to first command: {first_command * 1000:.1f} ms")
+        if loading.done:
+            loaded = loading.finished - loading.started
+            lines.append(f"Load time to fully loaded: {loaded * 1000:.1f} ms")
+        else:
+            lines.append("Load time to fully loaded: still loading")
+    lines += [f"Lock {key.replace('_', ' ')}: {round(value, 3)}"
+              for key, value in book.lock.stats.items()]
+    if autosave is not None:
+        lines += [f"Autosave {key.replace('_', ' ')}: {value}"
+                  for key, value in autosave.stats.items()]
+    lines += METRICS.summary()
+    return "\n".join(lines)
+
+@input_error
+def profile_commands(args):
+    """
+    Start, stop or write a profile of the commands, for a targeted capture.
+
+    Args:
+    args (list): "start" and optionally the mode, cprofile by default, or "stop" or "dump".
+
+    Returns:
+    str: A message with the started mode, or the paths of the written reports.
+
+    Raises:
+    ValueError: If the arguments are invalid, if the profiler is already running or is not
+        running, or if the reports cannot be written.
+    """
+    match args:
+        case ["start"] | ["start", _]:
+            mode = args[1].lower() if len(args) == 2 else "cprofile"
+            PROFILER.start(mode)
+            return f"Profiling started in the {mode} mode."
+        case ["stop"] | ["dump"]:
+            try:
+                paths = PROFILER.stop() if args == ["stop"] else PROFILER.dump()
+            except OSError as e:
+                raise ValueError(f"Cannot write the profile: {e.strerror}") from None
+            return "\n".join(["Profile written to:"] + paths)
+        case _:
+            raise ValueError(f"Profile command accepts start [{'|'.join(MODES)}], stop or dump.")
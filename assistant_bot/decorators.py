@@ -2,19 +2,34 @@
 This module contains decorators for the bot commands.
 """
 
+import time
 from functools import wraps
+from assistant_bot.helpers.metrics import METRICS
+
+class ErrorMessage(str):
+    """
+    The message of a failed command, told apart from a result by its type.
+    """
 
 def input_error(func: callable) -> callable:
     """
     Decorator to handle input errors across bot commands.
 
+    The calls, errors and latency of each command are recorded in the metrics.
+
     Args:
         func (function): The function to decorate.
     """
     @wraps(func)
     def inner(*args, **kwargs):
+        start = time.perf_counter()
+        failed = True
         try:
-            return func(*args, **kwargs)
+            result = func(*args, **kwargs)
+            failed = False
+            return result
         except ValueError as e:
-            return f"Error: {str(e)}"
+            return ErrorMessage(f"Error: {str(e)}")
+        finally:
+            METRICS.observe("command", func.__name__, time.perf_counter() - start, failed)
     return inner
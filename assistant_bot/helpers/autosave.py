@@ -0,0 +1,118 @@
+"""
+Mutation-driven autosave of the address book
+"""
+
+import time
+
+class Autosave:
+    """
+    Class that decides when the address book should be saved
+
+    The book is saved only when it is dirty and one of the thresholds is reached:
+    the number of unsaved mutations, the age of the first unsaved mutation,
+    or the idle time since the last mutation.
+
+    Attributes:
+    book -- the address book to save
+    max_mutations -- the number of unsaved mutations that triggers a save
+    max_delay -- the age in seconds of the first unsaved mutation that triggers a save
+    idle -- the idle time in seconds since the last mutation that triggers a save
+    poll_interval -- how often in seconds the thresholds are checked
+    stats -- the counters of the save decisions
+
+    Methods:
+    __init__ -- initializes the autosave
+    decide -- returns the reason to save now, if any
+    check -- saves the book if one of the thresholds is reached
+    run -- checks the thresholds periodically, forever
+    """
+    def __init__(self, book, max_mutations=100, max_delay=60, idle=5, poll_interval=1):
+        self.book = book
+        self.max_mutations = max_mutations
+        self.max_delay = max_delay
+        self.idle = idle
+        self.poll_interval = poll_interval
+        self.stats = {
+            "checks": 0,
+            "skipped_clean": 0,
+            "skipped_waiting": 0,
+            "saved_mutations": 0,
+            "saved_delay": 0,
+            "saved_idle": 0,
+            "last_decision": None,
+        }
+
+    def decide(self, now):
+        """
+        Returns the reason to save the book now
+
+        A time threshold is not reached while its timestamp is not set.
+
+        Arguments:
+        now -- the current time.monotonic() value
+
+        Returns:
+        str -- "clean" or "waiting" if the save should be skipped,
+            "mutations", "delay" or "idle" if the book should be saved
+
+        Raises:
+        None
+        """
+        book = self.book
+        if not book.dirty:
+            return "clean"
+        if book.unsaved >= self.max_mutations:
+            return "mutations"
+        first_unsaved_at, last_mutation_at = book.first_unsaved_at, book.last_mutation_at
+        if first_unsaved_at is not None and now - first_unsaved_at >= self.max_delay:
+            return "delay"
+        if last_mutation_at is not None and now - last_mutation_at >= self.idle:
+            return "idle"
+        return "waiting"
+
+    def check(self):
+        """
+        Saves the book if one of the thresholds is reached
+
+        Arguments:
+        None
+
+        Returns:
+        bool -- True if the book was saved
+
+        Raises:
+        None
+        """
+        decision = self.decide(time.monotonic())
+        self.stats["checks"] += 1
+        self.stats["last_decision"] = decision
+
+        if decision in ("clean", "waiting"):
+            self.stats[f"skipped_{decision}"] += 1
+            return False
+
+        self.book.dump()
+        self.stats[f"saved_{decision}"] += 1
+        return True
+
+    def run(self):
+        """
+        Checks the thresholds periodically, forever
+
+        A failed check is reported and the next one runs as usual.
+
+        Arguments:
+        None
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error autosaving address book: {e}")
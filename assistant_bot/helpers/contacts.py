@@ -1,5 +1,47 @@
 import datetime
 
+def next_birthday(birthday: datetime.date, today: datetime.date) -> datetime.date:
+    """
+    Get the next occurrence of a birthday on or after today.
+
+    Birthdays on February 29 are celebrated on March 1 in non-leap years.
+
+    Arguments:
+    birthday -- the date of birth
+    today -- the current date
+
+    Returns:
+    datetime.date -- the date of the next birthday, today if it is today
+
+    Raises:
+    None
+    """
+    for year in (today.year, today.year + 1):
+        try:
+            occurrence = datetime.date(year, birthday.month, birthday.day)
+        except ValueError:
+            occurrence = datetime.date(year, 3, 1)
+        if occurrence >= today:
+            return occurrence
+    return occurrence
+
+def congrats_date(occurrence: datetime.date) -> datetime.date:
+    """
+    Get the date to congratulate on a birthday, moving weekends to the next Monday.
+
+    Arguments:
+    occurrence -- the date of the birthday
+
+    Returns:
+    datetime.date -- the date itself on a weekday, the following Monday on a weekend
+
+    Raises:
+    None
+    """
+    if occurrence.weekday() > 4:
+        occurrence += datetime.timedelta(days=7 - occurrence.weekday())
+    return occurrence
+
 def get_upcoming_birthdays(contacts: list) -> list:
     """
     Get upcoming birthdays from the list of contacts.
@@ -15,4 +57,4 @@ def get_upcoming_birthdays(contacts: list) -> list:
     if not upcoming:
         return []
 
-    return sorted(upcoming, key=lambda contact: contact.get_congrats_date())
+    return sorted(upcoming, key=lambda contact: next_birthday(contact.birthday.value, today))
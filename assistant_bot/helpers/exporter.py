@@ -0,0 +1,133 @@
+"""
+Streaming export of contacts to CSV and JSONL files
+"""
+
+import csv
+import io
+import itertools
+import json
+from assistant_bot.address_book.storage.Snapshot import atomic_write
+
+FORMATS = ("csv", "jsonl")
+
+def export_rows(records):
+    """
+    Converts records to the rows read back by the importer
+
+    Arguments:
+    records -- the records
+
+    Returns:
+    generator -- the (name, phones, birthday) rows, phones separated by ";"
+
+    Raises:
+    None
+    """
+    for record in records:
+        yield (record.name.value, ";".join(phone.value for phone in record.phones),
+               str(record.birthday) if record.birthday else "")
+
+def write_csv(file, rows, chunk_size):
+    """
+    Writes rows to a CSV file with a header, one chunk at a time
+
+    Arguments:
+    file -- the text file to write to
+    rows -- the (name, phones, birthday) rows
+    chunk_size -- the number of rows written at once
+
+    Returns:
+    int -- the number of rows written
+
+    Raises:
+    None
+    """
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(("name", "phones", "birthday"))
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+def write_jsonl(file, rows, chunk_size):
+    """
+    Writes rows to a JSONL file, one chunk at a time
+
+    Arguments:
+    file -- the text file to write to
+    rows -- the (name, phones, birthday) rows
+    chunk_size -- the number of rows written at once
+
+    Returns:
+    int -- the number of rows written
+
+    Raises:
+    None
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        file.write("".join(encoder.encode({"name": name,
+                                           "phones": phones.split(";") if phones else [],
+                                           "birthday": birthday or None}) + "\n"
+                           for name, phones, birthday in chunk))
+        count += len(chunk)
+    return count
+
+def export_file(path, book, export_format=None, chunk_size=10000):
+    """
+    Exports the contacts of the address book to a CSV or JSONL file
+
+    Records are streamed from the book, so memory does not grow with its
+    size. The file is replaced atomically once it is complete.
+
+    Arguments:
+    path -- the path of the file
+    book -- the address book to export
+    export_format -- "csv" or "jsonl", by default taken from the file extension, or csv
+    chunk_size -- the number of rows written at once
+
+    Returns:
+    int -- the number of exported records
+
+    Raises:
+    ValueError -- if the format is not supported
+    OSError -- if the file cannot be written
+    """
+    if export_format is None:
+        extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+        export_format = extension if extension in FORMATS else "csv"
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format, use {' or '.join(FORMATS)}")
+
+    write = write_csv if export_format == "csv" else write_jsonl
+    count = 0
+
+    def write_file(file):
+        nonlocal count
+        text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        count = write(text, export_rows(book.records()), chunk_size)
+        text.flush()
+        text.detach()
+
+    atomic_write(path, write_file)
+    return count
+
+def _chunks(rows, size):
+    """
+    Splits rows into lists of at most size rows
+
+    Arguments:
+    rows -- the rows
+    size -- the number of rows in a list
+
+    Returns:
+    generator -- the lists of rows
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
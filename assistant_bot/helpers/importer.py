@@ -0,0 +1,176 @@
+"""
+Bulk import of contacts from CSV and JSONL files
+"""
+
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from assistant_bot.address_book.models.Birthday import parse_birthday
+from assistant_bot.address_book.models.Name import Name
+from assistant_bot.address_book.models.Phone import normalize_phone
+from assistant_bot.address_book.models.Record import Record
+
+FORMATS = (".csv", ".jsonl")
+
+def read_chunks(file, kind, size):
+    """
+    Reads the rows of a file in chunks
+
+    CSV rows are name, phones separated by ";" and birthday, with an optional
+    header. JSONL rows are objects with the same keys, and are decoded
+    during validation.
+
+    Arguments:
+    file -- the text file to read
+    kind -- the format of the file, ".csv" or ".jsonl"
+    size -- the number of rows in a chunk
+
+    Returns:
+    generator -- the lists of (line number, row) pairs
+
+    Raises:
+    None
+    """
+    if kind == ".csv":
+        reader = csv.reader(file)
+        rows = ((reader.line_num, row) for row in reader
+                if row and not (reader.line_num == 1 and row[0].strip().lower() == "name"))
+    else:
+        rows = ((number, line) for number, line in enumerate(file, 1) if line.strip())
+
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def validate_row(row):
+    """
+    Validates a row like the Name, Phone and Birthday fields do
+
+    Arguments:
+    row -- the CSV fields, or the JSONL line
+
+    Returns:
+    tuple -- the name, the normalized phone numbers and the date of birth or None
+
+    Raises:
+    ValueError -- if the row is invalid
+    """
+    if isinstance(row, str):
+        row = json.loads(row)
+        if not isinstance(row, dict):
+            raise ValueError("Row must be a JSON object")
+        name, phones, birthday = row.get("name"), row.get("phones"), row.get("birthday")
+    else:
+        if len(row) > 3:
+            raise ValueError("Row must have a name, phones and a birthday at most")
+        name, phones, birthday = (row + ["", ""])[:3]
+
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Name is required")
+    phones = phones or []
+    if isinstance(phones, str):
+        phones = phones.split(";")
+    if not isinstance(phones, list) or not all(isinstance(phone, str) for phone in phones):
+        raise ValueError("Phones must be text separated by ;")
+    if birthday and not isinstance(birthday, str):
+        raise ValueError("Invalid date format. Use DD.MM.YYYY")
+
+    phones = [normalize_phone(phone) for phone in phones if phone.strip()]
+    birthday = parse_birthday(birthday.strip()) if birthday else None
+    return Name(name.strip()).value, phones, birthday
+
+def validate_chunk(chunk):
+    """
+    Validates a chunk of rows, collecting the errors instead of stopping at them
+
+    Arguments:
+    chunk -- the (line number, row) pairs
+
+    Returns:
+    tuple -- the list of valid rows and the list of (line number, error) pairs
+
+    Raises:
+    None
+    """
+    valid, errors = [], []
+    for number, row in chunk:
+        try:
+            valid.append(validate_row(row))
+        except ValueError as e:
+            errors.append((number, str(e)))
+    return valid, errors
+
+def import_file(path, book, chunk_size=10000, workers=1):
+    """
+    Imports the contacts of a CSV or JSONL file into the address book
+
+    The file is streamed in chunks validated in a process pool when there is
+    more than one chunk. Invalid rows are reported without stopping the import.
+    The valid records are added as one batch and saved once.
+
+    Arguments:
+    path -- the path of the file
+    book -- the address book to import into
+    chunk_size -- the number of rows validated at once
+    workers -- the number of validating processes
+
+    Returns:
+    tuple -- the number of imported records and the list of (line number, error) pairs
+
+    Raises:
+    ValueError -- if the file format is not supported
+    OSError -- if the file cannot be read
+    """
+    kind = os.path.splitext(path)[1].lower()
+    if kind not in FORMATS:
+        raise ValueError(f"Unsupported import format, use {' or '.join(FORMATS)}")
+
+    records, errors = [], []
+    with open(path, newline="", encoding="utf-8") as file:
+        chunks = read_chunks(file, kind, chunk_size)
+        head = list(itertools.islice(chunks, 2))
+        chunks = itertools.chain(head, chunks)
+
+        if workers > 1 and len(head) > 1:
+            # Spawned workers do not inherit the locks held by the bot threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=context) as executor:
+                for valid, chunk_errors in _ordered_map(executor, validate_chunk, chunks,
+                                                        workers * 2):
+                    records.extend(Record.trusted(*row) for row in valid)
+                    errors.extend(chunk_errors)
+        else:
+            for valid, chunk_errors in map(validate_chunk, chunks):
+                records.extend(Record.trusted(*row) for row in valid)
+                errors.extend(chunk_errors)
+
+    imported = book.add_records(records)
+    book.dump()
+    return imported, errors
+
+def _ordered_map(executor, function, items, window):
+    """
+    Maps a function over items in an executor, keeping at most window items in flight
+
+    Arguments:
+    executor -- the executor
+    function -- the function to apply
+    items -- the items
+    window -- the maximum number of submitted items without a consumed result
+
+    Returns:
+    generator -- the results, in the order of the items
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,158 @@
+"""
+Readers-writer lock of the address book
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+class ReadWriteLock:
+    """
+    Class for a lock shared by readers and held alone by a writer
+
+    Waiting writers go before new readers, so a steady flow of readers does not
+    starve them, but readers that waited for a writer go before the next one.
+    Both sides are reentrant, and a writer may read, but a reader may not
+    start writing. The time spent waiting for the lock is counted.
+
+    Attributes:
+    stats -- the number of acquisitions of each side, how many of them had to
+        wait, and the total and longest waits in milliseconds
+
+    Methods:
+    __init__ -- initializes the lock
+    read -- the context of a reader
+    write -- the context of the writer
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        self._waiting_readers = 0
+        self._admitted_readers = 0
+        self._local = threading.local()
+        self.stats = {
+            "reads": 0,
+            "read_waits": 0,
+            "read_wait_ms": 0.0,
+            "read_wait_max_ms": 0.0,
+            "writes": 0,
+            "write_waits": 0,
+            "write_wait_ms": 0.0,
+            "write_wait_max_ms": 0.0,
+        }
+
+    @contextmanager
+    def read(self):
+        """
+        The context of a reader, shared with the other readers
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context holding the lock
+
+        Raises:
+        None
+        """
+        held = self._held()
+        if held or self._writer == threading.get_ident():
+            # Already inside the lock, nothing can write meanwhile
+            held.append(False)
+        else:
+            with self._condition:
+                self._waiting_readers += 1
+                try:
+                    self._wait("read", lambda: self._writer is None and (
+                        not self._waiting_writers or self._admitted_readers))
+                finally:
+                    self._waiting_readers -= 1
+                if self._admitted_readers:
+                    self._admitted_readers -= 1
+                self._readers += 1
+            held.append(True)
+        try:
+            yield
+        finally:
+            if held.pop():
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """
+        The context of the writer, alone in the lock
+
+        Arguments:
+        None
+
+        Returns:
+        context manager -- the context holding the lock
+
+        Raises:
+        RuntimeError -- if the thread is reading
+        """
+        me = threading.get_ident()
+        if self._writer != me:
+            if any(self._held()):
+                raise RuntimeError("Cannot write while reading")
+            with self._condition:
+                self._waiting_writers += 1
+                try:
+                    self._wait("write", lambda: self._writer is None and not self._readers
+                               and not self._admitted_readers)
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+        self._writer_depth += 1
+        try:
+            yield
+        finally:
+            self._writer_depth -= 1
+            if not self._writer_depth:
+                with self._condition:
+                    self._writer = None
+                    # The readers waiting for this writer go before the next one
+                    self._admitted_readers = self._waiting_readers
+                    self._condition.notify_all()
+
+    def _held(self):
+        """
+        Returns the read acquisitions of the current thread
+
+        Arguments:
+        None
+
+        Returns:
+        list -- True for each acquisition that counts as a reader, innermost last
+        """
+        held = getattr(self._local, "held", None)
+        if held is None:
+            held = self._local.held = []
+        return held
+
+    def _wait(self, side, ready):
+        """
+        Waits until a side may take the lock and counts the wait, with the condition held
+
+        Arguments:
+        side -- "read" or "write"
+        ready -- returns whether the side may take the lock
+
+        Returns:
+        None
+        """
+        self.stats[f"{side}s"] += 1
+        if ready():
+            return
+        start = time.perf_counter()
+        self._condition.wait_for(ready)
+        waited = (time.perf_counter() - start) * 1000
+        self.stats[f"{side}_waits"] += 1
+        self.stats[f"{side}_wait_ms"] += waited
+        self.stats[f"{side}_wait_max_ms"] = max(self.stats[f"{side}_wait_max_ms"], waited)
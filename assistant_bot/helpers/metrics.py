@@ -0,0 +1,244 @@
+"""
+Latency and throughput metrics of the commands and storage operations
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from assistant_bot.address_book.storage.Snapshot import atomic_write
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket has no bound
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    Class for the latency histogram of a command or an operation
+
+    Attributes:
+    buckets -- the number of calls in each bucket, the last one for calls over all bounds
+    count -- the number of calls
+    errors -- the number of failed calls
+    total -- the total time of the calls in seconds
+    longest -- the longest call in seconds
+
+    Methods:
+    __init__ -- initializes the histogram
+    observe -- counts a call
+    quantile -- estimates a quantile of the latency
+    """
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+    def observe(self, seconds, error=False):
+        """
+        Counts a call
+
+        Arguments:
+        seconds -- the duration of the call
+        error -- whether the call failed
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.longest = max(self.longest, seconds)
+
+    def quantile(self, q):
+        """
+        Estimates a quantile of the latency, interpolating inside its bucket
+
+        Arguments:
+        q -- the quantile, from 0 to 1
+
+        Returns:
+        float -- the latency in seconds, 0 if there were no calls
+
+        Raises:
+        None
+        """
+        rank = q * self.count
+        seen = 0
+        for i, calls in enumerate(self.buckets):
+            if calls and seen + calls >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.longest
+                return min(low + (high - low) * (rank - seen) / calls, self.longest)
+            seen += calls
+        return 0.0
+
+class Metrics:
+    """
+    Class for the metrics of the process: histograms of commands and operations, and gauges
+
+    Attributes:
+    started -- the time.monotonic() value the metrics were started at
+    histograms -- the histogram of each (kind, name) pair, kind being "command" or "operation"
+    gauges -- the last value of each gauge
+
+    Methods:
+    __init__ -- initializes the metrics
+    observe -- counts a call of a command or an operation
+    timed -- the context of a timed operation
+    set_gauge -- sets the value of a gauge
+    summary -- returns the metrics as readable lines
+    prometheus -- returns the metrics in the Prometheus text format
+    write_prometheus -- writes the metrics to a Prometheus text file
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.histograms = {}
+        self.gauges = {}
+
+    def observe(self, kind, name, seconds, error=False):
+        """
+        Counts a call of a command or an operation
+
+        Arguments:
+        kind -- "command" or "operation"
+        name -- the name of the command or operation
+        seconds -- the duration of the call
+        error -- whether the call failed
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            histogram = self.histograms.get((kind, name))
+            if histogram is None:
+                histogram = self.histograms[(kind, name)] = Histogram()
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def timed(self, name):
+        """
+        The context of a timed operation, counted as failed if it raises
+
+        Arguments:
+        name -- the name of the operation
+
+        Returns:
+        context manager -- the context to run the operation in
+
+        Raises:
+        None
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.observe("operation", name, time.perf_counter() - start, failed)
+
+    def set_gauge(self, name, value):
+        """
+        Sets the value of a gauge
+
+        Arguments:
+        name -- the name of the gauge
+        value -- the value
+
+        Returns:
+        None
+
+        Raises:
+        None
+        """
+        with self.lock:
+            self.gauges[name] = value
+
+    def summary(self):
+        """
+        Returns the metrics as readable lines, commands first
+
+        Arguments:
+        None
+
+        Returns:
+        list -- the lines
+
+        Raises:
+        None
+        """
+        with self.lock:
+            uptime = max(time.monotonic() - self.started, 1e-9)
+            lines = []
+            for (kind, name), histogram in sorted(self.histograms.items()):
+                p50, p95, p99 = (histogram.quantile(q) * 1000 for q in (0.5, 0.95, 0.99))
+                lines.append(f"{kind.capitalize()} {name}: {histogram.count} calls, "
+                             f"{histogram.errors} errors, {histogram.count / uptime:.2f}/s, "
+                             f"p50 {p50:.3f} ms, p95 {p95:.3f} ms, p99 {p99:.3f} ms")
+            lines += [f"{name.replace('_', ' ').capitalize()}: {value}"
+                      for name, value in sorted(self.gauges.items())]
+            return lines
+
+    def prometheus(self):
+        """
+        Returns the metrics in the Prometheus text format
+
+        Arguments:
+        None
+
+        Returns:
+        str -- the metrics
+
+        Raises:
+        None
+        """
+        lines = []
+        with self.lock:
+            for kind in ("command", "operation"):
+                metric = f"assistant_bot_{kind}_seconds"
+                lines += [f"# HELP {metric} Latency of the {kind}s.", f"# TYPE {metric} histogram"]
+                errors = []
+                for (other, name), histogram in sorted(self.histograms.items()):
+                    if other != kind:
+                        continue
+                    label = f'{kind}="{name}"'
+                    cumulative = 0
+                    for bound, calls in zip(BUCKETS + ("+Inf",), histogram.buckets):
+                        cumulative += calls
+                        lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                    lines.append(f"{metric}_sum{{{label}}} {histogram.total}")
+                    lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+                    errors.append(f"assistant_bot_{kind}_errors_total{{{label}}} {histogram.errors}")
+                lines += [f"# HELP assistant_bot_{kind}_errors_total Failed {kind}s.",
+                          f"# TYPE assistant_bot_{kind}_errors_total counter"] + errors
+            for name, value in sorted(self.gauges.items()):
+                lines += [f"# TYPE assistant_bot_{name} gauge", f"assistant_bot_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Writes the metrics to a Prometheus text file, replacing it atomically
+
+        Arguments:
+        path -- the path of the file, read by the textfile collector of the node exporter
+
+        Returns:
+        None
+
+        Raises:
+        OSError -- if the file cannot be written
+        """
+        text = self.prometheus().encode("utf-8")
+        atomic_write(path, lambda file: file.write(text))
+
+# The metrics of this process
+METRICS = Metrics()
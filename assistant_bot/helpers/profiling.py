@@ -0,0 +1,268 @@
+"""
+Opt-in profiling of the commands, written as reports to the profiles directory
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from assistant_bot import settings
+
+# "cprofile" profiles every command, "sample" one call in PROFILE_SAMPLE_EVERY
+# of each command, "memory" traces the allocations
+MODES = ("cprofile", "sample", "memory")
+
+# Frames kept per traced allocation, and lines in the text reports
+MEMORY_FRAMES = 10
+REPORT_LINES = 25
+
+class Profiler:
+    """
+    Class for the profiler of the commands, idle until started
+
+    The cProfile modes profile each call on its own thread, so the commands
+    of the server are profiled too, and add the calls up per command.
+
+    Attributes:
+    mode -- the running mode, None while idle
+    directory -- the directory the reports are written to
+    sample_every -- the calls of a command per profiled call in the "sample" mode
+    stats -- the added up pstats.Stats of each profiled command
+    calls -- the number of calls of each command since the profiler started
+    profiled -- the number of profiled calls of each command
+    peaks -- the largest memory in bytes allocated by a call of each command
+
+    Methods:
+    __init__ -- initializes the profiler
+    start -- starts profiling in a mode
+    stop -- stops profiling and writes the reports
+    dump -- writes the reports of the profiling so far
+    run -- runs a command, profiling it
+    """
+    def __init__(self, directory="./data/profiles", sample_every=10):
+        self.lock = threading.Lock()
+        self.mode = None
+        self.directory = directory
+        self.sample_every = sample_every
+        self.stats = {}
+        self.calls = {}
+        self.profiled = {}
+        self.peaks = {}
+
+    def start(self, mode):
+        """
+        Starts profiling in a mode, dropping the results of the previous profiling
+
+        Arguments:
+        mode -- "cprofile", "sample" or "memory"
+
+        Returns:
+        None
+
+        Raises:
+        ValueError -- if the mode is unknown or the profiler is running
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode}, use {', '.join(MODES)}")
+        with self.lock:
+            if self.mode:
+                raise ValueError(f"Profiling is already running in the {self.mode} mode")
+            self.stats.clear()
+            self.calls.clear()
+            self.profiled.clear()
+            self.peaks.clear()
+            if mode == "memory":
+                tracemalloc.start(MEMORY_FRAMES)
+            self.mode = mode
+
+    def stop(self):
+        """
+        Stops profiling and writes the reports
+
+        Arguments:
+        None
+
+        Returns:
+        list -- the paths of the written reports
+
+        Raises:
+        ValueError -- if the profiler is not running
+        OSError -- if the reports cannot be written
+        """
+        paths = self.dump()
+        with self.lock:
+            if self.mode == "memory":
+                tracemalloc.stop()
+            self.mode = None
+        return paths
+
+    def dump(self):
+        """
+        Writes the reports of the profiling so far, the profiler keeps running
+
+        The cProfile modes write the stats of every command to a .prof file,
+        for pstats or snakeviz, the memory mode writes a tracemalloc snapshot.
+        Both write a readable summary to a .txt file.
+
+        Arguments:
+        None
+
+        Returns:
+        list -- the paths of the written reports
+
+        Raises:
+        ValueError -- if the profiler is not running
+        OSError -- if the reports cannot be written
+        """
+        with self.lock:
+            if not self.mode:
+                raise ValueError("Profiling is not running")
+            os.makedirs(self.directory, exist_ok=True)
+            prefix = os.path.join(self.directory,
+                                  f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+            if self.mode == "memory":
+                return self._dump_memory(prefix)
+            return self._dump_stats(prefix)
+
+    def run(self, command, function, *args):
+        """
+        Runs a command, profiling it if the mode and the sampling say so
+
+        Arguments:
+        command -- the name of the command
+        function -- the function running the command
+        args -- the arguments of the function
+
+        Returns:
+        object -- the result of the function
+
+        Raises:
+        Exception -- whatever the function raises
+        """
+        command = command or "empty"
+        with self.lock:
+            mode = self.mode
+            calls = self.calls[command] = self.calls.get(command, 0) + 1
+        if mode == "memory":
+            return self._run_traced(command, function, args)
+        if mode == "cprofile" or mode == "sample" and (calls - 1) % self.sample_every == 0:
+            return self._run_profiled(command, function, args)
+        return function(*args)
+
+    def _run_profiled(self, command, function, args):
+        """
+        Runs a command under cProfile and adds its stats to those of the command
+
+        Arguments:
+        command -- the name of the command
+        function -- the function running the command
+        args -- the arguments of the function
+
+        Returns:
+        object -- the result of the function
+        """
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(function, *args)
+        finally:
+            profile.create_stats()
+            with self.lock:
+                if self.mode:
+                    stats = self.stats.get(command)
+                    if stats is None:
+                        self.stats[command] = pstats.Stats(profile)
+                    else:
+                        stats.add(profile)
+                    self.profiled[command] = self.profiled.get(command, 0) + 1
+
+    def _run_traced(self, command, function, args):
+        """
+        Runs a command, keeping the largest memory allocated by its calls
+
+        Commands running at the same time count each other's allocations.
+
+        Arguments:
+        command -- the name of the command
+        function -- the function running the command
+        args -- the arguments of the function
+
+        Returns:
+        object -- the result of the function
+        """
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            return function(*args)
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            with self.lock:
+                self.peaks[command] = max(self.peaks.get(command, 0), peak)
+                self.profiled[command] = self.profiled.get(command, 0) + 1
+
+    def _dump_stats(self, prefix):
+        """
+        Writes the cProfile stats of every command, with the lock held
+
+        Arguments:
+        prefix -- the path of the reports without the suffix
+
+        Returns:
+        list -- the paths of the written reports
+        """
+        paths = []
+        summary = io.StringIO()
+        for command, stats in sorted(self.stats.items()):
+            path = f"{prefix}-{command}.prof"
+            stats.dump_stats(path)
+            paths.append(path)
+            summary.write(f"== {command}: {self.profiled[command]} of "
+                          f"{self.calls[command]} calls profiled ==\n")
+            stats.stream = summary
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LINES)
+        if not self.stats:
+            summary.write("No commands were profiled.\n")
+        return paths + [self._write(f"{prefix}-commands.txt", summary.getvalue())]
+
+    def _dump_memory(self, prefix):
+        """
+        Writes a tracemalloc snapshot and the largest allocations, with the lock held
+
+        Arguments:
+        prefix -- the path of the reports without the suffix
+
+        Returns:
+        list -- the paths of the written reports
+        """
+        snapshot = tracemalloc.take_snapshot()
+        path = f"{prefix}.tracemalloc"
+        snapshot.dump(path)
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced memory: {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB", ""]
+        lines += [f"{command}: {self.profiled[command]} calls, largest "
+                  f"{self.peaks[command] / 1024:.1f} KiB" for command in sorted(self.peaks)]
+        lines += ["", f"Top {REPORT_LINES} allocations by line:"]
+        lines += [str(statistic)
+                  for statistic in snapshot.statistics("lineno")[:REPORT_LINES]]
+        return [path, self._write(f"{prefix}-memory.txt", "\n".join(lines) + "\n")]
+
+    def _write(self, path, text):
+        """
+        Writes a text report
+
+        Arguments:
+        path -- the path of the report
+        text -- the report
+
+        Returns:
+        str -- the path
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+# The profiler of this process
+PROFILER = Profiler(settings.PROFILE_DIR, settings.PROFILE_SAMPLE_EVERY)
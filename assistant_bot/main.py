@@ -2,6 +2,12 @@
 This module contains the main function of the assistant bot.
 
 The main function reads user input, parses it, and calls the appropriate command handler function.
+With --script it runs the commands of a file, or of stdin for "-", without prompts
+and saves the address book once at the end. With --json every result is printed as
+a JSON object on its own line. The exit code is 1 if a command fails, which stops the script.
+With --serve it serves the commands to many clients over a Unix or TCP socket, see server.py.
+With --profile, or the ASSISTANT_BOT_PROFILE variable, the commands are profiled
+and the reports are written to the profiles directory when the bot exits.
 
 The assistant bot can perform the following commands:
 - hello: Display a greeting message.
@@ -12,31 +18,75 @@ The assistant bot can perform the following commands:
 - phone-edit: Edit a phone number of a contact.
 - phone-remove: Remove a phone number from a contact.
 - phone: Show the phone number of a contact.
-- all: Show all contacts in the contacts dictionary.
+- find-phone: Find the contacts owning a phone number.
+- birthdays: Show the contacts with a birthday in the next days.
+- birthday-report: Show the birthday statistics of the whole book.
+- search: Show the contacts whose name starts with a prefix.
+- find: Show the contacts whose name is closest to a query.
+- list: Show the contacts whose name is in a range.
+- all: Show the contacts in name order, a page at a time.
+- import: Import contacts from a CSV or JSONL file.
+- export: Export all contacts to a CSV or JSONL file.
+- stats: Show the save state of the address book.
+- profile: Start, stop or write a profile of the commands.
 - close or exit: Close the assistant bot.
 """
+import argparse
 import atexit
+import contextlib
+import json
 import signal
 import sys
 import threading
 import time
+from assistant_bot import settings
 from assistant_bot.command_handlers import add_contact, change_contact, remove_contact, \
                                             add_birthday, show_birthday, birthdays, add_phone, \
-                                            edit_phone, remove_phone, show_phone, show_all
+                                            edit_phone, remove_phone, show_phone, show_all, \
+                                            show_stats, find_phone, search_contacts, \
+                                            list_contacts, find_contacts, import_contacts, \
+                                            export_contacts, birthday_report, \
+                                            profile_commands
 from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.decorators import ErrorMessage
+from assistant_bot.helpers.autosave import Autosave
+from assistant_bot.helpers.metrics import METRICS
+from assistant_bot.helpers.profiling import MODES, PROFILER
 
-def autosave(book, interval=60):  # Autosaves every minute by default
-    """
-    Periodically save the address book data.
-    
-    Args:
-    book (AddressBook): The address book instance to be saved.
-    interval (int): The save interval in seconds.
-    """
-    while True:
-        time.sleep(interval)
-        book.dump()
-        print("Autosave completed.")
+try:
+    import readline
+except ImportError:  # not available on every platform, completion is optional
+    readline = None
+
+COMMANDS = ["hello", "add", "add-birthday", "birthdays", "birthday-report", "change", "remove",
+            "add-phone", "edit-phone", "remove-phone", "phone", "find-phone", "search", "find",
+            "list", "all", "show-birthday", "import", "export", "stats", "profile", "close", "exit"]
+
+HELP = """Hello! Here are the available commands:
+add <name> <phone>: Add a contact
+add-birthday <name> <birthday>: Add a birthday to a contact
+birthdays [days]: Show the birthdays in the next days, 7 by default
+birthday-report [days]: Show birthday statistics, with NumPy installed
+change <name> <new_name>: Change the name of a contact
+remove <name>: Remove a contact
+add-phone <name> <phone>: Add a phone number to a contact
+edit-phone <name> <old_phone> <new_phone>: Edit a phone number of a contact
+remove-phone <name> <phone>: Remove a phone number from a contact
+phone <name>: Show the phone number of a contact
+find-phone <phone>: Find the contacts owning a phone number
+search <prefix>: Show the contacts whose name starts with a prefix
+find <query>: Show the contacts whose name is closest to a query
+list <from>..<to>: Show the contacts whose name is in a range, like A..F
+all [--limit <count>] [--offset <count>]: Show contacts in name order, a page at a time
+all next: Show the next page of contacts
+import <file>: Import contacts from a CSV (name,phones,birthday) or JSONL file
+export <file> [--format csv|jsonl]: Export all contacts to a file
+stats: Show the save state of the address book
+profile start [cprofile|sample|memory] | stop | dump: Profile the commands into data/profiles
+close or exit: Close the assistant bot"""
+
+# Lines of script output written at once
+OUTPUT_BUFFER_LINES = 1000
 
 def parse_input(user_input):
     """
@@ -57,79 +107,311 @@ def setup_signal_handlers(book):
     """
     Setup signal handlers for graceful shutdown, using the book object.
     """
-    def signal_handler(signum):
+    def signal_handler(signum, _frame):
         """
         Handle unexpected signals to ensure data is saved before exiting.
         """
         print(f"Signal received ({signum}), saving data before exit...")
-        book.dump()
+        # The book is saved by the atexit hook once the interrupted command released its locks
         sys.exit(0)
 
-    atexit.register(book.dump)  # Ensure data is saved on normal exit
+    atexit.register(book.close)  # Ensure data is saved and the journal closed on normal exit
     signal.signal(signal.SIGINT, signal_handler)  # Handle Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # Handle system termination
 
-def main():
+def start_autosave(book):
+    """
+    Start the thread saving the book when it has unsaved changes.
+
+    Returns:
+    Autosave: The autosave, holding the statistics of its decisions.
+    """
+    autosave = Autosave(book, settings.AUTOSAVE_MAX_MUTATIONS, settings.AUTOSAVE_MAX_DELAY,
+                        settings.AUTOSAVE_IDLE, settings.AUTOSAVE_POLL_INTERVAL)
+    autosave_thread = threading.Thread(target=autosave.run)
+    autosave_thread.daemon = True  # Ensures the thread will close when the main program exits
+    autosave_thread.start()
+    return autosave
+
+def start_metrics():
+    """
+    Start the thread writing the metrics to the Prometheus text file, if one is configured.
+    The file is written one last time when the bot exits.
+    """
+    if not settings.METRICS_FILE:
+        return
+
+    def write_metrics():
+        """
+        Write the metrics file, reporting errors instead of stopping the bot.
+        """
+        try:
+            METRICS.write_prometheus(settings.METRICS_FILE)
+        except OSError as e:
+            print(f"Error writing metrics: {e}")
+
+    def run():
+        """
+        Write the metrics file periodically, forever.
+        """
+        while True:
+            time.sleep(settings.METRICS_INTERVAL)
+            write_metrics()
+
+    atexit.register(write_metrics)
+    threading.Thread(target=run, daemon=True).start()
+
+def start_profiling(mode):
+    """
+    Start profiling the commands, and write the reports when the bot exits.
+
+    Args:
+    mode (str): "cprofile", "sample" or "memory", or an empty string to leave profiling off.
+    """
+    if not mode:
+        return
+
+    def write_profile():
+        """
+        Write the reports of a profiling still running, reporting errors.
+        """
+        if not PROFILER.mode:
+            return
+        try:
+            paths = PROFILER.stop()
+        except OSError as e:
+            print(f"Error writing the profile: {e}", file=sys.stderr)
+            return
+        print("\n".join(["Profile written to:"] + paths), file=sys.stderr)
+
+    PROFILER.start(mode)
+    atexit.register(write_profile)
+
+def setup_completion(book):
+    """
+    Setup tab completion of command names and contact names, if readline is available.
+    """
+    if readline is None:
+        return
+
+    matches = []
+
+    def completer(text, state):
+        """
+        Return the state-th completion of the text being typed.
+        """
+        if state == 0:
+            if readline.get_begidx() == 0:
+                matches[:] = [command for command in COMMANDS if command.startswith(text)]
+            else:
+                matches[:] = book.complete(text)
+        return matches[state] if state < len(matches) else None
+
+    readline.set_completer(completer)
+    readline.set_completer_delims(" ")
+    readline.parse_and_bind("tab: complete")
+
+def run_command(command, args, book, session, autosave=None):
+    """
+    Run a command through its handler, profiling it while the profiler runs.
+
+    Args:
+    command (str): The command, or None for an empty input.
+    args (list): The arguments of the command.
+    book (AddressBook): An AddressBook class containing the contacts.
+    session (dict): The state kept between the commands of the user.
+    autosave (Autosave): The autosave of the address book, or None if there is none.
+
+    Returns:
+    str: The result of the command, an ErrorMessage if the command failed.
+    """
+    if PROFILER.mode:
+        return PROFILER.run(command, dispatch_command, command, args, book, session, autosave)
+    return dispatch_command(command, args, book, session, autosave)
+
+def dispatch_command(command, args, book, session, autosave=None):
+    """
+    Call the handler of a command.
+
+    Args:
+    command (str): The command, or None for an empty input.
+    args (list): The arguments of the command.
+    book (AddressBook): An AddressBook class containing the contacts.
+    session (dict): The state kept between the commands of the user.
+    autosave (Autosave): The autosave of the address book, or None if there is none.
+
+    Returns:
+    str: The result of the command, an ErrorMessage if the command failed.
+    """
+    match command:
+        case "hello":
+            # display a greeting and all possible commands
+            return HELP
+        case "add":
+            return add_contact(args, book)
+        case "change":
+            return change_contact(args, book)
+        case "remove":
+            return remove_contact(args, book)
+        case "add-phone":
+            return add_phone(args, book)
+        case "edit-phone":
+            return edit_phone(args, book)
+        case "remove-phone":
+            return remove_phone(args, book)
+        case "phone":
+            return show_phone(args, book)
+        case "find-phone":
+            return find_phone(args, book)
+        case "search":
+            return search_contacts(args, book)
+        case "find":
+            return find_contacts(args, book)
+        case "list":
+            return list_contacts(args, book)
+        case "all":
+            return show_all(args, book, session)
+        case 'add-birthday':
+            return add_birthday(args, book)
+        case 'show-birthday':
+            return show_birthday(args, book)
+        case 'birthdays':
+            return birthdays(args, book)
+        case "import":
+            return import_contacts(args, book)
+        case "export":
+            return export_contacts(args, book)
+        case "birthday-report":
+            return birthday_report(args, book)
+        case "stats":
+            return show_stats(book, autosave)
+        case "profile":
+            return profile_commands(args)
+        case None:
+            return ErrorMessage("Please enter a command.")
+        case _:
+            return ErrorMessage("Invalid command.")
+
+def run_script(path, json_output=False):
+    """
+    Run the commands of a script file, or of stdin for "-", without prompts.
+
+    Empty lines and lines starting with # are skipped. The output is written in
+    blocks, and the address book is saved once when the script ends.
+
+    Args:
+    path (str): The path of the script, or "-" for stdin.
+    json_output (bool): Whether to print every result as a JSON object.
+
+    Returns:
+    int: 0 if every command succeeded, 1 after the first failing command.
+    """
+    book = AddressBook()
+    # Loading messages must not mix with the results
+    with contextlib.redirect_stdout(sys.stderr):
+        book.load()
+
+    session = {}
+    output = []
+    status = 0
+    script = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(script, 1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            command, args = parse_input(line)
+            if command in ("close", "exit"):
+                break
+
+            result = run_command(command, args, book, session)
+            failed = isinstance(result, ErrorMessage)
+            if json_output:
+                result = json.dumps({"line": number, "command": command, "ok": not failed,
+                                     "output": str(result)}, ensure_ascii=False)
+            output.append(str(result))
+            if failed:
+                status = 1
+                break
+            if len(output) >= OUTPUT_BUFFER_LINES:
+                sys.stdout.write("\n".join(output) + "\n")
+                output.clear()
+    finally:
+        if output:
+            sys.stdout.write("\n".join(output) + "\n")
+        sys.stdout.flush()
+        if script is not sys.stdin:
+            script.close()
+        with contextlib.redirect_stdout(sys.stderr):
+            book.close()
+        if settings.METRICS_FILE:
+            METRICS.write_prometheus(settings.METRICS_FILE)
+    return status
+
+def parse_arguments(argv=None):
+    """
+    Parse the command line arguments.
+
+    Args:
+    argv (list): The arguments, by default those of the process.
+
+    Returns:
+    argparse.Namespace: The script path or None, whether to print JSON results,
+    the address to serve on or None, and the profiling mode or None.
+    """
+    parser = argparse.ArgumentParser(description="Assistant bot managing an address book.")
+    parser.add_argument("--script", metavar="FILE",
+                        help='run the commands of a file, "-" for stdin, and exit')
+    parser.add_argument("--json", action="store_true",
+                        help="print the result of every script command as a JSON object")
+    parser.add_argument("--serve", metavar="ADDRESS", nargs="?", const=settings.SERVER_ADDRESS,
+                        help='serve the commands on "unix:<path>" or "<host>:<port>", '
+                             f"{settings.SERVER_ADDRESS} by default")
+    parser.add_argument("--profile", choices=MODES, default=settings.PROFILE or None,
+                        help="profile the commands and write the reports to "
+                             f"{settings.PROFILE_DIR} on exit")
+    arguments = parser.parse_args(argv)
+    if arguments.profile not in (None,) + MODES:
+        parser.error(f"invalid ASSISTANT_BOT_PROFILE {arguments.profile}, use {', '.join(MODES)}")
+    return arguments
+
+def main(argv=None):
     """
     The main function of the assistant bot.
+
+    Returns:
+    int: The exit code.
     """
+    arguments = parse_arguments(argv)
+    start_profiling(arguments.profile)
+    if arguments.script:
+        return run_script(arguments.script, arguments.json)
+    if arguments.serve:
+        # Imported here, the server imports the command dispatch of this module
+        from assistant_bot.server import serve
+        return serve(arguments.serve)
+
     book = AddressBook()
-    book.load()
+    # Commands wait for the part of the book they need while it loads
+    book.load(background=settings.LOAD_IN_BACKGROUND)
     print("Welcome to the assistant bot!")
 
     setup_signal_handlers(book)
+    setup_completion(book)
 
-    autosave_thread = threading.Thread(target=autosave, args=(book,))
-    autosave_thread.daemon = True  # Ensures the thread will close when the main program exits
-    autosave_thread.start()
+    autosave = start_autosave(book)
+    start_metrics()
+
+    session = {}  # State kept between commands, like the position of the all pages
 
     while True:
         user_input = input("Enter a command: ")
         command, args = parse_input(user_input)
 
-        match command:
-            case "close" | "exit":
-                print("Good bye!")
-                break
-            case "hello":
-                # display a greeting and all possible commands
-                print("Hello! Here are the available commands:")
-                print("add <name> <phone>: Add a contact")
-                print("add-birthday <name> <birthday>: Add a birthday to a contact")
-                print("change <name> <new_name>: Change the name of a contact")
-                print("remove <name>: Remove a contact")
-                print("add-phone <name> <phone>: Add a phone number to a contact")
-                print("edit-phone <name> <old_phone> <new_phone>: Edit a phone number of a contact")
-                print("remove-phone <name> <phone>: Remove a phone number from a contact")
-                print("phone <name>: Show the phone number of a contact")
-                print("all: Show all contacts")
-                print("close or exit: Close the assistant bot")
-            case "add":
-                print(add_contact(args, book))
-            case "change":
-                print(change_contact(args, book))
-            case "remove":
-                print(remove_contact(args, book))
-            case "add-phone":
-                print(add_phone(args, book))
-            case "edit-phone":
-                print(edit_phone(args, book))
-            case "remove-phone":
-                print(remove_phone(args, book))
-            case "phone":
-                print(show_phone(args, book))
-            case "all":
-                print(show_all(book))
-            case 'add-birthday':
-                print(add_birthday(args, book))
-            case 'show-birthday':
-                print(show_birthday(args, book))
-            case 'birthdays':
-                print(birthdays(book))
-            case None:
-                print("Please enter a command.")
-            case _:
-                print("Invalid command.")
+        if command in ("close", "exit"):
+            print("Good bye!")
+            return 0
+        print(run_command(command, args, book, session, autosave))
+        book.loading.command_served()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
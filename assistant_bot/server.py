@@ -0,0 +1,182 @@
+"""
+This module serves the commands of the assistant bot over a local socket.
+
+Many clients share one address book. Every request is a line parsed like the
+input of the prompt, and every response is a status line, "OK <count>" or
+"ERR <count>", followed by the count lines of the result. Clients may send
+requests without waiting for the responses, which come back in order.
+
+Commands run concurrently in a thread pool. The readers-writer lock of the
+address book lets queries share it and makes changes wait for each other.
+A connection stops being read while too many of its requests are waiting,
+and stops being answered while its client does not read the responses.
+The book is saved by the autosave and when the server stops.
+"""
+import asyncio
+import contextlib
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from assistant_bot import settings
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.decorators import ErrorMessage
+from assistant_bot.main import parse_input, run_command, start_autosave, start_metrics
+
+class Server:
+    """
+    Class serving the commands of the bot to the clients of a socket.
+
+    Attributes:
+    book -- the shared address book
+    autosave -- the autosave of the book
+    executor -- the threads running the commands
+    """
+    def __init__(self, book, autosave):
+        self.book = book
+        self.autosave = autosave
+        self.executor = ThreadPoolExecutor(settings.SERVER_WORKERS)
+
+    async def execute(self, command, args, session):
+        """
+        Run a command in the thread pool.
+
+        Args:
+        command (str): The command, or None for an empty request.
+        args (list): The arguments of the command.
+        session (dict): The state kept between the commands of the connection.
+
+        Returns:
+        str: The result of the command, an ErrorMessage if the command failed.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, run_command, command, args,
+                                          self.book, session, self.autosave)
+
+    async def handle(self, reader, writer):
+        """
+        Serve the requests of one connection.
+
+        The requests are read ahead into a bounded queue and answered in order.
+        """
+        pending = asyncio.Queue(settings.SERVER_MAX_PENDING)
+        answering = asyncio.create_task(self.answer(pending, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await pending.put(ErrorMessage("Error: Request too long"))
+                    break
+                if not line:
+                    break
+                request = line.decode("utf-8", errors="replace")
+                # Waits while the queue is full, leaving the requests in the socket
+                await pending.put(request)
+                if parse_input(request)[0] in ("close", "exit"):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await pending.put(None)
+            await answering
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def answer(self, pending, writer):
+        """
+        Run the queued requests of a connection in order and write their responses.
+
+        A command failing with an unexpected exception is answered with an error.
+        """
+        session = {}
+        while (request := await pending.get()) is not None:
+            if isinstance(request, ErrorMessage):
+                result = request
+            else:
+                command, args = parse_input(request)
+                if command in ("close", "exit"):
+                    result = "Good bye!"
+                else:
+                    try:
+                        result = await self.execute(command, args, session)
+                    except Exception as e:
+                        # An unexpected failure answers the request, the connection goes on
+                        result = ErrorMessage(f"Error: {e}")
+
+            status = "ERR" if isinstance(result, ErrorMessage) else "OK"
+            text = str(result)
+            count = text.count("\n") + 1
+            try:
+                writer.write(f"{status} {count}\n{text}\n".encode("utf-8"))
+                # Waits while the client does not read its responses
+                await writer.drain()
+            except ConnectionError:
+                # The client is gone, the rest of its requests are dropped
+                while await pending.get() is not None:
+                    pass
+                return
+
+async def start_server(server, address):
+    """
+    Start listening on an address.
+
+    Args:
+    server (Server): The server handling the connections.
+    address (str): "unix:<path>" for a Unix socket, or "<host>:<port>" for TCP.
+
+    Returns:
+    asyncio.Server: The listening server.
+
+    Raises:
+    ValueError: If the address is invalid.
+    """
+    limit = settings.SERVER_LINE_LIMIT
+    if address.startswith("unix:"):
+        return await asyncio.start_unix_server(server.handle, address[len("unix:"):], limit=limit)
+
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError('Invalid address, use "unix:<path>" or "<host>:<port>"')
+    return await asyncio.start_server(server.handle, host or None, int(port), limit=limit)
+
+async def serve_forever(address):
+    """
+    Serve the address book until SIGINT or SIGTERM.
+    """
+    book = AddressBook()
+    book.load()
+    server = Server(book, start_autosave(book))
+    start_metrics()
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    try:
+        listener = await start_server(server, address)
+        print(f"Serving the assistant bot on {address}")
+        await stop.wait()
+        # Open connections are cancelled when the loop ends
+        listener.close()
+        print("Stopping, saving data before exit...")
+    finally:
+        server.executor.shutdown()
+        book.close()
+
+def serve(address):
+    """
+    Run the assistant bot as a server.
+
+    Args:
+    address (str): "unix:<path>" for a Unix socket, or "<host>:<port>" for TCP.
+
+    Returns:
+    int: The exit code.
+    """
+    try:
+        asyncio.run(serve_forever(address))
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
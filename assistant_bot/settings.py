@@ -0,0 +1,114 @@
+"""
+Runtime settings of the assistant bot, read from environment variables
+"""
+
+import os
+
+def _env_bool(name, default):
+    """
+    Reads a boolean setting from the environment
+
+    Arguments:
+    name -- the environment variable name
+    default -- the value to use when the variable is not set
+
+    Returns:
+    bool -- the setting value
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def _env_int(name, default):
+    """
+    Reads an integer setting from the environment
+
+    Arguments:
+    name -- the environment variable name
+    default -- the value to use when the variable is not set
+
+    Returns:
+    int -- the setting value
+    """
+    return int(os.environ.get(name, default))
+
+def _env_float(name, default):
+    """
+    Reads a float setting from the environment
+
+    Arguments:
+    name -- the environment variable name
+    default -- the value to use when the variable is not set
+
+    Returns:
+    float -- the setting value
+    """
+    return float(os.environ.get(name, default))
+
+# Append-only journal of address book mutations
+JOURNAL_ENABLED = _env_bool("ASSISTANT_BOT_JOURNAL", True)
+JOURNAL_GROUP_SIZE = _env_int("ASSISTANT_BOT_JOURNAL_GROUP_SIZE", 64)
+JOURNAL_SYNC_INTERVAL = _env_float("ASSISTANT_BOT_JOURNAL_SYNC_INTERVAL", 0.05)
+JOURNAL_COMPACT_BYTES = _env_int("ASSISTANT_BOT_JOURNAL_COMPACT_BYTES", 4 * 1024 * 1024)
+
+# Autosave: save after this many mutations, this many seconds after the first
+# unsaved mutation, or after this many idle seconds since the last mutation
+AUTOSAVE_MAX_MUTATIONS = _env_int("ASSISTANT_BOT_AUTOSAVE_MAX_MUTATIONS", 100)
+AUTOSAVE_MAX_DELAY = _env_float("ASSISTANT_BOT_AUTOSAVE_MAX_DELAY", 60)
+AUTOSAVE_IDLE = _env_float("ASSISTANT_BOT_AUTOSAVE_IDLE", 5)
+AUTOSAVE_POLL_INTERVAL = _env_float("ASSISTANT_BOT_AUTOSAVE_POLL_INTERVAL", 1)
+
+# Storage backend of the address book: "pickle", "binary", "sqlite" or "sharded"
+STORAGE = os.environ.get("ASSISTANT_BOT_STORAGE", "pickle")
+PICKLE_PATH = os.environ.get("ASSISTANT_BOT_PICKLE_PATH", "./data/book.pickle")
+BINARY_PATH = os.environ.get("ASSISTANT_BOT_BINARY_PATH", "./data/book.bin")
+SQLITE_PATH = os.environ.get("ASSISTANT_BOT_SQLITE_PATH", "./data/book.sqlite3")
+
+# Compression of the pickle snapshots and the shard files: "zlib", "bz2" or "lzma",
+# disabled if empty, and its level, the default of the compressor if not set
+SNAPSHOT_COMPRESSION = os.environ.get("ASSISTANT_BOT_SNAPSHOT_COMPRESSION", "") or None
+SNAPSHOT_COMPRESSION_LEVEL = (int(os.environ["ASSISTANT_BOT_SNAPSHOT_COMPRESSION_LEVEL"])
+                              if "ASSISTANT_BOT_SNAPSHOT_COMPRESSION_LEVEL" in os.environ else None)
+
+# Sharded storage: the directory of the shard files, the number of shards of a
+# new book, and the threads reading and writing shards
+SHARDED_PATH = os.environ.get("ASSISTANT_BOT_SHARDED_PATH", "./data/shards")
+SHARD_COUNT = _env_int("ASSISTANT_BOT_SHARD_COUNT", 16)
+SHARD_WORKERS = _env_int("ASSISTANT_BOT_SHARD_WORKERS", min(8, os.cpu_count() or 1))
+
+# Several processes may share the snapshot and journal files: they are locked,
+# and the changes of the other processes are checked for this often in seconds
+STORAGE_SHARED = _env_bool("ASSISTANT_BOT_STORAGE_SHARED", True)
+STORAGE_POLL_INTERVAL = _env_float("ASSISTANT_BOT_STORAGE_POLL_INTERVAL", 0.5)
+
+# Load the address book in a background thread, so the prompt appears at once
+LOAD_IN_BACKGROUND = _env_bool("ASSISTANT_BOT_BACKGROUND_LOAD", True)
+
+# Bulk import and export: rows processed per chunk, and processes validating
+# imported chunks in parallel
+IMPORT_CHUNK_SIZE = _env_int("ASSISTANT_BOT_IMPORT_CHUNK_SIZE", 10000)
+IMPORT_WORKERS = _env_int("ASSISTANT_BOT_IMPORT_WORKERS", os.cpu_count() or 1)
+
+# Metrics in the Prometheus text format, written to this file every interval
+# in seconds for the textfile collector of the node exporter; disabled if empty
+METRICS_FILE = os.environ.get("ASSISTANT_BOT_METRICS_FILE", "")
+METRICS_INTERVAL = _env_float("ASSISTANT_BOT_METRICS_INTERVAL", 15)
+
+# Profiling of the commands: "cprofile", "sample" or "memory", disabled if empty.
+# The reports are written to the directory when the bot exits, and the sample
+# mode profiles one call in this many of each command
+PROFILE = os.environ.get("ASSISTANT_BOT_PROFILE", "")
+PROFILE_DIR = os.environ.get("ASSISTANT_BOT_PROFILE_DIR", "./data/profiles")
+PROFILE_SAMPLE_EVERY = _env_int("ASSISTANT_BOT_PROFILE_SAMPLE_EVERY", 10)
+
+# Number of contacts shown by one page of the all command
+PAGE_SIZE = _env_int("ASSISTANT_BOT_PAGE_SIZE", 20)
+
+# Server mode: the address to listen on, "unix:<path>" or "<host>:<port>",
+# the threads running commands, the requests read ahead per connection,
+# and the longest request line in bytes
+SERVER_ADDRESS = os.environ.get("ASSISTANT_BOT_SERVER_ADDRESS", "127.0.0.1:8765")
+SERVER_WORKERS = _env_int("ASSISTANT_BOT_SERVER_WORKERS", 8)
+SERVER_MAX_PENDING = _env_int("ASSISTANT_BOT_SERVER_MAX_PENDING", 64)
+SERVER_LINE_LIMIT = _env_int("ASSISTANT_BOT_SERVER_LINE_LIMIT", 64 * 1024)
@@ -0,0 +1,12 @@
+"""
+Reproducible benchmarks of the address book
+
+The books are generated from a seed with the real models, so two runs with
+the same options measure the same contacts. Every benchmark runs in a
+temporary data directory with the configured storage backend, and reports
+its best wall time and the peak memory it allocated, as JSON.
+
+Usage:
+    python -m benchmarks --sizes 1k 10k 100k --output results.json
+    python -m benchmarks --sizes 1k 10k 100k --compare results.json --threshold 0.1
+"""
@@ -0,0 +1,114 @@
+"""
+Runs the benchmarks from the command line
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from benchmarks.compare import compare, format_row, mismatches
+from benchmarks.suite import BENCHMARKS, format_result, run_suite
+
+SIZE_SUFFIXES = {"k": 1000, "m": 1000 ** 2}
+
+def parse_size(value):
+    """
+    Parses a book size, with an optional k or M suffix
+
+    Arguments:
+    value -- the size, like "2500", "10k" or "1M"
+
+    Returns:
+    int -- the number of records
+
+    Raises:
+    argparse.ArgumentTypeError -- if the size is invalid
+    """
+    multiplier = SIZE_SUFFIXES.get(value[-1:].lower(), 1)
+    digits = value[:-1] if multiplier > 1 else value
+    if not digits.isdigit() or int(digits) == 0:
+        raise argparse.ArgumentTypeError(f"Invalid size {value}")
+    return int(digits) * multiplier
+
+def parse_arguments(argv):
+    """
+    Parses the command line
+
+    Arguments:
+    argv -- the arguments, without the program name
+
+    Returns:
+    argparse.Namespace -- the options
+
+    Raises:
+    SystemExit -- if the arguments are invalid
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmark the address book.")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[1000, 10000, 100000],
+                        metavar="SIZE", help="numbers of records, like 1k or 10M")
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), metavar="NAME",
+                        help=f"benchmarks to run, of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--storage", choices=("pickle", "binary", "sqlite", "sharded"), default="pickle")
+    parser.add_argument("--journal", action="store_true",
+                        help="keep the journal, so saves sync it instead of writing a snapshot")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each benchmark")
+    parser.add_argument("--lookups", type=int, default=10000,
+                        help="records found or renamed per run")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the run measuring the peak memory")
+    parser.add_argument("--output",
+                        help="file to write the results to, the standard output by default")
+    parser.add_argument("--compare", metavar="BASELINE", help="results of a baseline run")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed growth of time and memory over the baseline")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Runs the benchmarks, writes the results and compares them with a baseline
+
+    Arguments:
+    argv -- the arguments, sys.argv[1:] by default
+
+    Returns:
+    int -- the exit code: 1 if a result regressed, 0 otherwise
+
+    Raises:
+    None
+    """
+    options = parse_arguments(sys.argv[1:] if argv is None else argv)
+    baseline = None
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    # The standard output may carry the results, the messages of the bot are dropped
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run_suite(options.sizes, options.benchmarks, options.storage, options.journal,
+                            options.seed, options.repeat, options.lookups, options.memory,
+                            progress=lambda result: print(format_result(result), file=sys.stderr))
+
+    text = json.dumps(results, indent=2)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if baseline is None:
+        return 0
+    differing = mismatches(baseline, results)
+    if differing:
+        print(f"Warning: the runs differ in {', '.join(differing)}", file=sys.stderr)
+    rows = compare(baseline, results, options.threshold)
+    for row in rows:
+        print(format_row(row), file=sys.stderr)
+    regressions = sum(row["regression"] for row in rows)
+    print(f"{regressions} regressions over {options.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
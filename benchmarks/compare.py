@@ -0,0 +1,85 @@
+"""
+Comparison of benchmark results with a baseline run
+"""
+
+# The conditions of a run that make its results comparable with another
+COMPARABLE = ("storage", "journal", "seed", "lookups", "python", "implementation")
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compares the results of a run with those of a baseline run
+
+    A result regresses when its time or its peak memory grew by more than
+    the threshold. Results missing from either run are skipped.
+
+    Arguments:
+    baseline -- the baseline run, as written by the suite
+    current -- the run to compare
+    threshold -- the allowed growth, 0.1 for 10%
+
+    Returns:
+    list -- a dict per compared metric: the benchmark, the size, the metric,
+        the baseline and current values, the relative change and whether it regressed
+
+    Raises:
+    None
+    """
+    before = {(result["benchmark"], result["size"]): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = before.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            if not old.get(metric) or result.get(metric) is None:
+                continue
+            change = result[metric] / old[metric] - 1
+            rows.append({
+                "benchmark": result["benchmark"],
+                "size": result["size"],
+                "metric": metric,
+                "baseline": old[metric],
+                "current": result[metric],
+                "change": change,
+                "regression": change > threshold,
+            })
+    return rows
+
+def mismatches(baseline, current):
+    """
+    Returns the conditions that differ between two runs
+
+    Arguments:
+    baseline -- the baseline run
+    current -- the run to compare
+
+    Returns:
+    list -- the names of the differing conditions
+
+    Raises:
+    None
+    """
+    return [key for key in COMPARABLE
+            if baseline["meta"].get(key) != current["meta"].get(key)]
+
+def format_row(row):
+    """
+    Returns a compared metric as a readable line
+
+    Arguments:
+    row -- the compared metric
+
+    Returns:
+    str -- the line
+
+    Raises:
+    None
+    """
+    if row["metric"] == "seconds":
+        before, after = f"{row['baseline'] * 1000:.2f} ms", f"{row['current'] * 1000:.2f} ms"
+    else:
+        before = f"{row['baseline'] / 2 ** 20:.1f} MiB"
+        after = f"{row['current'] / 2 ** 20:.1f} MiB"
+    line = (f"{row['benchmark']:<12} {row['size']:>10,} {row['metric']:<10} "
+            f"{before} -> {after} ({row['change']:+.1%})")
+    return line + " REGRESSION" if row["regression"] else line
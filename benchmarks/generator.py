@@ -0,0 +1,100 @@
+"""
+Synthetic address books built from the real models
+"""
+
+import datetime
+import random
+from assistant_bot.address_book.models.Record import Record
+
+FIRST_NAMES = ("Olena", "Andrii", "Iryna", "Dmytro", "Oksana", "Serhii", "Nataliia", "Oleksandr",
+               "Tetiana", "Mykola", "Yulia", "Volodymyr", "Kateryna", "Taras", "Svitlana",
+               "Bohdan", "Mariia", "Yaroslav", "Halyna", "Petro", "Anna", "Ivan", "Sofiia",
+               "Roman", "Viktoriia", "Maksym", "Liudmyla", "Vasyl", "Daryna", "Ostap", "John",
+               "Emma", "Michael", "Olivia", "David", "Sophia", "James", "Mia", "Robert", "Chloe")
+LAST_NAMES = ("Kovalenko", "Bondarenko", "Tkachenko", "Shevchenko", "Kravchenko", "Boiko",
+              "Melnyk", "Oliinyk", "Lysenko", "Marchenko", "Rudenko", "Savchenko", "Moroz",
+              "Petrenko", "Koval", "Ponomarenko", "Kuzmenko", "Pavlenko", "Levchenko", "Hrytsenko",
+              "Smith", "Johnson", "Brown", "Taylor", "Miller", "Wilson", "Anderson", "Thomas",
+              "Martin", "Walker", "Novak", "Horvat", "Nowak", "Kowalski", "Fischer", "Weber")
+OPERATOR_CODES = ("050", "063", "066", "067", "068", "073", "093", "095", "097", "099")
+
+# Most contacts have one or two phones, a few have none or up to five
+PHONE_COUNTS = (0, 1, 2, 3, 4, 5)
+PHONE_WEIGHTS = (10, 45, 25, 12, 5, 3)
+BIRTHDAY_SHARE = 0.7
+FIRST_BIRTHDAY = datetime.date(1940, 1, 1).toordinal()
+LAST_BIRTHDAY = datetime.date(2010, 12, 31).toordinal()
+
+def generate_records(count, seed=0):
+    """
+    Generates the records of a synthetic address book
+
+    Names are drawn from common first and last names, repeated names get a
+    number, so every name is unique. The same seed gives the same records.
+
+    Arguments:
+    count -- the number of records
+    seed -- the seed of the random generator
+
+    Returns:
+    generator -- the records
+
+    Raises:
+    None
+    """
+    rng = random.Random(seed)
+    repeats = {}
+    for _ in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        repeat = repeats[name] = repeats.get(name, 0) + 1
+        record = Record(f"{name} {repeat}" if repeat > 1 else name)
+
+        phones = set()
+        for _ in range(rng.choices(PHONE_COUNTS, PHONE_WEIGHTS)[0]):
+            phone = f"{rng.choice(OPERATOR_CODES)}{rng.randrange(10 ** 7):07d}"
+            if phone not in phones:
+                phones.add(phone)
+                record.add_phone(phone)
+
+        if rng.random() < BIRTHDAY_SHARE:
+            birthday = datetime.date.fromordinal(rng.randint(FIRST_BIRTHDAY, LAST_BIRTHDAY))
+            record.add_birthday(f"{birthday:%d.%m.%Y}")
+        yield record
+
+def sample_names(names, count, seed=0):
+    """
+    Picks some of the names of a book
+
+    Arguments:
+    names -- the names to pick from, in a sequence
+    count -- the number of names to pick, at most all of them
+    seed -- the seed of the random generator
+
+    Returns:
+    list -- the names
+
+    Raises:
+    None
+    """
+    return random.Random(seed).sample(names, min(count, len(names)))
+
+def swap_letters(names, seed=0):
+    """
+    Misspells names by swapping two neighbouring letters of each
+
+    Arguments:
+    names -- the names to misspell
+    seed -- the seed of the random generator
+
+    Returns:
+    list -- the misspelled names, in the same order
+
+    Raises:
+    None
+    """
+    generator = random.Random(seed)
+    misspelled = []
+    for name in names:
+        i = generator.randrange(len(name) - 1)
+        misspelled.append(name[:i] + name[i + 1] + name[i] + name[i + 2:])
+    return misspelled
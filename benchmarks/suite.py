@@ -0,0 +1,379 @@
+"""
+The benchmarks of the address book and the runner measuring them
+"""
+
+import datetime
+import gc
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from assistant_bot import settings
+from assistant_bot.address_book.indexes.BirthdayColumns import HAS_NUMPY
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import show_all as show_all_command
+from assistant_bot.decorators import ErrorMessage
+from benchmarks.generator import generate_records, sample_names, swap_letters
+
+# The birthdays query looks at a fixed window, so its result does not depend on the day of the run
+BIRTHDAYS_TODAY = datetime.date(2024, 6, 3)
+BIRTHDAYS_DAYS = 7
+BIRTHDAYS_QUERIES = 10
+
+# Typo-tolerant searches are slower than lookups, fewer of the sampled names are misspelled
+SIMILAR_QUERIES = 100
+
+class Workspace:
+    """
+    Class for the temporary data directory of a benchmark run and the books made in it
+
+    Attributes:
+    directory -- the data directory, emptied before every book
+    size -- the number of records of the filled books
+    seed -- the seed of the generated records and the sampled names
+    lookups -- the number of records found or renamed
+
+    Methods:
+    __init__ -- initializes the workspace and points the storage settings to it
+    empty_book -- returns a loaded book with no records
+    filled_book -- returns a loaded book with the generated records
+    sample -- returns names of a book to find or rename
+    """
+    def __init__(self, directory, size, storage="pickle", journal=False, seed=0, lookups=10000):
+        self.directory = directory
+        self.size = size
+        self.seed = seed
+        self.lookups = lookups
+        settings.STORAGE = storage
+        settings.JOURNAL_ENABLED = journal
+        settings.STORAGE_SHARED = False
+        settings.PICKLE_PATH = os.path.join(directory, "book.pickle")
+        settings.BINARY_PATH = os.path.join(directory, "book.bin")
+        settings.SQLITE_PATH = os.path.join(directory, "book.sqlite3")
+        settings.SHARDED_PATH = os.path.join(directory, "shards")
+
+    def empty_book(self):
+        """
+        Returns a loaded book with no records, removing the files of the previous books
+
+        Arguments:
+        None
+
+        Returns:
+        AddressBook -- the book
+
+        Raises:
+        None
+        """
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        book = AddressBook()
+        book.load()
+        return book
+
+    def filled_book(self, indexed=False):
+        """
+        Returns a loaded book with the generated records, not saved yet
+
+        Arguments:
+        indexed -- whether to build the indexes, as the queries of a running bot do
+
+        Returns:
+        AddressBook -- the book
+
+        Raises:
+        None
+        """
+        book = self.empty_book()
+        book.add_records(generate_records(self.size, self.seed))
+        if indexed:
+            for index in book.indexes:
+                index.ensure(book)
+        return book
+
+    def sample(self, book):
+        """
+        Returns names of a book to find or rename
+
+        Arguments:
+        book -- the book
+
+        Returns:
+        list -- the names
+
+        Raises:
+        None
+        """
+        return sample_names(list(book.data), self.lookups, self.seed)
+
+def discard(book):
+    """
+    Closes the storage of a book without saving it
+
+    Arguments:
+    book -- the book
+
+    Returns:
+    None
+
+    Raises:
+    None
+    """
+    book.backend.close()
+
+@contextmanager
+def add_record(workspace):
+    """
+    Adds the generated records one by one to an empty book
+    """
+    book = workspace.empty_book()
+    records = list(generate_records(workspace.size, workspace.seed))
+
+    def run():
+        for record in records:
+            book.add_record(record)
+    try:
+        yield len(records), run
+    finally:
+        discard(book)
+
+@contextmanager
+def find_record(workspace):
+    """
+    Finds sampled records by name
+    """
+    book = workspace.filled_book()
+    names = workspace.sample(book)
+
+    def run():
+        for name in names:
+            book.find_record(name)
+    try:
+        yield len(names), run
+    finally:
+        discard(book)
+
+@contextmanager
+def find_similar(workspace):
+    """
+    Searches sampled names with two neighbouring letters swapped
+    """
+    book = workspace.filled_book(indexed=True)
+    queries = swap_letters(workspace.sample(book)[:SIMILAR_QUERIES], workspace.seed)
+
+    def run():
+        for query in queries:
+            book.find_similar(query)
+    try:
+        yield len(queries), run
+    finally:
+        discard(book)
+
+@contextmanager
+def edit_record(workspace):
+    """
+    Renames sampled records, keeping the built indexes up to date
+    """
+    book = workspace.filled_book(indexed=True)
+    names = workspace.sample(book)
+
+    def run():
+        for name in names:
+            book.edit_record(name, f"{name} Renamed")
+    try:
+        yield len(names), run
+    finally:
+        discard(book)
+
+@contextmanager
+def birthdays(workspace):
+    """
+    Queries the upcoming birthdays of a week
+    """
+    book = workspace.filled_book(indexed=True)
+
+    def run():
+        for _ in range(BIRTHDAYS_QUERIES):
+            book.upcoming_birthdays(BIRTHDAYS_DAYS, BIRTHDAYS_TODAY)
+    try:
+        yield BIRTHDAYS_QUERIES, run
+    finally:
+        discard(book)
+
+@contextmanager
+def show_all(workspace):
+    """
+    Renders the whole book as a single page of the all command
+    """
+    book = workspace.filled_book(indexed=True)
+
+    def run():
+        result = show_all_command(["--limit", str(workspace.size)], book, {})
+        if isinstance(result, ErrorMessage):
+            raise RuntimeError(result)
+    try:
+        yield workspace.size, run
+    finally:
+        discard(book)
+
+@contextmanager
+def dump(workspace):
+    """
+    Saves a book of unsaved records, waiting for the snapshot to be written
+    """
+    book = workspace.filled_book()
+
+    def run():
+        book.dump()
+        book.backend.flush()
+    try:
+        yield workspace.size, run
+    finally:
+        discard(book)
+
+@contextmanager
+def load(workspace):
+    """
+    Loads a saved book
+    """
+    book = workspace.filled_book()
+    book.close()
+    loaded = []
+
+    def run():
+        book = AddressBook()
+        book.load()
+        loaded.append(book)
+    try:
+        yield workspace.size, run
+    finally:
+        for book in loaded:
+            discard(book)
+
+# The benchmarks by name, in the order they run
+BENCHMARKS = {benchmark.__name__: benchmark
+              for benchmark in (add_record, find_record, find_similar, edit_record, birthdays,
+                                show_all, dump, load)}
+
+def measure(benchmark, workspace, repeat=3, memory=True):
+    """
+    Measures a benchmark: the best wall time of some runs and the peak memory of one more
+
+    Every run starts from a new book. The memory is measured in a run of
+    its own, since tracing the allocations slows the code down.
+
+    Arguments:
+    benchmark -- the benchmark
+    workspace -- the workspace to run it in
+    repeat -- the number of timed runs
+    memory -- whether to measure the peak memory
+
+    Returns:
+    dict -- the result of the benchmark
+
+    Raises:
+    None
+    """
+    runs = []
+    for _ in range(repeat):
+        with benchmark(workspace) as (ops, run):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            runs.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        with benchmark(workspace) as (ops, run):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                run()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    best = min(runs)
+    return {
+        "benchmark": benchmark.__name__,
+        "size": workspace.size,
+        "ops": ops,
+        "seconds": best,
+        "runs": runs,
+        "per_op_us": best / ops * 1e6 if ops else None,
+        "peak_bytes": peak,
+    }
+
+def run_suite(sizes, names=None, storage="pickle", journal=False, seed=0, repeat=3,
+              lookups=10000, memory=True, progress=None):
+    """
+    Runs the benchmarks on books of every size
+
+    Arguments:
+    sizes -- the numbers of records of the books
+    names -- the names of the benchmarks to run, all of them by default
+    storage -- the storage backend: "pickle", "binary", "sqlite" or "sharded"
+    journal -- whether to keep the journal, otherwise every save writes a snapshot
+    seed -- the seed of the generated records
+    repeat -- the number of timed runs of each benchmark
+    lookups -- the number of records found or renamed
+    memory -- whether to measure the peak memory
+    progress -- called with each result as soon as it is measured
+
+    Returns:
+    dict -- the conditions of the run under "meta" and the results under "results"
+
+    Raises:
+    KeyError -- if a benchmark is unknown
+    """
+    benchmarks = [BENCHMARKS[name] for name in names] if names else list(BENCHMARKS.values())
+    meta = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "numpy": HAS_NUMPY,
+        "storage": storage,
+        "journal": journal,
+        "seed": seed,
+        "repeat": repeat,
+        "lookups": lookups,
+    }
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="assistant-bot-bench-") as directory:
+            workspace = Workspace(directory, size, storage, journal, seed, lookups)
+            for benchmark in benchmarks:
+                result = measure(benchmark, workspace, repeat, memory)
+                results.append(result)
+                if progress:
+                    progress(result)
+    return {"meta": meta, "results": results}
+
+def format_result(result):
+    """
+    Returns a result as a readable line
+
+    Arguments:
+    result -- the result of a benchmark
+
+    Returns:
+    str -- the line
+
+    Raises:
+    None
+    """
+    line = (f"{result['benchmark']:<12} {result['size']:>10,} records: "
+            f"{result['seconds'] * 1000:>10.2f} ms")
+    if result["per_op_us"] is not None:
+        line += f", {result['per_op_us']:.2f} us/op"
+    if result["peak_bytes"] is not None:
+        line += f", peak {result['peak_bytes'] / 2 ** 20:.1f} MiB"
+    return line
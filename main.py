@@ -1,14 +1,15 @@
 """
 Entry point for the assistant bot.
 """
+import sys
 from assistant_bot.main import main
 
 def run_bot():
     """
     Run the assistant bot.
     """
-    print("Starting the assistant bot v0.2...")
-    main()
+    print("Starting the assistant bot v0.2...", file=sys.stderr)
+    sys.exit(main())
 
 if __name__ == "__main__":
     run_bot()
@@ -0,0 +1,27 @@
+"""
+Fixtures shared by the tests of the assistant bot
+"""
+
+import pytest
+from assistant_bot import settings
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Points the storage settings to a temporary directory
+
+    Arguments:
+    tmp_path -- the temporary directory of the test
+    monkeypatch -- the pytest monkeypatch fixture
+
+    Returns:
+    Path -- the directory of the storage files
+    """
+    monkeypatch.setattr(settings, "PICKLE_PATH", str(tmp_path / "book.pickle"))
+    monkeypatch.setattr(settings, "BINARY_PATH", str(tmp_path / "book.bin"))
+    monkeypatch.setattr(settings, "SQLITE_PATH", str(tmp_path / "book.sqlite3"))
+    monkeypatch.setattr(settings, "SHARDED_PATH", str(tmp_path / "shards"))
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(settings, "METRICS_FILE", "")
+    monkeypatch.setattr(settings, "STORAGE_POLL_INTERVAL", 0.05)
+    return tmp_path
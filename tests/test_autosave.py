@@ -0,0 +1,76 @@
+"""
+Tests of the mutation-driven autosave
+"""
+
+import time
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage.Storage import Storage
+from assistant_bot.helpers.autosave import Autosave
+
+class CountingStorage(Storage):
+    """
+    Storage backend counting the saves, for the autosave decisions
+
+    Attributes:
+    saves -- the number of saves
+    """
+    def __init__(self):
+        self.saves = 0
+
+    def save(self, book):
+        self.saves += 1
+        return True
+
+def make_book(mutations):
+    """
+    Creates an address book with some unsaved mutations
+
+    Arguments:
+    mutations -- the number of records to add
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook(backend=CountingStorage())
+    for i in range(mutations):
+        book.add_record(Record(f"Name{i}"))
+    return book
+
+def test_clean_book_is_not_saved():
+    autosave = Autosave(AddressBook(backend=CountingStorage()))
+
+    assert not autosave.check()
+    assert autosave.stats["skipped_clean"] == 1
+
+def test_recent_changes_wait():
+    book = make_book(1)
+    autosave = Autosave(book, max_mutations=10, max_delay=60, idle=5)
+
+    assert autosave.decide(time.monotonic()) == "waiting"
+
+def test_thresholds_trigger_a_save():
+    book = make_book(3)
+    now = time.monotonic()
+
+    assert Autosave(book, max_mutations=3).decide(now) == "mutations"
+    assert Autosave(book, max_mutations=10, max_delay=60, idle=5).decide(now + 6) == "idle"
+    assert Autosave(book, max_mutations=10, max_delay=1, idle=5).decide(now + 2) == "delay"
+
+def test_save_marks_the_book_clean():
+    book = make_book(5)
+    autosave = Autosave(book, max_mutations=5)
+
+    assert autosave.check()
+    assert book.backend.saves == 1
+    assert not book.dirty
+    assert book.first_unsaved_at is None
+    assert autosave.stats["saved_mutations"] == 1
+
+def test_failed_save_keeps_the_book_dirty():
+    book = make_book(5)
+    book.backend.save = lambda book: False
+
+    Autosave(book, max_mutations=5).check()
+
+    assert book.unsaved == 5
@@ -0,0 +1,73 @@
+"""
+Tests of loading the address book in the background
+"""
+
+import threading
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.repositories.LoadProgress import LoadProgress
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+from assistant_bot.address_book.storage.Storage import Storage
+
+class SlowStorage(Storage):
+    """
+    Storage backend publishing a first record, then loading the rest once released
+
+    Attributes:
+    release -- the event the load waits for after publishing the first record
+    """
+    def __init__(self):
+        self.release = threading.Event()
+
+    def load(self, book):
+        first = Record("John")
+        book.publishing.publish([first], book)
+        self.release.wait(10)
+        return {"John": first, "Jane": Record("Jane")}
+
+def test_published_record_is_found_while_loading():
+    book = AddressBook(backend=SlowStorage())
+    book.load(background=True)
+
+    assert book.publishing is book.loading
+    assert book.find_record("John").name.value == "John"
+    assert book.loading.count == 1 and not book.loading.done
+
+    counted = []
+    counter = threading.Thread(target=lambda: counted.append(len(book.search(""))))
+    counter.start()
+    counter.join(0.1)
+    assert not counted
+
+    book.backend.release.set()
+    counter.join()
+    assert counted == [2]
+    assert book.loading.done and book.publishing is None
+    assert book.find_record("Jane").name.value == "Jane"
+
+def test_records_changed_by_the_journal_are_held_back():
+    progress = LoadProgress(background=True)
+    progress.hold([{"op": "add_phone", "args": ["John", "0501234567"]},
+                   {"op": "edit_record", "args": ["Jane", "Janet"]}])
+
+    progress.publish([Record("John"), Record("Jane"), Record("Carl")], AddressBook())
+
+    assert sorted(progress.records) == ["Carl"]
+    assert progress.count == 3
+    progress.finish()
+    assert progress.wait_record("John") is None and not progress.records
+
+def test_file_storage_loads_in_the_background(tmp_path):
+    book = AddressBook(backend=FileStorage(str(tmp_path / "book.pickle")))
+    book.load()
+    book.add_records(Record(f"Name{i:04d}") for i in range(3000))
+    book.find_record("Name0001").add_phone("0501234567")
+    book.close()
+
+    book = AddressBook(backend=FileStorage(str(tmp_path / "book.pickle")))
+    book.load(background=True)
+
+    assert [phone.value for phone in book.find_record("Name0001").phones] == ["0501234567"]
+    assert book.find_record("Name2999").name.value == "Name2999"
+    book.close()
+    assert len(book) == 3000
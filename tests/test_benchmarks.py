@@ -0,0 +1,76 @@
+"""
+Tests of the benchmark suite and its synthetic address books
+"""
+
+import argparse
+import json
+import pytest
+from benchmarks.__main__ import main, parse_size
+from benchmarks.compare import compare, mismatches
+from benchmarks.generator import generate_records, swap_letters
+from benchmarks.suite import BENCHMARKS, run_suite
+
+def result(benchmark, seconds, peak_bytes):
+    """
+    Returns a benchmark result with only the compared fields
+
+    Arguments:
+    benchmark -- the name of the benchmark
+    seconds -- the best time
+    peak_bytes -- the peak memory, or None if it was not measured
+
+    Returns:
+    dict -- the result
+    """
+    return {"benchmark": benchmark, "size": 1000, "seconds": seconds, "peak_bytes": peak_bytes}
+
+def test_generated_books_are_reproducible():
+    first = [str(record) for record in generate_records(500, seed=1)]
+
+    assert first == [str(record) for record in generate_records(500, seed=1)]
+    assert first != [str(record) for record in generate_records(500, seed=2)]
+    assert len({line.split(",")[0] for line in first}) == 500
+
+def test_swapped_letters():
+    misspelled = swap_letters(["Olena", "Ab"], seed=3)
+
+    assert sorted(misspelled[0]) == sorted("Olena") and misspelled[0] != "Olena"
+    assert misspelled[1] == "bA"
+
+def test_regressions_over_the_threshold():
+    baseline = {"results": [result("dump", 1.0, 1000), result("load", 1.0, None)]}
+    current = {"results": [result("dump", 1.05, 1200), result("load", 2.0, 10),
+                           result("find_record", 1.0, 10)]}
+
+    rows = compare(baseline, current, threshold=0.1)
+
+    assert [(row["benchmark"], row["metric"], row["regression"]) for row in rows] == [
+        ("dump", "seconds", False), ("dump", "peak_bytes", True), ("load", "seconds", True)]
+    assert mismatches({"meta": {"seed": 0}}, {"meta": {"seed": 1}}) == ["seed"]
+
+def test_sizes():
+    assert [parse_size(size) for size in ("2500", "10k", "1M")] == [2500, 10000, 1000000]
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size("0")
+
+@pytest.mark.parametrize("storage", ["pickle", "binary", "sqlite", "sharded"])
+def test_every_benchmark_runs_on_every_storage(storage):
+    results = run_suite([50], storage=storage, repeat=1, lookups=10, memory=False)
+
+    assert results["meta"]["storage"] == storage
+    assert [row["benchmark"] for row in results["results"]] == list(BENCHMARKS)
+    assert all(row["seconds"] > 0 and row["peak_bytes"] is None for row in results["results"])
+
+def test_command_line_compares_with_a_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    arguments = ["--sizes", "50", "--benchmarks", "find_record", "--repeat", "1",
+                 "--lookups", "10", "--no-memory"]
+
+    assert main(arguments + ["--output", str(baseline)]) == 0
+    results = json.loads(baseline.read_text(encoding="utf-8"))
+    results["results"][0]["seconds"] /= 100
+    baseline.write_text(json.dumps(results), encoding="utf-8")
+
+    assert main(arguments + ["--output", str(tmp_path / "current.json"),
+                             "--compare", str(baseline)]) == 1
+    assert "1 regressions over 10%" in capsys.readouterr().err
@@ -0,0 +1,92 @@
+"""
+Tests of the memory-mapped binary snapshot format
+"""
+
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage.BinarySnapshot import BinaryRecordMap
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+
+def open_book(path, **options):
+    """
+    Loads an address book from a FileStorage writing binary snapshots
+
+    Arguments:
+    path -- the path of the snapshot file
+    options -- the options of the FileStorage
+
+    Returns:
+    AddressBook -- the loaded address book
+    """
+    book = AddressBook(backend=FileStorage(str(path), snapshot_format="binary", **options))
+    book.load()
+    return book
+
+def fill(book, count):
+    """
+    Adds records with a phone number and every other one with a birthday
+
+    Arguments:
+    book -- the address book
+    count -- the number of records
+
+    Returns:
+    None
+    """
+    records = []
+    for i in range(count):
+        record = Record(f"Name{i:03d}")
+        record.add_phone(f"050{i:07d}")
+        if i % 2:
+            record.add_birthday(f"{i % 28 + 1:02d}.01.1990")
+        records.append(record)
+    book.add_records(records)
+
+def test_round_trip_materializes_records_lazily(tmp_path):
+    book = open_book(tmp_path / "book.bin", journal=False)
+    fill(book, 50)
+    book.close()
+
+    book = open_book(tmp_path / "book.bin", journal=False)
+    assert isinstance(book.data, BinaryRecordMap)
+    assert len(book) == 50
+    assert not book.data.cache
+
+    record = book.find_record("Name007")
+    assert str(record) == "Contact name: Name007, phones: 0500000007, birthday: 08.01.1990"
+    assert list(book.data.cache) == ["Name007"]
+    assert book.find_record("Name007") is record
+    book.close()
+
+def test_changes_over_the_snapshot_are_saved(tmp_path):
+    book = open_book(tmp_path / "book.bin", journal=False)
+    fill(book, 10)
+    book.close()
+
+    book = open_book(tmp_path / "book.bin", journal=False)
+    book.find_record("Name001").add_phone("0509999999")
+    book.remove_record("Name002")
+    book.edit_record("Name003", "Other")
+    book.add_record(Record("Added"))
+    assert sorted(record.name.value for record in book.records())[:2] == ["Added", "Name000"]
+    book.close()
+
+    book = open_book(tmp_path / "book.bin", journal=False)
+    assert len(book) == 10
+    assert "Name002" not in book and "Name003" not in book
+    assert "Other" in book and "Added" in book
+    assert [phone.value for phone in book["Name001"].phones] == ["0500000001", "0509999999"]
+    book.close()
+
+def test_journal_is_replayed_over_a_binary_snapshot(tmp_path):
+    book = open_book(tmp_path / "book.bin", compact_bytes=1)
+    fill(book, 10)
+    book.dump()
+    book.backend.flush()
+    book.find_record("Name004").add_birthday("01.05.1990")
+    # The process dies here, the change is in the journal only
+
+    replayed = open_book(tmp_path / "book.bin", compact_bytes=1 << 20)
+    assert str(replayed["Name004"].birthday) == "01.05.1990"
+    replayed.close()
+    book.close()
@@ -0,0 +1,93 @@
+"""
+Tests of the columnar birthday report
+"""
+
+import collections
+import datetime
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import birthday_report
+
+pytest.importorskip("numpy")
+
+def make_book(count):
+    """
+    Creates an address book where most records have a birthday, one on February 29
+
+    Arguments:
+    count -- the number of records
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    records = []
+    for i in range(count):
+        record = Record(f"Name{i:04d}")
+        if i % 5:
+            record.add_birthday(f"{i * 7 % 28 + 1:02d}.{i % 12 + 1:02d}.{1950 + i * 3 % 60}")
+        records.append(record)
+    leap = Record("Leap")
+    leap.add_birthday("29.02.1992")
+    records.append(leap)
+    book.add_records(records)
+    return book
+
+def expected_report(book, today, days):
+    """
+    Computes the birthday report one record at a time
+
+    Arguments:
+    book -- the address book
+    today -- the first day of the window
+    days -- the length of the window in days
+
+    Returns:
+    dict -- the report, like BirthdayColumns.report
+    """
+    born = [record.birthday.value for record in book.records() if record.birthday]
+    months = collections.Counter(birthday.month for birthday in born)
+    decades = collections.Counter(birthday.year // 10 * 10 for birthday in born)
+    weeks = [0] * (days // 7 + 1)
+    weekdays = [0] * 5
+    for _, date in book.upcoming_birthdays(days, today):
+        weeks[(date - today).days // 7] += 1
+        weekdays[date.weekday() if date.weekday() < 5 else 0] += 1
+    return {
+        "count": len(born),
+        "months": [months[month] for month in range(1, 13)],
+        "decades": dict(sorted(decades.items())),
+        "weeks": weeks,
+        "weekdays": weekdays,
+    }
+
+@pytest.mark.parametrize("today", [datetime.date(2023, 2, 20), datetime.date(2024, 12, 1)])
+@pytest.mark.parametrize("days", [0, 30, 365])
+def test_report_matches_the_record_by_record_report(today, days):
+    book = make_book(2000)
+
+    assert book.birthday_report(days, today) == expected_report(book, today, days)
+
+def test_report_follows_the_changes():
+    book = make_book(50)
+    today = datetime.date(2024, 1, 1)
+    book.birthday_report(30, today)
+
+    book.remove_record("Name0001")
+    book.edit_record("Name0002", "Renamed")
+    book.find_record("Name0000").add_birthday("01.01.2000")
+    book.find_record("Name0003").add_birthday("02.01.2001")
+    book.add_record(Record("Added"))
+
+    assert book.birthday_report(30, today) == expected_report(book, today, 30)
+
+def test_window_out_of_range():
+    with pytest.raises(ValueError):
+        make_book(1).birthday_report(366)
+
+def test_birthday_report_command():
+    text = birthday_report(["14"], make_book(10))
+
+    assert text.startswith("Contacts with a birthday: 9\nPer birth month: Jan ")
+    assert text.count(" - ") == 3
@@ -0,0 +1,81 @@
+"""
+Tests of the day-of-year birthday index and the birthdays command
+"""
+
+import datetime
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import birthdays
+from assistant_bot.decorators import ErrorMessage
+
+def make_book(birthdays_by_name):
+    """
+    Creates an address book with birthdays
+
+    Arguments:
+    birthdays_by_name -- the birthday of each name
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    for name, birthday in birthdays_by_name.items():
+        record = Record(name)
+        record.add_birthday(birthday)
+        book.add_record(record)
+    return book
+
+def upcoming(book, days, today):
+    """
+    Returns the upcoming birthdays as names and dates
+
+    Arguments:
+    book -- the address book
+    days -- the length of the window in days
+    today -- the first day of the window
+
+    Returns:
+    list -- the (name, occurrence date) pairs
+    """
+    return [(record.name.value, date) for record, date in book.upcoming_birthdays(days, today)]
+
+def test_window_is_in_date_order_and_wraps_the_year():
+    book = make_book({"John": "02.01.1990", "Jane": "30.12.1985", "Carl": "15.06.1970"})
+
+    assert upcoming(book, 7, datetime.date(2023, 12, 28)) == [
+        ("Jane", datetime.date(2023, 12, 30)),
+        ("John", datetime.date(2024, 1, 2)),
+    ]
+    assert upcoming(book, 0, datetime.date(2023, 6, 15)) == [("Carl", datetime.date(2023, 6, 15))]
+
+def test_february_29_is_celebrated_on_march_1_in_non_leap_years():
+    book = make_book({"Leap": "29.02.1992"})
+
+    assert upcoming(book, 3, datetime.date(2023, 2, 27)) == [("Leap", datetime.date(2023, 3, 1))]
+    assert upcoming(book, 3, datetime.date(2024, 2, 27)) == [("Leap", datetime.date(2024, 2, 29))]
+
+def test_index_follows_the_changes():
+    book = make_book({"John": "02.01.1990", "Jane": "05.01.1985"})
+    today = datetime.date(2024, 1, 1)
+    upcoming(book, 7, today)
+
+    book.find_record("John").add_birthday("20.01.1990")
+    book.edit_record("Jane", "Janet")
+    book.remove_record("Janet")
+    book.add_record(Record("Carl"))
+
+    assert upcoming(book, 7, today) == []
+    assert upcoming(book, 30, today) == [("John", datetime.date(2024, 1, 20))]
+
+def test_window_out_of_range():
+    with pytest.raises(ValueError):
+        AddressBook().upcoming_birthdays(366)
+
+def test_birthdays_command():
+    book = make_book({"John": datetime.date.today().strftime("%d.%m.1992")})
+
+    assert "John" in birthdays([], book)
+    assert birthdays([], AddressBook()) == "No upcoming birthdays."
+    assert isinstance(birthdays(["soon"], book), ErrorMessage)
+    assert isinstance(birthdays(["400"], book), ErrorMessage)
@@ -0,0 +1,102 @@
+"""
+Tests of the compressed, streaming snapshot format
+"""
+
+import io
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+from assistant_bot.address_book.storage.ShardedStorage import ShardedStorage
+from assistant_bot.address_book.storage.Snapshot import CODECS, SnapshotView, read_snapshot, \
+                                                        write_snapshot
+from assistant_bot.helpers.metrics import METRICS
+
+def make_records(count):
+    """
+    Creates records with a phone number and a birthday
+
+    Arguments:
+    count -- the number of records
+
+    Returns:
+    dict -- the records by name
+    """
+    records = {}
+    for i in range(count):
+        record = Record(f"Name{i:05d}")
+        record.add_phone(f"050{i:07d}")
+        record.add_birthday(f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.1990")
+        records[record.name.value] = record
+    return records
+
+def write(records, compression, stats=None):
+    """
+    Writes a snapshot stream of records into memory
+
+    Arguments:
+    records -- the records by name
+    compression -- the compressor, or None
+    stats -- the dictionary receiving the statistics of the compression, or None
+
+    Returns:
+    io.BytesIO -- the stream, at its start
+    """
+    stream = io.BytesIO()
+    write_snapshot(stream, SnapshotView(records), 3, compression, stats=stats)
+    stream.seek(0)
+    return stream
+
+@pytest.mark.parametrize("compression", list(CODECS))
+def test_compressed_stream_round_trip(compression):
+    records = make_records(3000)
+    stats = {}
+    stream = write(records, compression, stats)
+
+    batches = []
+    data, journal_seq = read_snapshot(stream, publish=batches.append)
+
+    assert journal_seq == 3
+    assert [str(record) for record in data.values()] == [str(record) for record in records.values()]
+    assert len(batches) > 1
+    assert stats["raw_bytes"] > stats["written_bytes"]
+    assert stats["written_bytes"] < len(stream.getvalue())
+
+def test_uncompressed_stream_is_still_read():
+    data, _ = read_snapshot(write(make_records(10), None))
+
+    assert sorted(data) == sorted(make_records(10))
+
+def test_truncated_and_unknown_streams():
+    stream = write(make_records(2000), "zlib")
+    with pytest.raises(ValueError, match="Truncated"):
+        read_snapshot(io.BytesIO(stream.getvalue()[:-100]))
+    with pytest.raises(ValueError):
+        write_snapshot(io.BytesIO(), SnapshotView({}), 0, "zstd")
+
+def test_file_storage_writes_compressed_snapshots(tmp_path):
+    path = str(tmp_path / "book.pickle")
+    book = AddressBook(backend=FileStorage(path, journal=False, compression="lzma",
+                                           compression_level=1))
+    book.load()
+    book.add_records(make_records(500).values())
+    book.close()
+
+    assert METRICS.gauges["snapshot_compression_ratio"] > 1
+    book = AddressBook(backend=FileStorage(path, journal=False))
+    book.load()
+    assert str(book["Name00042"]) == str(make_records(43)["Name00042"])
+    book.close()
+
+def test_sharded_storage_writes_compressed_shards(tmp_path):
+    book = AddressBook(backend=ShardedStorage(str(tmp_path / "shards"), shards=4,
+                                              compression="bz2"))
+    book.load()
+    book.add_records(make_records(500).values())
+    book.close()
+
+    book = AddressBook(backend=ShardedStorage(str(tmp_path / "shards"), shards=4))
+    book.load()
+    assert len(book) == 500
+    assert str(book["Name00499"]) == str(make_records(500)["Name00499"])
+    book.close()
@@ -0,0 +1,68 @@
+"""
+Tests of the streaming export to CSV and JSONL files
+"""
+
+import json
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import export_contacts
+from assistant_bot.decorators import ErrorMessage
+from assistant_bot.helpers.exporter import export_file
+from assistant_bot.helpers.importer import import_file
+
+def make_book():
+    """
+    Creates an address book with a record with several phones and a birthday
+
+    Arguments:
+    None
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    record = Record("John")
+    record.add_phone("0501234567")
+    record.add_phone("0500000000")
+    record.add_birthday("15.03.1990")
+    book.add_record(record)
+    book.add_record(Record("Jane, Jr."))
+    return book
+
+@pytest.mark.parametrize("name", ["contacts.csv", "contacts.jsonl"])
+def test_export_is_read_back_by_the_importer(tmp_path, name):
+    book = make_book()
+    path = str(tmp_path / name)
+
+    assert export_file(path, book, chunk_size=1) == 2
+
+    imported = AddressBook()
+    assert import_file(path, imported) == (2, [])
+    assert sorted(str(record) for record in imported.records()) == \
+           sorted(str(record) for record in book.records())
+
+def test_format_defaults_to_the_extension_or_csv(tmp_path):
+    book = make_book()
+
+    export_file(str(tmp_path / "contacts.jsonl"), book)
+    export_file(str(tmp_path / "contacts"), book)
+
+    lines = (tmp_path / "contacts.jsonl").read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[1]) == {"name": "John", "phones": ["0501234567", "0500000000"],
+                                    "birthday": "15.03.1990"}
+    assert (tmp_path / "contacts").read_text(encoding="utf-8").startswith("name,phones,birthday\n")
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_file(str(tmp_path / "contacts.csv"), make_book(), "xml")
+    assert not (tmp_path / "contacts.csv").exists()
+
+def test_export_command(tmp_path):
+    path = str(tmp_path / "contacts.txt")
+
+    assert export_contacts([path, "--format", "jsonl"], make_book()) == \
+           f"Exported 2 contacts to {path}."
+    assert (tmp_path / "contacts.txt").read_text(encoding="utf-8").startswith('{"name": "Jane')
+    assert isinstance(export_contacts([path, "--format"], make_book()), ErrorMessage)
+    assert isinstance(export_contacts([], make_book()), ErrorMessage)
@@ -0,0 +1,102 @@
+"""
+Tests of the advisory file lock, between threads and between processes
+"""
+
+import multiprocessing
+import threading
+import time
+import pytest
+from assistant_bot.address_book.storage.FileLock import FileLock, fcntl
+
+def hold_exclusive(path, locked, release):
+    """
+    Process: holds the lock alone until told to release it
+
+    Arguments:
+    path -- the path of the lock file
+    locked -- the event set once the lock is held
+    release -- the event waited for before releasing the lock
+
+    Returns:
+    None
+    """
+    with FileLock(path).exclusive():
+        locked.set()
+        release.wait(10)
+
+def test_threads_share_the_lock(tmp_path):
+    lock = FileLock(str(tmp_path / "lock"))
+    inside = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.shared():
+            inside.wait()
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not inside.broken
+
+def test_exclusive_waits_for_the_shared_holders(tmp_path):
+    lock = FileLock(str(tmp_path / "lock"))
+    order = []
+    shared = threading.Event()
+
+    def write():
+        shared.wait()
+        with lock.exclusive():
+            order.append("exclusive")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with lock.shared():
+        shared.set()
+        time.sleep(0.1)
+        order.append("shared")
+    writer.join()
+
+    assert order == ["shared", "exclusive"]
+
+def test_modes_nest_except_an_upgrade(tmp_path):
+    lock = FileLock(str(tmp_path / "lock"))
+
+    with lock.exclusive():
+        with lock.shared(), lock.exclusive():
+            pass
+    with lock.shared():
+        with lock.shared():
+            pass
+        with pytest.raises(RuntimeError):
+            with lock.exclusive():
+                pass
+    with lock.exclusive():
+        pass
+    lock.close()
+
+@pytest.mark.skipif(fcntl is None, reason="advisory locks are POSIX only")
+def test_other_process_holding_the_lock_blocks_shared(tmp_path):
+    path = str(tmp_path / "lock")
+    context = multiprocessing.get_context("spawn")
+    locked, release = context.Event(), context.Event()
+    process = context.Process(target=hold_exclusive, args=(path, locked, release))
+    process.start()
+    try:
+        assert locked.wait(30)
+        acquired = threading.Event()
+
+        def read():
+            with FileLock(path).shared():
+                acquired.set()
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        assert not acquired.wait(0.3)
+        release.set()
+        assert acquired.wait(10)
+        reader.join()
+    finally:
+        release.set()
+        process.join(10)
@@ -0,0 +1,123 @@
+"""
+Tests of the snapshot and journal storage backend
+"""
+
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage import FileStorage as file_storage
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+
+def open_book(path, **options):
+    """
+    Loads an address book from a FileStorage
+
+    Arguments:
+    path -- the path of the snapshot file
+    options -- the options of the FileStorage
+
+    Returns:
+    AddressBook -- the loaded address book
+    """
+    book = AddressBook(backend=FileStorage(str(path), **options))
+    book.load()
+    return book
+
+def add(book, name, phone):
+    """
+    Adds a record with a phone number to an address book
+
+    Arguments:
+    book -- the address book
+    name -- the name of the record
+    phone -- the phone number
+
+    Returns:
+    None
+    """
+    record = Record(name)
+    record.add_phone(phone)
+    book.add_record(record)
+
+def test_snapshot_round_trip_without_journal(tmp_path):
+    book = open_book(tmp_path / "book.pickle", journal=False)
+    add(book, "John", "0501234567")
+    book.close()
+
+    book = open_book(tmp_path / "book.pickle", journal=False)
+    assert book["John"].phones[0].value == "0501234567"
+    book.close()
+
+def test_failed_snapshot_keeps_changes_unsaved(tmp_path, monkeypatch):
+    book = open_book(tmp_path / "book.pickle", journal=False)
+    add(book, "John", "0501234567")
+
+    def fail(path, write):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_storage, "atomic_write", fail)
+    book.dump()
+    assert book.dirty
+
+    monkeypatch.undo()
+    book.dump()
+    assert not book.dirty
+    book.close()
+    assert "John" in open_book(tmp_path / "book.pickle", journal=False)
+
+def segments(path):
+    """
+    Returns the journal segment files next to a snapshot file
+
+    Arguments:
+    path -- the path of the snapshot file
+
+    Returns:
+    list -- the names of the segments, sorted
+    """
+    return sorted(file.name for file in path.parent.glob("book.journal.*"))
+
+def test_journal_replays_changes_that_were_never_snapshotted(tmp_path):
+    book = open_book(tmp_path / "book.pickle")
+    add(book, "John", "0501234567")
+    add(book, "Jane", "0507654321")
+    book.find_record("John").add_birthday("15.03.1990")
+    book.edit_record("Jane", "Janet")
+    book.remove_record("John")
+    add(book, "John", "0500000000")
+    book.dump()
+    # The process dies here: no snapshot is written and the journal is not closed
+
+    replayed = open_book(tmp_path / "book.pickle")
+    assert sorted(replayed) == ["Janet", "John"]
+    assert replayed["John"].phones == [replayed["John"].phones[0]]
+    assert replayed["John"].phones[0].value == "0500000000"
+    assert replayed["John"].birthday is None
+    assert not replayed.dirty
+    replayed.close()
+    book.close()
+
+def test_torn_last_journal_line_is_ignored(tmp_path):
+    book = open_book(tmp_path / "book.pickle")
+    add(book, "John", "0501234567")
+    book.close()
+    with open(tmp_path / segments(tmp_path / "book.pickle")[-1], "a", encoding="utf-8") as file:
+        file.write('{"op":"remove_record","ar')
+
+    assert "John" in open_book(tmp_path / "book.pickle")
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    path = tmp_path / "book.pickle"
+    book = open_book(path, compact_bytes=256)
+    for i in range(20):
+        add(book, f"Name{i}", f"050{i:07d}")
+    assert segments(path) == ["book.journal.000001"]
+
+    book.dump()
+    book.backend.flush()
+    book.close()
+
+    assert segments(path) == ["book.journal.000002"]
+    (tmp_path / "book.journal.000002").unlink()
+    reopened = open_book(path)
+    assert len(reopened) == 20
+    reopened.close()
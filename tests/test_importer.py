@@ -0,0 +1,85 @@
+"""
+Tests of the bulk import of CSV and JSONL files
+"""
+
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import import_contacts
+from assistant_bot.decorators import ErrorMessage
+from assistant_bot.helpers.importer import import_file, validate_row
+
+def test_csv_rows_are_imported_and_errors_reported(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_text("name,phones,birthday\n"
+                    "John,0501234567;050-000-00-00,15.03.1990\n"
+                    "Jane,,\n"
+                    ",0501234567,\n"
+                    "Carl,123,\n"
+                    "Dora,0501111111,31.02.1990\n", encoding="utf-8")
+    book = AddressBook()
+
+    imported, errors = import_file(str(path), book)
+
+    assert imported == 2
+    assert [number for number, _ in errors] == [4, 5, 6]
+    assert str(book["John"]) == ("Contact name: John, phones: 0501234567; 0500000000, "
+                                 "birthday: 15.03.1990")
+    assert [record.name.value for record in book.find_by_phone("0500000000")] == ["John"]
+
+def test_jsonl_rows_are_imported_and_errors_reported(tmp_path):
+    path = tmp_path / "contacts.jsonl"
+    path.write_text('{"name": "John", "phones": ["0501234567"], "birthday": "15.03.1990"}\n'
+                    "\n"
+                    '{"name": "Jane"}\n'
+                    "[1, 2]\n"
+                    "not json\n", encoding="utf-8")
+    book = AddressBook()
+
+    imported, errors = import_file(str(path), book)
+
+    assert imported == 2
+    assert [number for number, _ in errors] == [4, 5]
+    assert str(book["John"].birthday) == "15.03.1990"
+    assert not book["Jane"].phones
+
+def test_chunks_validated_in_processes_keep_the_file_order(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_text("".join(f"Name{i:02d},050{i:07d},\n" for i in range(20)) + "Bad,1,\n",
+                    encoding="utf-8")
+    book = AddressBook()
+
+    imported, errors = import_file(str(path), book, chunk_size=3, workers=2)
+
+    assert imported == 20
+    assert errors[0][0] == 21
+    assert [record.name.value for record in book.find_by_phone("0500000013")] == ["Name13"]
+
+def test_imported_names_replace_existing_records(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_text("John,0509999999,\n", encoding="utf-8")
+    book = AddressBook()
+    record = Record("John")
+    record.add_phone("0501234567")
+    book.add_record(record)
+
+    import_file(str(path), book)
+
+    assert [phone.value for phone in book["John"].phones] == ["0509999999"]
+    assert not book.find_by_phone("0501234567")
+
+def test_invalid_rows():
+    with pytest.raises(ValueError):
+        validate_row(["John", "0501234567", "15.03.1990", "extra"])
+    with pytest.raises(ValueError):
+        validate_row('{"name": "John", "phones": "0501234567", "birthday": 1990}')
+    assert validate_row(["John"]) == ("John", [], None)
+
+def test_import_command(tmp_path):
+    path = tmp_path / "contacts.csv"
+    path.write_text("John,0501234567,\nCarl,123,\n", encoding="utf-8")
+    book = AddressBook()
+
+    assert import_contacts([str(path)], book).startswith("Imported 1 contacts.\nLine 2:")
+    assert isinstance(import_contacts([str(tmp_path / "missing.csv")], book), ErrorMessage)
+    assert isinstance(import_contacts([str(tmp_path / "contacts.txt")], book), ErrorMessage)
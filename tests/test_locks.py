@@ -0,0 +1,109 @@
+"""
+Tests of the readers-writer lock of the address book
+"""
+
+import threading
+import time
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.helpers.locks import ReadWriteLock
+
+def start(target):
+    """
+    Starts a thread
+
+    Arguments:
+    target -- the function run by the thread
+
+    Returns:
+    threading.Thread -- the started thread
+    """
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.read():
+            inside.wait()
+
+    for thread in [start(read), start(read)]:
+        thread.join()
+
+    assert not inside.broken
+    assert lock.stats["reads"] == 2
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = ReadWriteLock()
+    order = []
+
+    def write():
+        with lock.write():
+            order.append("write")
+
+    def read():
+        with lock.read():
+            order.append("read")
+
+    with lock.read():
+        writer = start(write)
+        while not lock.stats["writes"]:
+            time.sleep(0.01)
+        reader = start(read)
+        time.sleep(0.1)
+        order.append("first read")
+    writer.join()
+    reader.join()
+
+    assert order == ["first read", "write", "read"]
+    assert lock.stats["write_waits"] == 1 and lock.stats["read_waits"] == 1
+    assert lock.stats["write_wait_max_ms"] > 0
+
+def test_reentrancy_and_no_upgrade():
+    lock = ReadWriteLock()
+
+    with lock.write():
+        with lock.write(), lock.read():
+            pass
+    with lock.read():
+        with lock.read():
+            pass
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+    with lock.write():
+        pass
+
+def test_concurrent_mutations_and_reads_keep_the_indexes_consistent():
+    book = AddressBook()
+    errors = []
+
+    def mutate(offset):
+        for i in range(200):
+            record = Record(f"Name{offset + i:04d}")
+            record.add_phone(f"050{offset + i:07d}")
+            book.add_record(record)
+            if i % 2:
+                book.remove_record(f"Name{offset + i - 1:04d}")
+
+    def read():
+        for _ in range(200):
+            try:
+                names = [record.name.value for record in book.search("Name")]
+                assert names == sorted(names)
+                book.page(0, 10)
+            except Exception as e:  # collected for the main thread to report
+                errors.append(e)
+
+    threads = [start(lambda: mutate(0)), start(lambda: mutate(1000)), start(read)]
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(book) == 200
+    assert [record.name.value for record in book.search("Name")] == sorted(book)
+    assert all(book.find_by_phone(f"050{int(name[4:]):07d}") for name in book)
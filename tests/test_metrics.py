@@ -0,0 +1,73 @@
+"""
+Tests of the latency metrics and the stats command
+"""
+
+import pytest
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import show_phone, show_stats
+from assistant_bot.decorators import input_error
+from assistant_bot.helpers.metrics import BUCKETS, METRICS, Histogram, Metrics
+
+def test_histogram_counts_and_quantiles():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.0003)
+    for _ in range(10):
+        histogram.observe(0.02, error=True)
+
+    assert histogram.count == 100 and histogram.errors == 10
+    assert histogram.total == pytest.approx(0.227)
+    assert histogram.buckets[BUCKETS.index(0.0005)] == 90
+    assert 0.00025 < histogram.quantile(0.5) <= 0.0005
+    assert 0.01 < histogram.quantile(0.99) <= 0.02
+    assert Histogram().quantile(0.5) == 0.0
+
+def test_slowest_bucket_is_bounded_by_the_longest_call():
+    histogram = Histogram()
+    histogram.observe(30.0)
+
+    assert histogram.buckets[-1] == 1
+    assert histogram.quantile(0.99) <= 30.0
+
+def test_timed_operation_counts_failures():
+    metrics = Metrics()
+
+    with metrics.timed("save"):
+        pass
+    with pytest.raises(OSError):
+        with metrics.timed("save"):
+            raise OSError("disk full")
+
+    histogram = metrics.histograms[("operation", "save")]
+    assert histogram.count == 2 and histogram.errors == 1
+
+def test_prometheus_histograms_are_cumulative(tmp_path):
+    metrics = Metrics()
+    metrics.observe("command", "add_contact", 0.0002)
+    metrics.observe("command", "add_contact", 20.0, error=True)
+    metrics.set_gauge("contacts", 2)
+
+    path = tmp_path / "bot.prom"
+    metrics.write_prometheus(str(path))
+    lines = path.read_text(encoding="utf-8").splitlines()
+
+    assert 'assistant_bot_command_seconds_bucket{command="add_contact",le="0.0001"} 0' in lines
+    assert 'assistant_bot_command_seconds_bucket{command="add_contact",le="0.00025"} 1' in lines
+    assert 'assistant_bot_command_seconds_bucket{command="add_contact",le="+Inf"} 2' in lines
+    assert 'assistant_bot_command_seconds_count{command="add_contact"} 2' in lines
+    assert 'assistant_bot_command_errors_total{command="add_contact"} 1' in lines
+    assert "assistant_bot_contacts 2" in lines
+
+def test_commands_are_measured_and_shown_by_stats():
+    @input_error
+    def failing_command():
+        raise ValueError("no")
+
+    failing_command()
+    show_phone(["John"], AddressBook())
+
+    assert METRICS.histograms[("command", "failing_command")].errors == 1
+    lines = show_stats(AddressBook(), None).splitlines()
+    assert lines[:3] == ["Contacts: 0", "Mutations: 0", "Unsaved mutations: 0"]
+    assert any(line.startswith("Command failing_command: 1 calls, 1 errors") for line in lines)
+    assert any(line.startswith("Command show_phone: ") for line in lines)
@@ -0,0 +1,91 @@
+"""
+Tests of the sorted name index and the queries answered from it
+"""
+
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories import AddressBook as address_book
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+
+NAMES = ["Bob", "alice", "Carl", "Alex", "bella", "Dina"]
+
+def make_book(names):
+    """
+    Creates an address book with a record for each name
+
+    Arguments:
+    names -- the names of the records
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    for name in names:
+        book.add_record(Record(name))
+    return book
+
+def names(records):
+    """
+    Returns the names of records
+
+    Arguments:
+    records -- the records
+
+    Returns:
+    list -- the names
+    """
+    return [record.name.value for record in records]
+
+def test_prefix_ignores_case():
+    book = make_book(NAMES)
+
+    assert names(book.search("al")) == ["Alex", "Alice"]
+    assert book.complete("B", limit=1) == ["Bella"]
+
+def test_between_includes_both_prefixes():
+    book = make_book(NAMES)
+
+    assert names(book.between("b", "c")) == ["Bella", "Bob", "Carl"]
+    assert names(book.between("", "a")) == ["Alex", "Alice"]
+    assert names(book.between("d", "")) == ["Dina"]
+
+def test_pages_follow_name_order():
+    book = make_book(NAMES)
+
+    assert names(book.page(1, 2)) == ["Alice", "Bella"]
+    assert names(book.page_after("Bella", 2)) == ["Bob", "Carl"]
+    book.remove_record("Bob")
+    assert names(book.page_after("Bob", 2)) == ["Carl", "Dina"]
+
+def test_batch_is_merged_into_a_built_index():
+    book = make_book(NAMES)
+    book.search("")
+
+    replaced = Record("Carl")
+    replaced.add_phone("0501234567")
+    book.add_records([Record("Anna"), Record("Zoe"), Record("Carl"), replaced])
+
+    keys = book.name_index.keys
+    assert keys == sorted(keys)
+    assert names(book.search("")) == ["Alex", "Alice", "Anna", "Bella", "Bob", "Carl",
+                                      "Dina", "Zoe"]
+    assert book.find_by_phone("0501234567")[0] is book["Carl"]
+
+def test_rename_moves_the_record():
+    book = make_book(NAMES)
+    book.search("")
+
+    book.edit_record("Bob", "Aaron")
+
+    assert names(book.page(0, 2)) == ["Aaron", "Alex"]
+
+def test_records_are_taken_in_batches(monkeypatch):
+    monkeypatch.setattr(address_book, "RECORDS_BATCH", 2)
+    book = make_book(NAMES)
+
+    records = book.records()
+    first = next(records)
+    book.remove_record("Bob")
+    book.add_record(Record("Ed"))
+
+    assert [first.name.value] + names(records) == ["Alex", "Alice", "Bella", "Carl", "Dina",
+                                                   "Ed"]
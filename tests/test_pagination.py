@@ -0,0 +1,79 @@
+"""
+Tests of the paginated, cursor-based all command
+"""
+
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import show_all
+from assistant_bot.decorators import ErrorMessage
+
+def make_book(count):
+    """
+    Creates an address book with numbered records
+
+    Arguments:
+    count -- the number of records
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    book.add_records(Record(f"Name{i:02d}") for i in range(count))
+    return book
+
+def names(text):
+    """
+    Returns the names of the records shown by the all command
+
+    Arguments:
+    text -- the output of the command
+
+    Returns:
+    list -- the names
+    """
+    return [line.split(",")[0].removeprefix("Contact name: ")
+            for line in text.splitlines() if line.startswith("Contact name: ")]
+
+def test_pages_follow_the_cursor():
+    book = make_book(5)
+    session = {}
+
+    first = show_all(["--limit", "2"], book, session)
+    assert names(first) == ["Name00", "Name01"]
+    assert first.endswith("Type 'all next' to see more.")
+    assert names(show_all(["next"], book, session)) == ["Name02", "Name03"]
+    last = show_all(["next"], book, session)
+    assert names(last) == ["Name04"]
+    assert "all next" not in last
+    assert show_all(["next"], book, session) == "No more contacts."
+
+def test_cursor_survives_changes_between_pages():
+    book = make_book(4)
+    session = {}
+
+    show_all(["--limit", "2"], book, session)
+    book.remove_record("Name01")
+    book.add_record(Record("Name00a"))
+    book.remove_record("Name02")
+
+    assert names(show_all(["next"], book, session)) == ["Name03"]
+
+def test_offset_and_empty_book():
+    assert names(show_all(["--offset", "3", "--limit", "1"], make_book(5), {})) == ["Name03"]
+    assert show_all([], AddressBook(), {}) == "No contacts."
+    assert show_all(["--limit", "0"], make_book(1), {}) == "No contacts."
+
+def test_page_is_rendered_again_after_a_change():
+    book = make_book(3)
+    show_all([], book, {})
+
+    book.find_record("Name01").add_phone("0501234567")
+
+    assert "0501234567" in show_all([], book, {})
+
+def test_invalid_arguments():
+    book = make_book(1)
+
+    assert isinstance(show_all(["--limit"], book, {}), ErrorMessage)
+    assert isinstance(show_all(["--limit", "many"], book, {}), ErrorMessage)
+    assert isinstance(show_all(["--page", "1"], book, {}), ErrorMessage)
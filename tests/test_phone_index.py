@@ -0,0 +1,68 @@
+"""
+Tests of the reverse phone index and the find-phone command
+"""
+
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.command_handlers import find_phone
+from assistant_bot.decorators import ErrorMessage
+
+def make_book():
+    """
+    Creates an address book where two contacts share a phone number
+
+    Arguments:
+    None
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    for name, phones in (("John", ["0501234567", "0500000000"]), ("Jane", ["0500000000"])):
+        record = Record(name)
+        for phone in phones:
+            record.add_phone(phone)
+        book.add_record(record)
+    return book
+
+def owners(book, phone):
+    """
+    Returns the names owning a phone number
+
+    Arguments:
+    book -- the address book
+    phone -- the phone number
+
+    Returns:
+    list -- the names
+    """
+    return [record.name.value for record in book.find_by_phone(phone)]
+
+def test_shared_number_finds_every_owner():
+    book = make_book()
+
+    assert owners(book, "050-000-00-00") == ["Jane", "John"]
+    assert owners(book, "0501234567") == ["John"]
+    assert owners(book, "0509999999") == []
+
+def test_index_follows_the_changes():
+    book = make_book()
+    owners(book, "0500000000")
+
+    book.find_record("John").edit_phone("0501234567", "0507777777")
+    book.find_record("Jane").remove_phone("0500000000")
+    book.edit_record("John", "Johnny")
+
+    assert owners(book, "0501234567") == []
+    assert owners(book, "0507777777") == ["Johnny"]
+    assert owners(book, "0500000000") == ["Johnny"]
+    book.remove_record("Johnny")
+    assert owners(book, "0500000000") == []
+
+def test_find_phone_command():
+    book = make_book()
+
+    assert find_phone(["0501234567"], book) == ("Contact name: John, phones: "
+                                                "0501234567; 0500000000, birthday: None")
+    assert find_phone(["0509999999"], book) == "No contacts with phone 0509999999."
+    assert isinstance(find_phone(["123"], book), ErrorMessage)
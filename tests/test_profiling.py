@@ -0,0 +1,90 @@
+"""
+Tests of the opt-in profiling of the commands
+"""
+
+import pstats
+import pytest
+from assistant_bot.command_handlers import profile_commands
+from assistant_bot.decorators import ErrorMessage
+from assistant_bot.helpers.profiling import PROFILER, Profiler
+
+def busy(count):
+    """
+    Builds a list, for the profiled calls
+
+    Arguments:
+    count -- the length of the list
+
+    Returns:
+    list -- the list
+    """
+    return [str(i) for i in range(count)]
+
+def test_cprofile_reports_every_command(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    profiler.start("cprofile")
+
+    assert profiler.run("all", busy, 10) == busy(10)
+    profiler.run("all", busy, 10)
+    profiler.run(None, busy, 1)
+    paths = profiler.stop()
+
+    assert [path.rsplit("-", 1)[1] for path in paths] == ["all.prof", "empty.prof", "commands.txt"]
+    assert "busy" in str(pstats.Stats(paths[0]).stats)
+    assert "== all: 2 of 2 calls profiled ==" in open(paths[-1], encoding="utf-8").read()
+    assert profiler.mode is None
+
+def test_sample_mode_profiles_one_call_in_some(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_every=3)
+    profiler.start("sample")
+
+    for _ in range(7):
+        profiler.run("find", busy, 10)
+
+    assert profiler.calls["find"] == 7
+    assert profiler.profiled["find"] == 3
+    profiler.stop()
+
+def test_memory_mode_keeps_the_largest_allocation(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    profiler.start("memory")
+
+    profiler.run("small", busy, 10)
+    profiler.run("large", busy, 100000)
+    paths = profiler.stop()
+
+    assert profiler.peaks["large"] > 100 * profiler.peaks["small"]
+    assert paths[0].endswith(".tracemalloc")
+    assert "large: 1 calls, largest" in open(paths[1], encoding="utf-8").read()
+
+def test_failing_command_is_still_profiled(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    profiler.start("cprofile")
+
+    with pytest.raises(ZeroDivisionError):
+        profiler.run("divide", lambda: 1 / 0)
+
+    assert profiler.profiled["divide"] == 1
+    profiler.stop()
+
+def test_start_and_stop_errors(tmp_path):
+    profiler = Profiler(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        profiler.start("trace")
+    with pytest.raises(ValueError):
+        profiler.stop()
+    profiler.start("sample")
+    with pytest.raises(ValueError):
+        profiler.start("cprofile")
+    profiler.stop()
+
+def test_profile_command(tmp_path, monkeypatch):
+    monkeypatch.setattr(PROFILER, "directory", str(tmp_path))
+
+    assert profile_commands(["start", "sample"]) == "Profiling started in the sample mode."
+    assert isinstance(profile_commands(["start"]), ErrorMessage)
+    assert profile_commands(["dump"]).startswith("Profile written to:\n")
+    assert profile_commands(["stop"]).startswith("Profile written to:\n")
+    assert isinstance(profile_commands(["stop"]), ErrorMessage)
+    assert isinstance(profile_commands([]), ErrorMessage)
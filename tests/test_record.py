@@ -0,0 +1,86 @@
+"""
+Tests of the record model and its fields
+"""
+
+import pickle
+import pytest
+from assistant_bot.address_book.models.Phone import Phone
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+
+def make_record():
+    """
+    Creates a record with two phone numbers and a birthday
+
+    Arguments:
+    None
+
+    Returns:
+    Record -- the record
+    """
+    record = Record("john")
+    record.add_phone("0501234567")
+    record.add_phone("050-765-43-21")
+    record.add_birthday("15.03.1990")
+    return record
+
+def test_fields_are_normalized():
+    record = make_record()
+
+    assert record.name.value == "John"
+    assert [phone.value for phone in record.phones] == ["0501234567", "0507654321"]
+    assert str(record.birthday) == "15.03.1990"
+    assert str(record) == ("Contact name: John, phones: 0501234567; 0507654321, "
+                           "birthday: 15.03.1990")
+
+def test_invalid_phone_is_refused():
+    with pytest.raises(ValueError):
+        Record("John").add_phone("12345")
+
+def test_phones_view_changes_the_record():
+    record = make_record()
+
+    record.phones.append(Phone("0500000000"))
+    record.phones.remove("0501234567")
+    del record.phones[0]
+    record.phones[0] = "0511111111"
+
+    assert record.phones == [Phone("0511111111")]
+    assert record.find_phone("0511111111") is not None
+
+def test_phones_view_changes_are_reported_to_the_book():
+    book = AddressBook()
+    book.add_record(make_record())
+    unsaved = book.unsaved
+
+    book.find_record("John").phones.append("0500000000")
+
+    assert book.unsaved == unsaved + 1
+    assert book.find_by_phone("0500000000")[0].name.value == "John"
+
+def test_name_and_birthday_refuse_changes():
+    record = make_record()
+
+    with pytest.raises(AttributeError):
+        record.name.value = "Jane"
+    with pytest.raises(AttributeError):
+        record.birthday.value = None
+    with pytest.raises(AttributeError):
+        record.phones[0].value = "0500000000"
+    assert record.name.value == "John"
+
+def test_record_survives_pickling_without_its_observer():
+    record = make_record()
+    record.set_observer(AddressBook())
+
+    copy = pickle.loads(pickle.dumps(record))
+
+    assert str(copy) == str(record)
+    assert copy._observer is None
+
+def test_congrats_date_moves_from_the_weekend():
+    record = Record("John")
+    record.add_birthday("16.03.1990")
+
+    # 16 March 2024 is a Saturday
+    assert record.get_congrats_date(record.birthday.value.replace(year=2024).date()) == "18-03-2024"
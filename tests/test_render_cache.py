@@ -0,0 +1,62 @@
+"""
+Tests of the cache of rendered pages and lists of birthdays
+"""
+
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from assistant_bot.address_book.indexes.RenderCache import MAX_LISTINGS
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+
+def make_book(count):
+    """
+    Creates an address book of records with a phone number and a birthday
+
+    Arguments:
+    count -- the number of records
+
+    Returns:
+    AddressBook -- the address book
+    """
+    book = AddressBook()
+    for i in range(count):
+        record = Record(f"Name{i:03d}")
+        record.add_phone(f"050{i:07d}")
+        record.add_birthday(f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.1990")
+        book.add_record(record)
+    return book
+
+def test_page_is_rendered_again_after_a_change():
+    book = make_book(30)
+    text, cursor = book.render_page(0, 10)
+    assert cursor == "Name009"
+    assert text.splitlines()[0].startswith("Contact name: Name000, phones: 0500000000")
+
+    book["Name001"].add_phone("0509999999")
+    text, _ = book.render_page(0, 10)
+
+    assert "0509999999" in text.splitlines()[1]
+    assert book.render_page(0, 10) == (text, "Name009")
+
+def test_birthdays_are_rendered_again_after_a_birthday_changes():
+    book = make_book(30)
+    today = datetime.date(2024, 1, 1)
+    before = book.render_birthdays(30, today)
+
+    book["Name000"].add_birthday("02.01.1990")
+
+    assert book.render_birthdays(30, today) != before
+
+def test_concurrent_queries_evicting_listings_agree():
+    book = make_book(200)
+    queries = [(offset, 5) for offset in range(MAX_LISTINGS * 3)]
+    expected = {query: "\n".join(str(record) for record in book.page(*query)) for query in queries}
+
+    def render(query):
+        return query, book.render_page(*query)[0]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(render, queries * 20))
+
+    assert all(text == expected[query] for query, text in results)
+    assert len(book.render_cache.pages) <= MAX_LISTINGS
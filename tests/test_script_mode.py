@@ -0,0 +1,60 @@
+"""
+Tests of the non-interactive script mode
+"""
+
+import io
+import json
+from assistant_bot.main import main
+
+def run(data_dir, capsys, lines, *options):
+    """
+    Runs a script through the command line of the bot
+
+    Arguments:
+    data_dir -- the directory of the storage files
+    capsys -- the pytest capsys fixture
+    lines -- the lines of the script
+    options -- the other command line options
+
+    Returns:
+    tuple -- the exit code and the printed lines
+    """
+    path = data_dir / "script.txt"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    status = main(["--script", str(path), *options])
+    return status, capsys.readouterr().out.splitlines()
+
+def test_commands_run_and_the_book_is_saved(data_dir, capsys):
+    status, output = run(data_dir, capsys, ["# contacts", "", "add John 0501234567",
+                                            "add-birthday John 15.03.1990", "exit",
+                                            "add Jane 0507654321"])
+
+    assert status == 0
+    assert output == ["Contact added.", "Birthdate added."]
+
+    status, output = run(data_dir, capsys, ["phone John", "find-phone 0507654321"])
+    assert status == 0
+    assert output == ["John: 0501234567", "No contacts with phone 0507654321."]
+
+def test_failing_command_stops_the_script(data_dir, capsys):
+    status, output = run(data_dir, capsys, ["add John 0501234567", "phone Jane",
+                                            "add Jane 0507654321"])
+
+    assert status == 1
+    assert len(output) == 2
+    assert "Jane" not in run(data_dir, capsys, ["all"])[1][0]
+
+def test_json_results(data_dir, capsys):
+    status, output = run(data_dir, capsys, ["add John 0501234567", "# comment", "fly"], "--json")
+
+    assert status == 1
+    assert [json.loads(line) for line in output] == [
+        {"line": 1, "command": "add", "ok": True, "output": "Contact added."},
+        {"line": 3, "command": "fly", "ok": False, "output": "Invalid command."},
+    ]
+
+def test_commands_from_stdin(data_dir, capsys, monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("add John 0501234567\nsearch Jo\n"))
+
+    assert main(["--script", "-"]) == 0
+    assert capsys.readouterr().out.splitlines()[1].startswith("Contact name: John")
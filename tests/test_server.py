@@ -0,0 +1,101 @@
+"""
+Tests of the server mode: the protocol, pipelining and failing commands
+"""
+
+import asyncio
+import pytest
+from assistant_bot import server as server_module
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.server import Server, start_server
+
+async def exchange(address, requests):
+    """
+    Sends requests to a server at once and reads their responses
+
+    Arguments:
+    address -- the path of the Unix socket
+    requests -- the request lines
+
+    Returns:
+    list -- the (status, lines) pairs of the responses, in order
+    """
+    reader, writer = await asyncio.open_unix_connection(address)
+    writer.write("".join(f"{request}\n" for request in requests).encode("utf-8"))
+    await writer.drain()
+    responses = []
+    for _ in requests:
+        status, count = (await reader.readline()).decode("utf-8").split()
+        lines = [(await reader.readline()).decode("utf-8").rstrip("\n") for _ in range(int(count))]
+        responses.append((status, lines))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+def serve(book, requests, tmp_path):
+    """
+    Starts a server for a book, sends it requests and stops it
+
+    Arguments:
+    book -- the address book to serve
+    requests -- the request lines
+    tmp_path -- the directory of the socket
+
+    Returns:
+    list -- the (status, lines) pairs of the responses, in order
+    """
+    async def run():
+        server = Server(book, None)
+        address = str(tmp_path / "bot.sock")
+        listener = await start_server(server, f"unix:{address}")
+        try:
+            responses = await exchange(address, requests)
+            # Lets the server finish the connection before the loop stops
+            await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+            return responses
+        finally:
+            listener.close()
+            server.executor.shutdown()
+
+    return asyncio.run(run())
+
+def test_pipelined_requests_are_answered_in_order(tmp_path):
+    responses = serve(AddressBook(), [
+        "add John 0501234567",
+        "add-phone John 0507654321",
+        "phone John",
+        "phone Nobody",
+        "close",
+    ], tmp_path)
+
+    assert [status for status, _ in responses] == ["OK", "OK", "OK", "ERR", "OK"]
+    assert responses[2][1] == ["John: 0501234567; 0507654321"]
+    assert responses[4][1] == ["Good bye!"]
+
+def test_failing_command_is_answered_with_an_error(tmp_path, monkeypatch):
+    def fail(command, args, book, session, autosave=None):
+        if command == "boom":
+            raise RuntimeError("disk on fire")
+        return f"ran {command}"
+
+    monkeypatch.setattr(server_module, "run_command", fail)
+    responses = serve(AddressBook(), ["boom", "hello", "close"], tmp_path)
+
+    assert responses[0] == ("ERR", ["Error: disk on fire"])
+    assert responses[1] == ("OK", ["ran hello"])
+
+def test_multiline_results_report_their_line_count(tmp_path):
+    responses = serve(AddressBook(), ["add Ann 0501111111", "add Bob 0502222222", "list A..Z"],
+                      tmp_path)
+
+    assert responses[2][0] == "OK"
+    assert len(responses[2][1]) == 2
+
+def test_removed_record_is_not_changed(tmp_path):
+    book = AddressBook()
+    serve(book, ["add John 0501234567"], tmp_path)
+    record = book.find_record("John")
+    book.remove_record("John")
+
+    with pytest.raises(ValueError, match="Record not found"):
+        record.add_phone("0507654321")
+    assert "John" not in book
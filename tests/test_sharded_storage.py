@@ -0,0 +1,96 @@
+"""
+Tests of the sharded storage backend
+"""
+
+import os
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage import ShardedStorage as sharded_storage
+from assistant_bot.address_book.storage.ShardedStorage import ShardedStorage
+
+def open_book(directory, **options):
+    """
+    Loads an address book from a ShardedStorage
+
+    Arguments:
+    directory -- the directory of the shards
+    options -- the options of the ShardedStorage
+
+    Returns:
+    AddressBook -- the loaded address book
+    """
+    book = AddressBook(backend=ShardedStorage(str(directory), shards=4, workers=2, **options))
+    book.load()
+    return book
+
+def add(book, *names):
+    """
+    Adds records with a birthday to an address book
+
+    Arguments:
+    book -- the address book
+    names -- the names of the records
+
+    Returns:
+    None
+    """
+    for name in names:
+        record = Record(name)
+        record.add_birthday("01.02.1990")
+        book.add_record(record)
+
+def test_round_trip_rewrites_only_dirty_shards(tmp_path):
+    book = open_book(tmp_path, shared=True)
+    add(book, "Ann", "Bob", "Carl", "Dina", "Eve")
+    book.close()
+    files = set(os.listdir(tmp_path))
+
+    book = open_book(tmp_path, shared=True)
+    assert sorted(book) == ["Ann", "Bob", "Carl", "Dina", "Eve"]
+    book.edit_record("Ann", "Anna")
+    book.remove_record("Bob")
+    book.close()
+
+    book = open_book(tmp_path, shared=True)
+    assert sorted(book) == ["Anna", "Carl", "Dina", "Eve"]
+    assert len(set(os.listdir(tmp_path)) & files) > 2
+    book.close()
+
+def test_failed_save_keeps_changes_unsaved(tmp_path, monkeypatch):
+    book = open_book(tmp_path)
+    add(book, "Ann")
+
+    def fail(path, write):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sharded_storage, "atomic_write", fail)
+    book.dump()
+    assert book.dirty
+
+    monkeypatch.undo()
+    book.dump()
+    assert not book.dirty
+    book.close()
+    assert "Ann" in open_book(tmp_path)
+
+def test_stale_save_is_refused(tmp_path):
+    first = open_book(tmp_path, shared=True)
+    second = open_book(tmp_path, shared=True)
+    add(first, "Ann")
+    first.dump()
+
+    add(second, "Bob")
+    second.dump()
+
+    assert second.dirty
+    assert sorted(open_book(tmp_path, shared=True)) == ["Ann"]
+
+def test_cleanup_removes_unlisted_shards(tmp_path):
+    book = open_book(tmp_path)
+    add(book, "Ann")
+    book.close()
+    (tmp_path / "shard-000.999999.pickle").write_bytes(b"partial")
+
+    open_book(tmp_path)
+
+    assert not (tmp_path / "shard-000.999999.pickle").exists()
@@ -0,0 +1,116 @@
+"""
+Tests of one book file shared by several processes
+"""
+
+import multiprocessing
+import time
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage.FileLock import fcntl
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="advisory locks are POSIX only")
+
+def open_book(path, **options):
+    """
+    Loads an address book from a shared FileStorage
+
+    Arguments:
+    path -- the path of the snapshot file
+    options -- the options of the FileStorage, the changes are polled every minute by default
+
+    Returns:
+    AddressBook -- the loaded address book
+    """
+    options.setdefault("poll_interval", 60)
+    book = AddressBook(backend=FileStorage(str(path), shared=True, **options))
+    book.load()
+    return book
+
+def add(book, name, phone):
+    """
+    Adds a record with a phone number and saves the book
+
+    Arguments:
+    book -- the address book
+    name -- the name of the record
+    phone -- the phone number
+
+    Returns:
+    None
+    """
+    record = Record(name)
+    record.add_phone(phone)
+    book.add_record(record)
+    book.dump()
+
+def add_in_process(path, name, phone):
+    """
+    Process: adds a record to the shared book and closes it
+
+    Arguments:
+    path -- the path of the snapshot file
+    name -- the name of the record
+    phone -- the phone number
+
+    Returns:
+    None
+    """
+    book = open_book(path)
+    add(book, name, phone)
+    book.close()
+
+def test_journal_changes_are_applied_by_the_other_book(tmp_path):
+    first = open_book(tmp_path / "book.pickle")
+    second = open_book(tmp_path / "book.pickle")
+
+    add(first, "John", "0501234567")
+    assert second.backend.refresh(second)
+    assert [record.name.value for record in second.find_by_phone("0501234567")] == ["John"]
+
+    second.find_record("John").add_phone("0507654321")
+    second.dump()
+    assert first.backend.refresh(first)
+    assert [phone.value for phone in first["John"].phones] == ["0501234567", "0507654321"]
+    assert not first.backend.refresh(first)
+
+    first.close()
+    second.close()
+
+def test_replaced_snapshot_is_read_again_without_the_journal(tmp_path):
+    first = open_book(tmp_path / "book.pickle", journal=False)
+    second = open_book(tmp_path / "book.pickle", journal=False)
+
+    add(first, "John", "0501234567")
+    assert second.backend.refresh(second)
+    assert "John" in second
+
+    second.add_record(Record("Jane"))
+    add(first, "Carl", "0500000000")
+    # The unsaved change cannot be merged, the next save of the second book wins
+    assert not second.backend.refresh(second)
+    assert "Carl" not in second
+
+    first.close()
+    second.close()
+
+def test_changes_of_another_process_are_polled(tmp_path):
+    book = open_book(tmp_path / "book.pickle", poll_interval=0.05)
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=add_in_process,
+                              args=(tmp_path / "book.pickle", "John", "0501234567"))
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+
+    deadline = time.monotonic() + 5
+    while "John" not in book and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert "John" in book
+    add(book, "Jane", "0507654321")
+    book.close()
+
+    book = open_book(tmp_path / "book.pickle")
+    assert sorted(book) == ["Jane", "John"]
+    book.close()
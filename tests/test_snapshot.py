@@ -0,0 +1,67 @@
+"""
+Tests of the crash-atomic, copy-on-write snapshots
+"""
+
+import io
+import os
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.storage.Snapshot import SnapshotView, UMASK, atomic_write, \
+                                                        read_snapshot, write_snapshot
+
+def make_records(count):
+    """
+    Creates records with a phone number
+
+    Arguments:
+    count -- the number of records
+
+    Returns:
+    dict -- the records by name
+    """
+    records = {}
+    for i in range(count):
+        record = Record(f"Name{i}")
+        record.add_phone(f"050{i:07d}")
+        records[record.name.value] = record
+    return records
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "book.pickle"
+    atomic_write(str(path), lambda file: file.write(b"old"))
+
+    def fail(file):
+        file.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        atomic_write(str(path), fail)
+
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["book.pickle"]
+
+def test_file_keeps_its_permissions(tmp_path):
+    path = tmp_path / "book.pickle"
+    atomic_write(str(path), lambda file: file.write(b"new"))
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~UMASK
+
+    os.chmod(path, 0o640)
+    atomic_write(str(path), lambda file: file.write(b"newer"))
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+def test_view_keeps_the_records_as_they_were_when_taken():
+    records = make_records(3)
+    view = SnapshotView(records)
+
+    view.preserve(records["Name1"])
+    records["Name1"].add_phone("0509999999")
+    records["Name2"] = Record("Other")
+
+    stream = io.BytesIO()
+    write_snapshot(stream, view, 7)
+    stream.seek(0)
+    data, journal_seq = read_snapshot(stream)
+
+    assert journal_seq == 7
+    assert sorted(data) == ["Name0", "Name1", "Name2"]
+    assert [phone.value for phone in data["Name1"].phones] == ["0500000001"]
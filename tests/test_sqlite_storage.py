@@ -0,0 +1,94 @@
+"""
+Tests of the SQLite storage backend
+"""
+
+import datetime
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.repositories.AddressBook import AddressBook
+from assistant_bot.address_book.storage.FileStorage import FileStorage
+from assistant_bot.address_book.storage.SqliteStorage import SqliteStorage
+
+def open_book(path, migrate_from=None):
+    """
+    Loads an address book from a SqliteStorage
+
+    Arguments:
+    path -- the path of the database file
+    migrate_from -- the FileStorage to import into an empty database, or None
+
+    Returns:
+    AddressBook -- the loaded address book
+    """
+    book = AddressBook(backend=SqliteStorage(str(path), migrate_from))
+    book.load()
+    return book
+
+def add(book, name, phone, birthday=None):
+    """
+    Adds a record to an address book
+
+    Arguments:
+    book -- the address book
+    name -- the name of the record
+    phone -- the phone number
+    birthday -- the birthday, or None
+
+    Returns:
+    None
+    """
+    record = Record(name)
+    record.add_phone(phone)
+    if birthday:
+        record.add_birthday(birthday)
+    book.add_record(record)
+
+def test_round_trip_of_every_mutation(tmp_path):
+    book = open_book(tmp_path / "book.sqlite3")
+    add(book, "John", "0501234567", "15.03.1990")
+    add(book, "Jane", "0507654321")
+    add(book, "Carl", "0500000000")
+    book.find_record("Jane").edit_phone("0507654321", "0501111111")
+    book.find_record("Jane").add_birthday("29.02.1992")
+    book.find_record("John").add_phone("0502222222")
+    book.find_record("John").remove_phone("0501234567")
+    book.edit_record("Carl", "Karl")
+    book.remove_record("Karl")
+    book.close()
+
+    book = open_book(tmp_path / "book.sqlite3")
+    assert sorted(book) == ["Jane", "John"]
+    assert str(book["John"]) == "Contact name: John, phones: 0502222222, birthday: 15.03.1990"
+    assert str(book["Jane"]) == "Contact name: Jane, phones: 0501111111, birthday: 29.02.1992"
+    assert [record.name.value for record in book.find_by_phone("0501111111")] == ["Jane"]
+    book.close()
+
+def test_birthdays_from_the_month_index_match_the_in_memory_index(tmp_path):
+    book = open_book(tmp_path / "book.sqlite3")
+    for day in range(1, 29, 3):
+        for month in range(1, 13):
+            add(book, f"Name{month:02d}{day:02d}", f"05{month:02d}{day:02d}0000",
+                f"{day:02d}.{month:02d}.1990")
+    add(book, "Leap", "0509999999", "29.02.1992")
+
+    memory = AddressBook()
+    memory.add_records(record.copy() for record in book.records())
+    for today in (datetime.date(2023, 12, 25), datetime.date(2024, 2, 20)):
+        for days in (0, 7, 30, 365):
+            expected = [(record.name.value, date) for record, date
+                        in memory.upcoming_birthdays(days, today)]
+            found = [(record.name.value, date) for record, date
+                     in book.upcoming_birthdays(days, today)]
+            assert found == expected
+    book.close()
+
+def test_snapshot_is_migrated_into_an_empty_database(tmp_path):
+    snapshot = FileStorage(str(tmp_path / "book.pickle"), journal=False)
+    book = AddressBook(backend=snapshot)
+    book.load()
+    add(book, "John", "0501234567")
+    book.close()
+
+    book = open_book(tmp_path / "book.sqlite3", FileStorage(str(tmp_path / "book.pickle")))
+
+    assert list(book) == ["John"]
+    book.close()
@@ -0,0 +1,74 @@
+"""
+Tests of the typo-tolerant search of the trigram index
+"""
+
+import pytest
+from assistant_bot.address_book.models.Record import Record
+from assistant_bot.address_book.indexes.TrigramIndex import TrigramIndex
+
+NAMES = ["John", "Johnson", "Jonathan", "Anna", "Maria", "Mary", "Alexander"]
+
+@pytest.fixture
+def index():
+    """
+    Returns a trigram index of the test names
+
+    Arguments:
+    None
+
+    Returns:
+    TrigramIndex -- the index
+    """
+    index = TrigramIndex()
+    index.build(NAMES)
+    return index
+
+def names(index, query):
+    """
+    Returns the names found for a query, most similar first
+
+    Arguments:
+    index -- the trigram index
+    query -- the text to look for
+
+    Returns:
+    list -- the names
+    """
+    return [name for _, name in index.similar(query, 3)]
+
+@pytest.mark.parametrize("query, expected", [
+    ("Jhon", "John"),
+    ("Mray", "Mary"),
+    ("Alexnader", "Alexander"),
+])
+def test_swapped_letters_are_found(index, query, expected):
+    assert names(index, query)[0] == expected
+
+@pytest.mark.parametrize("query, expected", [
+    ("Jon", "John"),
+    ("Ana", "Anna"),
+    ("Mria", "Maria"),
+    ("Alexnder", "Alexander"),
+])
+def test_missing_letter_is_found(index, query, expected):
+    assert expected in names(index, query)[:2]
+
+@pytest.mark.parametrize("query, expected", [
+    ("Johhn", "John"),
+    ("Annna", "Anna"),
+    ("Marya", "Mary"),
+])
+def test_extra_letter_is_found(index, query, expected):
+    assert names(index, query)[0] == expected
+
+def test_exact_name_ranks_first(index):
+    assert index.similar("john", 1) == [(1.0, "John")]
+
+def test_renamed_name_is_found_by_its_new_name(index):
+    index.rename(Record("Joan"), "John")
+
+    assert "John" not in names(index, "John")
+    assert names(index, "Joan")[0] == "Joan"
+
+def test_unrelated_query_finds_nothing(index):
+    assert index.similar("Zzyzx") == []